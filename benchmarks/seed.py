@@ -0,0 +1,165 @@
+"""
+Seeds a database with generated MeteringPoints, addresses, technologies
+and delegates for benchmarking. Data is generated by PostgreSQL itself
+(using generate_series), so millions of rows can be inserted in seconds.
+
+Generated data:
+
+    - N MeteringPoints with alternating type (production/consumption)
+      and sector (DK1/DK2).
+    - An address for each MeteringPoint.
+    - Technology codes for each MeteringPoint, using one of four known
+      technologies.
+    - D delegates, distributed evenly among S subjects, so that each
+      subject has access to D / S MeteringPoints. D must be a multiple
+      of N (each MeteringPoint is delegated to D / N subjects).
+
+Predefined dataset sizes are available in SCALES.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+from meteringpoints_shared.db import db
+
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Predefined dataset sizes (each subject has access to D / S MeteringPoints)
+SCALES = {
+    '10k': {
+        'meteringpoints': 10000,
+        'delegates': 50000,
+        'subjects': 100,
+    },
+    '100k': {
+        'meteringpoints': 100000,
+        'delegates': 500000,
+        'subjects': 1000,
+    },
+    '1m': {
+        'meteringpoints': 1000000,
+        'delegates': 5000000,
+        'subjects': 1000,
+    },
+}
+
+TECHNOLOGIES = (
+    ('T010101', 'F01010101', 'solar'),
+    ('T020202', 'F02020202', 'wind'),
+    ('T030303', 'F03030303', 'coal'),
+    ('T040404', 'F04040404', 'nuclear'),
+)
+
+
+def gsrn(i: int) -> str:
+    """
+    Returns the GSRN of the i'th generated MeteringPoint.
+    """
+    return 'gsrn%012d' % i
+
+
+def subject(i: int) -> str:
+    """
+    Returns the i'th generated subject.
+    """
+    return 'subject%d' % i
+
+
+def group_size(meteringpoints: int, delegates: int, subjects: int) -> int:
+    """
+    Returns the number of subjects within each "round" of delegates.
+    MeteringPoint i is delegated to subject (i % group_size), among others.
+    """
+    return subjects // (delegates // meteringpoints)
+
+
+def migrate(revision: str):
+    """
+    Migrates the database to the provided revision.
+    """
+    config = Config(os.path.join(SRC, 'migrations', 'alembic.ini'))
+    config.set_main_option(
+        'script_location', os.path.join(SRC, 'migrations'))
+    command.upgrade(config, revision)
+
+
+def seed(
+        session: db.Session,
+        meteringpoints: int,
+        delegates: int,
+        subjects: int,
+):
+    """
+    Seeds the database. Expects the tables to be empty.
+    """
+    if delegates % meteringpoints:
+        raise ValueError('delegates must be a multiple of meteringpoints')
+
+    delegates_per_meteringpoint = delegates // meteringpoints
+
+    if subjects % delegates_per_meteringpoint:
+        raise ValueError(
+            'subjects must be a multiple of delegates per meteringpoint')
+
+    params = {
+        'meteringpoints': meteringpoints,
+        'delegates': delegates,
+        'group_size': group_size(meteringpoints, delegates, subjects),
+    }
+
+    session.execute(text("""
+        INSERT INTO meteringpoint (gsrn, type, sector)
+        SELECT
+            'gsrn' || lpad(i::text, 12, '0'),
+            (CASE WHEN i % 2 = 0 THEN 'production' ELSE 'consumption' END)
+                ::energydirection,
+            'DK' || (1 + (i / 2) % 2)
+        FROM generate_series(0, :meteringpoints - 1) AS i
+    """), params)
+
+    session.execute(text("""
+        INSERT INTO meteringpoint_address (
+            gsrn, street_code, street_name, building_number, post_code,
+            city_name, municipality_code
+        )
+        SELECT
+            'gsrn' || lpad(i::text, 12, '0'),
+            lpad((i % 9999)::text, 4, '0'),
+            'Street ' || (i % 9999),
+            (1 + i % 200)::text,
+            (1000 + i % 9000)::text,
+            'City ' || (i % 500),
+            (100 + i % 900)::text
+        FROM generate_series(0, :meteringpoints - 1) AS i
+    """), params)
+
+    for tech_code, fuel_code, type in TECHNOLOGIES:
+        session.execute(text("""
+            INSERT INTO technology (tech_code, fuel_code, type)
+            VALUES (:tech_code, :fuel_code, :type)
+        """), {'tech_code': tech_code, 'fuel_code': fuel_code, 'type': type})
+
+    session.execute(text("""
+        INSERT INTO meteringpoint_technology (gsrn, tech_code, fuel_code)
+        SELECT
+            'gsrn' || lpad(i::text, 12, '0'),
+            'T0' || (1 + i % 4) || '0' || (1 + i % 4) || '0' || (1 + i % 4),
+            'F0' || repeat((1 + i % 4)::text || '0', 3) || (1 + i % 4)
+        FROM generate_series(0, :meteringpoints - 1) AS i
+    """), params)
+
+    session.execute(text("""
+        INSERT INTO meteringpoint_delegate (gsrn, subject)
+        SELECT
+            'gsrn' || lpad((d % :meteringpoints)::text, 12, '0'),
+            'subject' || (
+                (d / :meteringpoints) * :group_size
+                + (d % :meteringpoints) % :group_size
+            )
+        FROM generate_series(0, :delegates - 1) AS d
+    """), params)
+
+    session.execute(text('ANALYZE'))
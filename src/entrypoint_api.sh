@@ -4,5 +4,9 @@ set -e
 # Apply database migrations
 alembic --config=migrations/alembic.ini upgrade head
 
-# Run API
-gunicorn 'meteringpoints_api.app:create_app()' -w 2 --threads 2 -b 0.0.0.0:80
+# Run API (API_MODE=asgi serves requests asynchronously)
+if [ "$API_MODE" == "asgi" ]; then
+  uvicorn meteringpoints_api.asgi:create_served_app --factory --host 0.0.0.0 --port 80
+else
+  gunicorn --config gunicorn.conf.py meteringpoints_api.wsgi:app
+fi
@@ -0,0 +1,93 @@
+"""
+gunicorn configuration for serving the API in production
+(see meteringpoints_api/wsgi.py).
+
+Each worker process serves API_THREADS requests concurrently (gthread),
+and each request holds exactly one database connection while handled,
+so unless configured otherwise, each worker's connection pool is sized
+to its number of threads. The total number of database connections is
+at most:
+
+    replicas * API_WORKERS * (SQL_POOL_SIZE + SQL_MAX_OVERFLOW + 2)
+
+as each worker also holds two connections listening for notifications;
+one for access cache invalidations (if enabled) and one for technology
+changes (see post_fork()).
+"""
+import os
+import shutil
+import tempfile
+
+
+# -- Server ------------------------------------------------------------------
+
+
+bind = os.environ.get('API_BIND', '0.0.0.0:80')
+worker_class = 'gthread'
+workers = int(os.environ.get('API_WORKERS', 2))
+threads = int(os.environ.get('API_THREADS', 8))
+timeout = int(os.environ.get('API_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('API_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('API_KEEPALIVE', 5))
+
+# Import the application once in the master process, sharing memory
+# between workers and failing fast on errors during startup
+preload_app = True
+
+
+# -- Connection pool ---------------------------------------------------------
+
+# Must be set before the application (and thereby its configuration)
+# is imported
+
+os.environ.setdefault('SQL_POOL_SIZE', str(threads))
+os.environ.setdefault('SQL_MAX_OVERFLOW', '2')
+
+
+# -- Metrics -----------------------------------------------------------------
+
+# Metrics are written to files shared between workers, so any worker
+# can expose metrics of all workers
+
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = \
+        tempfile.mkdtemp(prefix='prometheus-')
+
+
+def on_starting(server):
+    """
+    Removes metrics left behind by previous runs.
+    """
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+# -- Workers -----------------------------------------------------------------
+
+
+def post_fork(server, worker):
+    """
+    Discards database connections inherited from the master process,
+    and starts listening for access cache invalidations and technology
+    changes in the worker.
+    """
+    from meteringpoints_shared.db import db
+    from meteringpoints_shared.catalog import technology_catalog
+    from meteringpoints_api.wsgi import access_cache
+
+    db.engine.dispose()
+
+    if access_cache is not None:
+        access_cache.start_listening()
+
+    technology_catalog.start_listening()
+
+
+def child_exit(server, worker):
+    """
+    Removes live metrics (ie. gauges) of exited workers.
+    """
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,7 +1,7 @@
 from .app import create_app
 
 
-create_app().run_debug(
+create_app(start_listening=True).run_debug(
     host='0.0.0.0',
     port=9093,
 )
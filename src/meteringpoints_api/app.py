@@ -1,33 +1,189 @@
-from energytt_platform.api import Application, ScopedGuard
+from typing import List, Tuple, Optional
 
-from meteringpoints_shared.config import INTERNAL_TOKEN_SECRET
+from energytt_platform.api import \
+    Application, Endpoint, EndpointGuard, ScopedGuard
 
-from .endpoints import GetMeteringPointList, GetMeteringPointDetails
+from meteringpoints_shared.access import AccessCache
+from meteringpoints_shared.cache import \
+    Cache, LRUCache, RedisCache, require_redis
+from meteringpoints_shared.catalog import technology_catalog
+from meteringpoints_shared.config import (
+    INTERNAL_TOKEN_SECRET,
+    ACCESS_CACHE_ENABLED,
+    ACCESS_CACHE_BACKEND,
+    ACCESS_CACHE_REDIS_URL,
+    ACCESS_CACHE_SIZE,
+    ACCESS_CACHE_MAX_GSRN,
+    ACCESS_CACHE_TTL,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_BACKEND,
+    RESPONSE_CACHE_REDIS_URL,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    COMPRESSION_ENABLED,
+)
 
+from .metrics import instrument
+from .compression import compress
+from .endpoints import (
+    GetMeteringPointList,
+    GetMeteringPointDetails,
+    GetMeteringPointDetailsBatch,
+    ExportMeteringPoints,
+)
 
-def create_app() -> Application:
+
+# (method, path, endpoint, guards)
+TEndpointDefinition = Tuple[str, str, Endpoint, List[EndpointGuard]]
+
+
+def create_access_cache(
+        start_listening: bool = False,
+) -> Optional[AccessCache]:
+    """
+    Creates a cache of subjects' accessible MeteringPoints, if enabled,
+    optionally shared by all processes using Redis, and starts listening
+    for invalidations.
+
+    :param start_listening: Whether to start listening for invalidations
+        now. Without listening, the cache is not used. Forking servers must
+        start listening in each worker process after forking, as the
+        listening thread does not survive the fork.
+    """
+    if not ACCESS_CACHE_ENABLED:
+        return None
+
+    if ACCESS_CACHE_BACKEND == 'redis':
+        require_redis('ACCESS_CACHE_BACKEND', ACCESS_CACHE_REDIS_URL)
+        shared = RedisCache(
+            url=ACCESS_CACHE_REDIS_URL,
+            ttl=ACCESS_CACHE_TTL,
+            prefix='meteringpoints:access:',
+        )
+    elif ACCESS_CACHE_BACKEND == 'memory':
+        shared = None
+    else:
+        raise ValueError(
+            f'Unknown access cache backend: {ACCESS_CACHE_BACKEND}')
+
+    access_cache = AccessCache(
+        max_size=ACCESS_CACHE_SIZE,
+        max_gsrn=ACCESS_CACHE_MAX_GSRN,
+        ttl=ACCESS_CACHE_TTL,
+        shared=shared,
+    )
+
+    if start_listening:
+        access_cache.start_listening()
+
+    return access_cache
+
+
+def create_response_cache() -> Optional[Cache[str, bytes]]:
+    """
+    Creates a cache of serialized responses, if enabled, either in memory
+    (in each process) or in Redis (shared by all processes).
+
+    :raises RuntimeError: If Redis is configured, but the redis package
+        is not installed or no URL is configured
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+
+    if RESPONSE_CACHE_BACKEND == 'redis':
+        require_redis('RESPONSE_CACHE_BACKEND', RESPONSE_CACHE_REDIS_URL)
+        return RedisCache(
+            url=RESPONSE_CACHE_REDIS_URL,
+            ttl=RESPONSE_CACHE_TTL,
+            prefix='meteringpoints:response:',
+        )
+    elif RESPONSE_CACHE_BACKEND == 'memory':
+        return LRUCache(
+            max_size=RESPONSE_CACHE_SIZE,
+            ttl=RESPONSE_CACHE_TTL,
+        )
+    else:
+        raise ValueError(
+            f'Unknown response cache backend: {RESPONSE_CACHE_BACKEND}')
+
+
+def create_endpoints(
+        access_cache: Optional[AccessCache] = None,
+        response_cache: Optional[Cache[str, bytes]] = None,
+) -> List[TEndpointDefinition]:
+    """
+    Creates the API's endpoints.
+    """
+    return [
+        (
+            'POST',
+            '/list',
+            GetMeteringPointList(
+                access_cache=access_cache,
+                response_cache=response_cache,
+            ),
+            [ScopedGuard('meteringpoints.read')],
+        ),
+        (
+            'GET',
+            '/details',
+            GetMeteringPointDetails(access_cache=access_cache),
+            [ScopedGuard('meteringpoints.read')],
+        ),
+        (
+            'POST',
+            '/details/batch',
+            GetMeteringPointDetailsBatch(access_cache=access_cache),
+            [ScopedGuard('meteringpoints.read')],
+        ),
+        (
+            'POST',
+            '/export',
+            ExportMeteringPoints(access_cache=access_cache),
+            [ScopedGuard('meteringpoints.read')],
+        ),
+    ]
+
+
+def create_app(
+        access_cache: Optional[AccessCache] = None,
+        response_cache: Optional[Cache[str, bytes]] = None,
+        start_listening: bool = False,
+) -> Application:
     """
     Creates a new instance of the application.
+
+    :param access_cache: Cache of subjects' accessible MeteringPoints,
+        created by create_access_cache() if omitted
+    :param response_cache: Cache of serialized responses, created by
+        create_response_cache() if omitted
+    :param start_listening: Whether to start listening for changes to
+        the technology catalog (and access cache) now, which holds a
+        database connection each. Entry points serving the application
+        opt in; see create_access_cache().
     """
+    if access_cache is None:
+        access_cache = create_access_cache(start_listening=start_listening)
+
+    if response_cache is None:
+        response_cache = create_response_cache()
+
+    if start_listening:
+        technology_catalog.start_listening()
 
     app = Application.create(
         name='MeteringPoints API',
         secret=INTERNAL_TOKEN_SECRET,
         health_check_path='/health',
+        endpoints=create_endpoints(
+            access_cache=access_cache,
+            response_cache=response_cache,
+        ),
     )
 
-    app.add_endpoint(
-        method='POST',
-        path='/list',
-        endpoint=GetMeteringPointList(),
-        guards=[ScopedGuard('meteringpoints.read')],
-    )
+    instrument(app)
 
-    app.add_endpoint(
-        method='GET',
-        path='/details',
-        endpoint=GetMeteringPointDetails(),
-        guards=[ScopedGuard('meteringpoints.read')],
-    )
+    if COMPRESSION_ENABLED:
+        compress(app)
 
     return app
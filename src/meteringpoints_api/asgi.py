@@ -0,0 +1,494 @@
+"""
+Asynchronous (ASGI) serving mode of the API.
+
+Serves the same endpoints as the (synchronous) Flask application, with
+the same Request/Response models, guards and database queries, but
+handles requests on an asyncio event loop. Database queries are executed
+by an async driver (asyncpg) using a connection pool shared by all
+requests, so requests waiting for the database do not occupy a thread.
+
+Endpoints' handle_request() are invoked using AsyncSession.run_sync(),
+which runs them in a greenlet that yields to the event loop whenever it
+waits for the database.
+
+Streaming responses (ie. POST /export) are produced in a thread pool, one
+chunk at a time, using the synchronous database engine.
+
+Responses are compressed like the Flask application does (see
+meteringpoints_api.compression), in the thread pool.
+
+Run using an ASGI server, ie.:
+
+    uvicorn --factory meteringpoints_api.asgi:create_served_app
+"""
+import re
+import time
+import asyncio
+from inspect import getfullargspec
+from dataclasses import is_dataclass
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+from functools import cached_property, partial
+from typing import \
+    List, Dict, Tuple, Any, Optional, Union, Iterator, Callable, Awaitable
+
+import serpyco
+import rapidjson
+from prometheus_client import REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from sqlalchemy.ext.asyncio import \
+    AsyncEngine, AsyncSession, create_async_engine
+
+from energytt_platform.tokens import TokenEncoder
+from energytt_platform.serialize import simple_serializer
+from energytt_platform.models.auth import InternalToken
+from energytt_platform.api import \
+    Context, Endpoint, EndpointGuard, HttpResponse, BadRequest
+from energytt_platform.api.guards import bouncer
+from energytt_platform.api.endpoints import HealthCheck
+
+from meteringpoints_shared.db import db
+from meteringpoints_shared.catalog import technology_catalog
+from meteringpoints_shared.metrics import REQUEST_LATENCY
+from meteringpoints_shared.config import (
+    INTERNAL_TOKEN_SECRET,
+    ASYNC_SQL_POOL_SIZE,
+    ASYNC_SQL_MAX_OVERFLOW,
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_SIZE,
+)
+
+from .app import \
+    create_access_cache, create_response_cache, create_endpoints
+from .responses import StreamingResponse
+from .compression import (
+    add_vary,
+    compress_body,
+    compress_chunks,
+    is_compressible,
+    negotiate_coding,
+    set_compressed_headers,
+)
+
+
+TScope = Dict[str, Any]
+TReceive = Callable[[], Awaitable[Dict[str, Any]]]
+TSend = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def get_async_uri(uri: str) -> str:
+    """
+    Returns the SQLAlchemy connection string for the async driver
+    (asyncpg) equivalent to the provided connection string.
+    """
+    return re.sub(r'^postgres(ql)?(\+\w+)?://', 'postgresql+asyncpg://', uri)
+
+
+class AsgiContext(Context):
+    """
+    ASGI-specific context.
+    """
+    def __init__(self, scope: TScope, *args, **kwargs):
+        """
+        :param scope: The ASGI connection scope
+        """
+        super(AsgiContext, self).__init__(*args, **kwargs)
+        self.scope = scope
+
+    @cached_property
+    def headers(self) -> Dict[str, str]:
+        """
+        :returns: HTTP request headers
+        """
+        return {
+            name.decode('latin-1').title(): value.decode('latin-1')
+            for name, value in self.scope['headers']
+        }
+
+    @cached_property
+    def cookies(self) -> Dict[str, str]:
+        """
+        :returns: HTTP request cookies
+        """
+        cookies = SimpleCookie(self.headers.get('Cookie', ''))
+        return {name: morsel.value for name, morsel in cookies.items()}
+
+
+class AsgiApplication(object):
+    """
+    A minimal ASGI application serving Endpoints.
+
+    GET endpoints read request data from the query string, and POST
+    endpoints read request data from the JSON body, like the Flask
+    Application does.
+    """
+    def __init__(self, secret: str, engine: AsyncEngine):
+        """
+        :param secret: Secret used to sign internal tokens
+        :param engine: Async database engine
+        """
+        self.secret = secret
+        self.engine = engine
+        self.routes: Dict[Tuple[str, str], Tuple[Endpoint, List[EndpointGuard]]] = {}  # noqa: E501
+        self.on_shutdown: List[Callable[[], Awaitable[None]]] = [
+            engine.dispose,
+        ]
+
+    @cached_property
+    def token_encoder(self) -> TokenEncoder[InternalToken]:
+        """
+        Internal token encoder.
+        """
+        return TokenEncoder(
+            schema=InternalToken,
+            secret=self.secret,
+        )
+
+    def add_endpoint(
+            self,
+            method: str,
+            path: str,
+            endpoint: Endpoint,
+            guards: Optional[List[EndpointGuard]] = None,
+    ):
+        """
+        Adds an endpoint to the application.
+        """
+        if method not in ('GET', 'POST'):
+            raise RuntimeError(
+                'Unsupported HTTP method for endpoints: %s' % method)
+
+        self.routes[(method, path)] = (endpoint, guards or [])
+
+    async def __call__(self, scope: TScope, receive: TReceive, send: TSend):
+        """
+        Invoked by the ASGI server.
+        """
+        if scope['type'] == 'lifespan':
+            await self._handle_lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._handle_http(scope, receive, send)
+        else:
+            raise RuntimeError('Unsupported ASGI scope: %s' % scope['type'])
+
+    async def _handle_lifespan(self, receive: TReceive, send: TSend):
+        """
+        Handles startup and shutdown of the application.
+        """
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for callback in self.on_shutdown:
+                    await callback()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _handle_http(self, scope: TScope, receive: TReceive,
+                           send: TSend):
+        """
+        Handles a HTTP request.
+        """
+        begin = time.perf_counter()
+        route = self.routes.get((scope['method'], scope['path']))
+
+        if scope['path'] == '/metrics' and scope['method'] == 'GET':
+            response = HttpResponse(
+                status=200,
+                body=generate_latest(REGISTRY),
+                headers={'Content-Type': CONTENT_TYPE_LATEST},
+            )
+        elif route is None:
+            response = HttpResponse(status=404, body='404 Not Found')
+        else:
+            endpoint, guards = route
+            body = await self._read_body(receive)
+
+            try:
+                response = await self._invoke_endpoint(
+                    scope, body, endpoint, guards)
+            except HttpResponse as e:
+                response = e
+
+        await self._send_response(scope, send, response)
+
+        if route is not None:
+            REQUEST_LATENCY \
+                .labels(
+                    method=scope['method'],
+                    endpoint=scope['path'],
+                    status=str(response.status),
+                ) \
+                .observe(time.perf_counter() - begin)
+
+    async def _read_body(self, receive: TReceive) -> bytes:
+        """
+        Reads the complete request body.
+        """
+        body = b''
+
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+
+            if not message.get('more_body', False):
+                return body
+
+    async def _invoke_endpoint(
+            self,
+            scope: TScope,
+            body: bytes,
+            endpoint: Endpoint,
+            guards: List[EndpointGuard],
+    ) -> HttpResponse:
+        """
+        Invokes an endpoint and returns its response.
+        """
+        context = AsgiContext(scope=scope, token_encoder=self.token_encoder)
+
+        if guards:
+            bouncer.validate(context, guards)
+
+        handler_kwargs = {}
+
+        if endpoint.requires_context:
+            handler_kwargs['context'] = context
+
+        # Defaulting to an empty dictionary makes it possible to omit
+        # request data for models where all fields are optional
+        if endpoint.should_parse_request_data:
+            handler_kwargs['request'] = self._parse_request_data(
+                data=self._get_request_data(scope, body) or {},
+                schema=endpoint.request_schema,
+            )
+
+        if 'session' not in getfullargspec(endpoint.handle_request)[0]:
+            return_value = endpoint.handle_request(**handler_kwargs)
+        else:
+            async with AsyncSession(
+                    self.engine, expire_on_commit=False) as session:
+                return_value = await session.run_sync(
+                    partial(self._run_endpoint, endpoint, handler_kwargs))
+
+        if isinstance(return_value, HttpResponse):
+            return return_value
+        elif is_dataclass(return_value):
+            return HttpResponse(status=200, model=return_value)
+        elif return_value is None:
+            return HttpResponse(status=200)
+        else:
+            raise RuntimeError('Endpoint returned invalid response')
+
+    def _run_endpoint(
+            self,
+            endpoint: Endpoint,
+            handler_kwargs: Dict[str, Any],
+            session: Any,
+    ) -> Any:
+        """
+        Invokes the endpoint with a (synchronous) session. Runs within
+        AsyncSession.run_sync().
+        """
+        return endpoint.handle_request(session=session, **handler_kwargs)
+
+    def _get_request_data(
+            self,
+            scope: TScope,
+            body: bytes,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Reads request data from the query string (GET) or JSON body (POST).
+        """
+        if scope['method'] == 'GET':
+            return dict(parse_qsl(scope['query_string'].decode('latin-1')))
+
+        if not body:
+            return None
+
+        try:
+            return rapidjson.loads(body.decode('utf8'))
+        except rapidjson.JSONDecodeError:
+            raise BadRequest(body='Invalid JSON body provided')
+
+    def _parse_request_data(self, data: Dict[str, Any], schema: Any) -> Any:
+        """
+        Deserializes request data into the endpoint's Request model.
+        """
+        try:
+            return simple_serializer.deserialize(
+                data=data,
+                schema=schema,
+            )
+        except serpyco.exception.ValidationError as e:
+            raise BadRequest(body=str(e))
+
+    async def _send_response(
+            self,
+            scope: TScope,
+            send: TSend,
+            response: HttpResponse,
+    ):
+        """
+        Sends a HTTP response, compressed if accepted by the client.
+        """
+        headers = {'Content-Type': response.actual_mimetype}
+        headers.update(response.actual_headers or {})
+
+        if isinstance(response, StreamingResponse):
+            body = iter(response.actual_body or ())
+        else:
+            body = self._encode(response.actual_body or b'')
+
+        if COMPRESSION_ENABLED:
+            body = await self._compress(scope, response, headers, body)
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status,
+            'headers': [
+                (name.encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers.items()
+            ],
+        })
+
+        if isinstance(body, bytes):
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+            })
+        else:
+            await self._send_chunks(send, body)
+
+    async def _compress(
+            self,
+            scope: TScope,
+            response: HttpResponse,
+            headers: Dict[str, str],
+            body: Union[bytes, Iterator[Any]],
+    ) -> Union[bytes, Iterator[bytes]]:
+        """
+        Compresses a response body using the content-coding accepted by
+        the client, if the response is worth compressing, and updates its
+        headers accordingly. Streamed bodies are compressed as they are
+        sent (see _send_chunks()).
+        """
+        if not is_compressible(response.status, response.actual_mimetype) \
+                or 'Content-Encoding' in headers:
+            return body
+
+        add_vary(headers, 'Accept-Encoding')
+
+        coding = negotiate_coding(next((
+            value.decode('latin-1')
+            for name, value in scope['headers']
+            if name.lower() == b'accept-encoding'
+        ), None))
+
+        if coding is None:
+            return body
+
+        if isinstance(body, bytes):
+            if len(body) < COMPRESSION_MIN_SIZE:
+                return body
+
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(
+                None, compress_body, body, coding)
+        else:
+            body = compress_chunks(body, coding)
+
+        set_compressed_headers(headers, coding)
+
+        return body
+
+    async def _send_chunks(self, send: TSend, chunks: Iterator[Any]):
+        """
+        Sends a response body in chunks. Chunks are produced in a thread,
+        as producing them may block (ie. fetching rows from the database).
+        """
+        loop = asyncio.get_running_loop()
+
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+
+                if chunk is None:
+                    break
+
+                await send({
+                    'type': 'http.response.body',
+                    'body': self._encode(chunk),
+                    'more_body': True,
+                })
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                await loop.run_in_executor(None, close)
+
+        await send({
+            'type': 'http.response.body',
+            'body': b'',
+        })
+
+    def _encode(self, body: Union[str, bytes]) -> bytes:
+        """
+        Encodes a response body (or chunk of it) as bytes.
+        """
+        if isinstance(body, str):
+            return body.encode('utf8')
+        return body
+
+
+def create_app(start_listening: bool = False) -> AsgiApplication:
+    """
+    Creates a new instance of the ASGI application.
+
+    :param start_listening: Whether to start listening for changes to
+        the technology catalog and access cache now (see create_app() in
+        meteringpoints_api.app)
+    """
+    engine = create_async_engine(
+        get_async_uri(db.uri),
+        pool_size=ASYNC_SQL_POOL_SIZE,
+        max_overflow=ASYNC_SQL_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
+
+    app = AsgiApplication(
+        secret=INTERNAL_TOKEN_SECRET,
+        engine=engine,
+    )
+
+    app.add_endpoint(
+        method='GET',
+        path='/health',
+        endpoint=HealthCheck(),
+    )
+
+    if start_listening:
+        technology_catalog.start_listening()
+
+    endpoints = create_endpoints(
+        access_cache=create_access_cache(start_listening=start_listening),
+        response_cache=create_response_cache(),
+    )
+
+    for method, path, endpoint, guards in endpoints:
+        app.add_endpoint(
+            method=method,
+            path=path,
+            endpoint=endpoint,
+            guards=guards,
+        )
+
+    return app
+
+
+def create_served_app() -> AsgiApplication:
+    """
+    Creates the ASGI application served by an ASGI server, listening for
+    changes (the event loop runs in a single process, so it is never
+    forked after listening has started).
+    """
+    return create_app(start_listening=True)
@@ -0,0 +1,296 @@
+"""
+Compression of API responses, negotiated by the Accept-Encoding header.
+
+gzip is always available, while brotli (br) and zstd are available if
+the brotli or zstandard packages are installed. If the client accepts
+more than one equally, zstd is preferred over br over gzip. Levels favour
+CPU cost over compression ratio, as responses are compressed on every
+request (see COMPRESSION_LEVEL_*).
+
+Responses smaller than COMPRESSION_MIN_SIZE are sent uncompressed, as
+the saving would not outweigh the cost. Streaming responses (of unknown
+size) are always compressed, one chunk at a time, flushing the compressor
+after each chunk, so the client can decompress each chunk as soon as it
+is received.
+
+The ETag of compressed responses is weakened (like nginx does), as a
+strong ETag promises identical bytes, while If-None-Match (which uses
+the weak comparison) still matches the ETag of the uncompressed response.
+"""
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Iterable, Iterator, Callable, Optional, Union
+
+import flask
+from energytt_platform.api import Application
+
+from meteringpoints_shared.config import (
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_LEVEL_GZIP,
+    COMPRESSION_LEVEL_BROTLI,
+    COMPRESSION_LEVEL_ZSTD,
+)
+
+from .encoding import parse_accept
+
+# Only required for brotli and zstd compression
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Mimetypes of responses worth compressing
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    'application/msgpack',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+)
+
+
+# -- Compressors -------------------------------------------------------------
+
+
+class Compressor(ABC):
+    """
+    Compresses a single response body, possibly in chunks.
+    """
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compresses data, returning compressed output (if any) so far.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def flush(self) -> bytes:
+        """
+        Returns the remaining compressed output of data so far, so it can
+        be decompressed before more data is compressed.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """
+        Returns the remaining compressed output, ending the body.
+        """
+        raise NotImplementedError
+
+
+class GzipCompressor(Compressor):
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(
+            level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor(Compressor):
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class ZstdCompressor(Compressor):
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+@dataclass(frozen=True)
+class ContentCoding:
+    """
+    A content-coding (as in Accept-Encoding and Content-Encoding).
+    """
+    name: str
+    create: Callable[[], Compressor]
+
+
+def get_codings() -> List[ContentCoding]:
+    """
+    Returns the available content-codings, in order of preference.
+    """
+    codings = []
+
+    if zstandard is not None:
+        codings.append(ContentCoding(
+            name='zstd',
+            create=lambda: ZstdCompressor(COMPRESSION_LEVEL_ZSTD),
+        ))
+
+    if brotli is not None:
+        codings.append(ContentCoding(
+            name='br',
+            create=lambda: BrotliCompressor(COMPRESSION_LEVEL_BROTLI),
+        ))
+
+    codings.append(ContentCoding(
+        name='gzip',
+        create=lambda: GzipCompressor(COMPRESSION_LEVEL_GZIP),
+    ))
+
+    return codings
+
+
+# -- Negotiation -------------------------------------------------------------
+
+
+def negotiate_coding(
+        accept_encoding: Optional[str],
+) -> Optional[ContentCoding]:
+    """
+    Returns the content-coding the client prefers by its Accept-Encoding
+    header, or None if it accepts none of the available codings.
+    """
+    accepted = dict(parse_accept(accept_encoding or ''))
+    best: Optional[ContentCoding] = None
+    best_q = 0.0
+
+    for coding in get_codings():
+        q = accepted.get(coding.name, accepted.get('*', 0.0))
+
+        if q > best_q:
+            best, best_q = coding, q
+
+    return best
+
+
+def is_compressible(status: int, mimetype: Optional[str]) -> bool:
+    """
+    Returns True if a response is worth compressing (if large enough).
+    """
+    return status == 200 and mimetype in COMPRESSIBLE_MIMETYPES
+
+
+# -- Compression -------------------------------------------------------------
+
+
+def compress_body(body: bytes, coding: ContentCoding) -> bytes:
+    """
+    Compresses a complete response body.
+    """
+    compressor = coding.create()
+    return compressor.compress(body) + compressor.finish()
+
+
+def compress_chunks(
+        chunks: Iterable[Union[str, bytes]],
+        coding: ContentCoding,
+) -> Iterator[bytes]:
+    """
+    Compresses a response body one chunk at a time, yielding compressed
+    chunks which can be decompressed as soon as they are received.
+    """
+    compressor = coding.create()
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf8')
+
+            compressed = compressor.compress(chunk) + compressor.flush()
+
+            if compressed:
+                yield compressed
+
+        yield compressor.finish()
+    finally:
+        # Releases resources held by the producer of the chunks,
+        # ie. if the client disconnects before the body has been sent
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def add_vary(headers, name: str):
+    """
+    Adds a header name to the Vary header.
+    """
+    vary = headers.get('Vary')
+    headers['Vary'] = f'{vary}, {name}' if vary else name
+
+
+def set_compressed_headers(headers, coding: ContentCoding):
+    """
+    Sets the headers of a response compressed using the content-coding.
+    """
+    headers['Content-Encoding'] = coding.name
+    etag = headers.get('ETag')
+
+    if etag is not None and not etag.startswith('W/'):
+        headers['ETag'] = f'W/{etag}'
+
+
+# -- Flask -------------------------------------------------------------------
+
+
+def compress_response(response: flask.Response) -> flask.Response:
+    """
+    Compresses a response, if the client accepts compression and the
+    response is worth compressing.
+    """
+    if not is_compressible(response.status_code, response.mimetype) \
+            or 'Content-Encoding' in response.headers:
+        return response
+
+    add_vary(response.headers, 'Accept-Encoding')
+
+    coding = negotiate_coding(flask.request.headers.get('Accept-Encoding'))
+
+    if coding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_chunks(response.response, coding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+
+        if len(body) < COMPRESSION_MIN_SIZE:
+            return response
+
+        response.set_data(compress_body(body, coding))
+
+    set_compressed_headers(response.headers, coding)
+
+    return response
+
+
+def compress(app: Application):
+    """
+    Compresses responses of the application (see compress_response()).
+    """
+    app.wsgi_app.after_request(compress_response)
@@ -0,0 +1,204 @@
+"""
+Fast encoding of responses with MeteringPoints.
+
+Instead of building MeteringPoint dataclasses and serializing them with
+serpyco, endpoints can build the plain structure serpyco would produce
+directly from rows of DbMeteringPointRead (using column positions which
+are resolved once), and encode the entire response with a single call to
+a C encoder; JSON (using rapidjson, identical to serpyco's output) or
+MessagePack, if accepted by the client and the msgpack package is
+installed.
+"""
+from operator import itemgetter
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Iterable, Callable, Optional, Any
+
+import rapidjson
+
+from energytt_platform.api import Context
+
+from meteringpoints_shared.catalog import TTechnologies
+from meteringpoints_shared.models import ADDRESS_FIELDS, DbMeteringPointRead
+
+from .etags import etag_headers
+from .responses import EncodedResponse
+
+# Only required for MessagePack encoding
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+@dataclass(frozen=True)
+class Encoding:
+    """
+    An encoding of response bodies.
+    """
+    mimetype: str
+    encode: Callable[[Any], bytes]
+
+    # Other mimetypes clients might accept the encoding by
+    aliases: Tuple[str, ...] = ()
+
+
+JSON = Encoding(
+    mimetype='application/json',
+    encode=lambda obj: rapidjson.dumps(obj).encode(),
+)
+
+MSGPACK = Encoding(
+    mimetype='application/msgpack',
+    encode=lambda obj: msgpack.packb(obj),
+    aliases=('application/x-msgpack',),
+)
+
+
+def get_encodings() -> List[Encoding]:
+    """
+    Returns the available encodings, in order of preference.
+    """
+    if msgpack is None:
+        return [JSON]
+
+    return [JSON, MSGPACK]
+
+
+def negotiate_encoding(context: Context) -> Encoding:
+    """
+    Returns the encoding the client prefers by its Accept header, or JSON
+    if none of the available encodings are accepted explicitly.
+    Wildcards are not considered, so clients must explicitly ask for
+    anything but JSON.
+    """
+    best: Optional[Encoding] = None
+    best_q = 0.0
+
+    for mimetype, q in parse_accept(context.headers.get('Accept', '')):
+        for encoding in get_encodings():
+            if mimetype in (encoding.mimetype,) + encoding.aliases \
+                    and q > best_q:
+                best, best_q = encoding, q
+
+    return best or JSON
+
+
+def parse_accept(header: str) -> Iterable[Tuple[str, float]]:
+    """
+    Parses an Accept header into (mimetype, quality) pairs.
+    """
+    for part in header.split(','):
+        mimetype, *params = part.strip().split(';')
+        q = 1.0
+
+        for param in params:
+            name, _, value = param.strip().partition('=')
+
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+
+        if mimetype:
+            yield mimetype.strip().lower(), q
+
+
+class MeteringPointRowEncoder(object):
+    """
+    Builds MeteringPoints as they are serialized (plain dictionaries with
+    enums replaced by their values) directly from rows selecting the
+    columns of DbMeteringPointRead (see MeteringPointReadQuery.all_rows()).
+    """
+    def __init__(self, columns: Iterable[Any] = None):
+        """
+        :param columns: The columns selected, in order
+        """
+        if columns is None:
+            columns = DbMeteringPointRead.__table__.columns
+
+        names = [c.name for c in columns]
+
+        self._gsrn = names.index('gsrn')
+        self._type = names.index('type')
+        self._sector = names.index('sector')
+        self._tech_code = names.index('tech_code')
+        self._fuel_code = names.index('fuel_code')
+        self._address = itemgetter(*(
+            names.index(f'address_{f}') for f in ADDRESS_FIELDS))
+
+    def encode(
+            self,
+            row: Any,
+            technologies: TTechnologies,
+    ) -> Dict[str, Any]:
+        """
+        Builds a MeteringPoint from a row, like
+        DbMeteringPointRead.build_meteringpoint() does.
+
+        :param row: The MeteringPoint row
+        :param technologies: Type of known technologies mapped by
+            (tech_code, fuel_code), see TechnologyCatalog
+        """
+        meteringpoint_type = row[self._type]
+        tech_code = row[self._tech_code]
+        fuel_code = row[self._fuel_code]
+        technology_type = technologies.get((tech_code, fuel_code))
+        address = self._address(row)
+
+        return {
+            'gsrn': row[self._gsrn],
+            'type': meteringpoint_type.value
+            if meteringpoint_type is not None else None,
+            'sector': row[self._sector],
+            'technology': {
+                'tech_code': tech_code,
+                'fuel_code': fuel_code,
+                'type': technology_type.value,
+            } if technology_type is not None else None,
+            'address': dict(zip(ADDRESS_FIELDS, address))
+            if any(v is not None for v in address) else None,
+        }
+
+    def encode_many(
+            self,
+            rows: Iterable[Any],
+            technologies: TTechnologies,
+    ) -> List[Dict[str, Any]]:
+        """
+        Builds MeteringPoints from rows.
+        """
+        return [self.encode(row, technologies) for row in rows]
+
+
+meteringpoint_encoder = MeteringPointRowEncoder()
+
+
+def encoded_headers(etag: Optional[str] = None) -> Dict[str, str]:
+    """
+    Returns the headers of a response whose encoding is negotiated by the
+    Accept header, with the ETag of the response (if any).
+    """
+    headers = {'Vary': 'Accept'}
+
+    if etag is not None:
+        headers.update(etag_headers(etag))
+
+    return headers
+
+
+def encoded_response(
+        body: bytes,
+        encoding: Encoding,
+        etag: Optional[str] = None,
+) -> EncodedResponse:
+    """
+    Returns a response with a body encoded using the negotiated encoding,
+    and its ETag (if any).
+    """
+    return EncodedResponse(
+        status=200,
+        body=body,
+        mimetype=encoding.mimetype,
+        headers=encoded_headers(etag),
+    )
@@ -1,19 +1,93 @@
-from typing import List, Optional
+import io
+import csv
+import json
+from enum import Enum
+from typing import List, Dict, Optional, Tuple, Iterator, Any
 from dataclasses import dataclass, field
 from serpyco import number_field
 
-from energytt_platform.api import Endpoint, Context
+from energytt_platform.api import \
+    Endpoint, Context, HttpResponse, BadRequest
+from energytt_platform.serialize import simple_serializer, json_serializer
 from energytt_platform.models.meteringpoints import MeteringPoint
+from energytt_platform.models.tech import TechnologyType
 
 from meteringpoints_shared.db import db
-from meteringpoints_shared.queries import MeteringPointQuery
-from meteringpoints_shared.models import \
-    MeteringPointFilters, MeteringPointOrdering
+from meteringpoints_shared.cache import Cache, LRUCache
+from meteringpoints_shared.metrics import \
+    REQUEST_SECTION_LATENCY, RESPONSE_CACHE_REQUESTS, timed
+from meteringpoints_shared.access import AccessCache
+from meteringpoints_shared.catalog import technology_catalog, TTechnologies
+from meteringpoints_shared.controller import controller
+from meteringpoints_shared.queries import MeteringPointReadQuery
+from meteringpoints_shared.config import (
+    COUNT_CACHE_SIZE,
+    COUNT_CACHE_TTL,
+    DETAILS_BATCH_MAX_SIZE,
+    EXPORT_CHUNK_SIZE,
+)
+from meteringpoints_shared.models import (
+    ADDRESS_FIELDS,
+    DbMeteringPointRead,
+    MeteringPointFilters,
+    MeteringPointOrdering,
+    MeteringPointOrderingKeys,
+    MeteringPointCursor,
+    MeteringPointCountMode,
+    MeteringPointExportFormat,
+)
+
+from .etags import make_etag, is_not_modified
+from .responses import StreamingResponse, NotModified
+from .encoding import (
+    Encoding,
+    meteringpoint_encoder,
+    negotiate_encoding,
+    encoded_headers,
+    encoded_response,
+)
+
+
+# Cache key for totals; (subject, subject generation, filters)
+TCountCacheKey = Tuple[str, int, Optional[str]]
+
+
+def query_accessible_meteringpoints(
+        session: db.Session,
+        subject: str,
+        access_cache: Optional[AccessCache] = None,
+) -> MeteringPointReadQuery:
+    """
+    Returns a query of MeteringPoints accessible by the subject, filtered
+    by the subject's cached GSRNs if possible, otherwise by joining
+    delegates in the database.
+    """
+    query = MeteringPointReadQuery(session)
+
+    if access_cache is not None and access_cache.is_enabled:
+        gsrn = access_cache.get_accessible_gsrn(session, subject)
+
+        # None if the subject has access to too many MeteringPoints
+        if gsrn is not None:
+            return query.has_any_gsrn(list(gsrn))
+
+    return query.is_accessible_by(subject)
 
 
 class GetMeteringPointList(Endpoint):
     """
     Looks up many Measurements, optionally filtered and ordered.
+
+    Responses have an ETag derived from the subject's generation and the
+    request, and requests with a matching If-None-Match header are
+    answered with 304 Not Modified without querying MeteringPoints.
+
+    Responses are optionally cached (encoded) by their ETag, so
+    identical requests are answered from the cache until the subject's
+    generation changes, or the entry expires.
+
+    Responses are encoded directly from rows (see encoding.py), as JSON
+    or MessagePack depending on the Accept header.
     """
 
     @dataclass
@@ -24,52 +98,254 @@ class GetMeteringPointList(Endpoint):
         filters: Optional[MeteringPointFilters] = field(default=None)
         ordering: Optional[MeteringPointOrdering] = field(default=None)
 
+        # Cursor from a previous response (replaces offset when provided)
+        cursor: Optional[str] = field(default=None)
+
+        # How to count the total number of MeteringPoints
+        count: MeteringPointCountMode = \
+            field(default=MeteringPointCountMode.exact)
+
     @dataclass
     class Response:
         success: bool
-        total: int
+        total: Optional[int]
         meteringpoints: List[MeteringPoint]
 
+        # Cursor for the next page (None if this is the last page)
+        next_cursor: Optional[str] = field(default=None)
+
+    def __init__(
+            self,
+            count_cache: Optional[LRUCache[TCountCacheKey, int]] = None,
+            access_cache: Optional[AccessCache] = None,
+            response_cache: Optional[Cache[str, bytes]] = None,
+    ):
+        """
+        :param count_cache: Cache for exact totals (count=cached)
+        :param access_cache: Cache of subjects' accessible MeteringPoints
+        :param response_cache: Cache of serialized responses by ETag
+        """
+        if count_cache is None:
+            count_cache = LRUCache(
+                max_size=COUNT_CACHE_SIZE,
+                ttl=COUNT_CACHE_TTL,
+            )
+
+        self.count_cache = count_cache
+        self.access_cache = access_cache
+        self.response_cache = response_cache
+
     @db.session()
     def handle_request(
             self,
             request: Request,
             context: Context,
             session: db.Session,
-    ) -> Response:
+    ) -> HttpResponse:
         """
         Handle HTTP request.
         """
         subject = context.get_subject(required=True)
+        encoding = negotiate_encoding(context)
+        technologies = technology_catalog.get_technologies(session)
+
+        generation = controller.get_subject_generation(
+            session=session,
+            subject=subject,
+        )
 
-        query = MeteringPointQuery(session) \
-            .is_accessible_by(subject)
+        etag = self._get_etag(
+            request, subject, generation, technologies, encoding)
+
+        if etag is not None:
+            if is_not_modified(context, etag):
+                return NotModified(headers=encoded_headers(etag))
+
+            body = self._get_cached_body(etag)
+
+            if body is not None:
+                return encoded_response(body, encoding, etag)
+
+        ordering = request.ordering or MeteringPointOrdering(
+            key=MeteringPointOrderingKeys.gsrn,
+        )
+
+        query = query_accessible_meteringpoints(
+            session=session,
+            subject=subject,
+            access_cache=self.access_cache,
+        )
 
         if request.filters:
             query = query.apply_filters(request.filters)
 
-        if request.ordering:
-            results = query.apply_ordering(request.ordering)
+        results = query.apply_ordering(ordering)
+
+        if request.cursor:
+            results = results \
+                .apply_cursor(self._decode_cursor(request.cursor, ordering))
         else:
-            results = query
+            results = results.offset(request.offset)
+
+        with timed(REQUEST_SECTION_LATENCY,
+                   handler=self.__class__.__name__, section='query'):
+            # Fetches one row more than requested to tell whether
+            # there is a next page, without returning it
+            rows = results \
+                .limit(request.limit + 1) \
+                .all_rows()
 
-        results = results \
-            .offset(request.offset) \
-            .limit(request.limit)
+        if len(rows) > request.limit:
+            rows = rows[:request.limit]
+            next_cursor = MeteringPointCursor \
+                .after(rows[-1], ordering) \
+                .encode()
+        else:
+            next_cursor = None
 
-        # if request.ordering:
-        #     results = results.apply_ordering(request.ordering)
+        with timed(REQUEST_SECTION_LATENCY,
+                   handler=self.__class__.__name__, section='count'):
+            total = self._count(request, query, subject, generation)
 
-        return self.Response(
-            success=True,
-            total=query.count(),
-            meteringpoints=results.all(),
+        # Same as encoding self.Response
+        with timed(REQUEST_SECTION_LATENCY,
+                   handler=self.__class__.__name__, section='encode'):
+            body = encoding.encode({
+                'success': True,
+                'total': total,
+                'meteringpoints': meteringpoint_encoder.encode_many(
+                    rows, technologies),
+                'next_cursor': next_cursor,
+            })
+
+        if etag is not None and self.response_cache is not None:
+            self.response_cache.set(etag, body)
+
+        return encoded_response(body, encoding, etag)
+
+    def _get_cached_body(self, etag: str) -> Optional[bytes]:
+        """
+        Returns the body of the cached response with the provided ETag,
+        if any.
+        """
+        if self.response_cache is None:
+            return None
+
+        body = self.response_cache.get(etag)
+
+        RESPONSE_CACHE_REQUESTS.labels(
+            handler=self.__class__.__name__,
+            result='miss' if body is None else 'hit',
+        ).inc()
+
+        return body
+
+    def _get_etag(
+            self,
+            request: Request,
+            subject: str,
+            generation: int,
+            technologies: TTechnologies,
+            encoding: Encoding,
+    ) -> Optional[str]:
+        """
+        Returns the ETag of the response, which changes when the subject's
+        generation changes (ie. when its data changes), or None if the
+        response can change without it (ie. when estimating the total).
+        The ETag is also the key of the response in the response cache.
+
+        Technologies are part of the ETag, as the type of technology is
+        resolved using the TechnologyCatalog, which might not have been
+        reloaded yet when the subject's generation changes.
+        """
+        if request.count is MeteringPointCountMode.estimate:
+            return None
+
+        return make_etag(
+            subject,
+            generation,
+            json.dumps(simple_serializer.serialize(request), sort_keys=True),
+            sorted(technologies.items()),
+            encoding.mimetype,
         )
 
+    def _count(
+            self,
+            request: Request,
+            query: MeteringPointReadQuery,
+            subject: str,
+            generation: int,
+    ) -> Optional[int]:
+        """
+        Counts the total number of results as requested by the client.
+        """
+        if request.count is MeteringPointCountMode.none:
+            return None
+        elif request.count is MeteringPointCountMode.estimate:
+            return query.estimate_count()
+        elif request.count is MeteringPointCountMode.cached:
+            return self._count_cached(request, query, subject, generation)
+        else:
+            return query.count()
+
+    def _count_cached(
+            self,
+            request: Request,
+            query: MeteringPointReadQuery,
+            subject: str,
+            generation: int,
+    ) -> int:
+        """
+        Counts the total number of results, reusing a previous count until
+        the subject's generation changes (ie. when its data changes).
+        """
+        if request.filters:
+            filters = json.dumps(
+                simple_serializer.serialize(request.filters),
+                sort_keys=True,
+            )
+        else:
+            filters = None
+
+        key = (subject, generation, filters)
+        total = self.count_cache.get(key)
+
+        if total is None:
+            total = query.count()
+            self.count_cache.set(key, total)
+
+        return total
+
+    def _decode_cursor(
+            self,
+            cursor: str,
+            ordering: MeteringPointOrdering,
+    ) -> MeteringPointCursor:
+        """
+        Decodes cursor provided by the client.
+        """
+        try:
+            decoded = MeteringPointCursor.decode(cursor)
+        except MeteringPointCursor.DecodeError:
+            raise BadRequest(body='Invalid cursor')
+
+        if not decoded.matches(ordering):
+            raise BadRequest(body='Cursor does not match ordering')
+
+        return decoded
+
 
 class GetMeteringPointDetails(Endpoint):
     """
     Returns details about a single MeteringPoint.
+
+    Responses have an ETag derived from the version of the MeteringPoint,
+    and requests with a matching If-None-Match header are answered with
+    304 Not Modified by selecting only the version of the MeteringPoint
+    (and its technology codes), without loading or encoding the row.
+
+    Responses are encoded directly from rows (see encoding.py), as JSON
+    or MessagePack depending on the Accept header.
     """
 
     @dataclass
@@ -81,6 +357,139 @@ class GetMeteringPointDetails(Endpoint):
         success: bool
         meteringpoint: Optional[MeteringPoint]
 
+    def __init__(self, access_cache: Optional[AccessCache] = None):
+        """
+        :param access_cache: Cache of subjects' accessible MeteringPoints
+        """
+        self.access_cache = access_cache
+
+    @db.session()
+    def handle_request(
+            self,
+            request: Request,
+            context: Context,
+            session: db.Session,
+    ) -> HttpResponse:
+        """
+        Handle HTTP request.
+        """
+        encoding = negotiate_encoding(context)
+        query = self._get_query(request.gsrn, context.token.subject, session)
+        version = query.one_version_or_none() if query is not None else None
+        row = None
+
+        if version is not None:
+            etag, technology_type = self._get_etag(
+                version, encoding, session)
+
+            if is_not_modified(context, etag):
+                return NotModified(headers=encoded_headers(etag))
+
+            row = query.one_row_or_none()
+
+        # Same as encoding self.Response
+        if row is None:
+            return encoded_response(
+                encoding.encode({'success': False, 'meteringpoint': None}),
+                encoding,
+            )
+
+        # The MeteringPoint might have changed since selecting its version
+        if row.version != version.version:
+            etag, technology_type = self._get_etag(row, encoding, session)
+
+        technologies = {(row.tech_code, row.fuel_code): technology_type}
+
+        body = encoding.encode({
+            'success': True,
+            'meteringpoint': meteringpoint_encoder.encode(row, technologies),
+        })
+
+        return encoded_response(body, encoding, etag)
+
+    def _get_query(
+            self,
+            gsrn: str,
+            subject: str,
+            session: db.Session,
+    ) -> Optional[MeteringPointReadQuery]:
+        """
+        Returns a query for the MeteringPoint with the provided GSRN,
+        if it is accessible by the subject. Returns None if known to be
+        inaccessible without querying the database.
+        """
+        query = MeteringPointReadQuery(session).has_gsrn(gsrn)
+
+        accessible_gsrn = None
+
+        if self.access_cache is not None and self.access_cache.is_enabled:
+            accessible_gsrn = self.access_cache \
+                .get_accessible_gsrn(session, subject)
+
+        # None if not cached, or the subject has access to too many
+        # MeteringPoints to cache
+        if accessible_gsrn is None:
+            return query.is_accessible_by(subject)
+        elif gsrn in accessible_gsrn:
+            return query
+        else:
+            return None
+
+    def _get_etag(
+            self,
+            version: Any,
+            encoding: Encoding,
+            session: db.Session,
+    ) -> Tuple[str, Optional[TechnologyType]]:
+        """
+        Returns the ETag of a MeteringPoint and its type of technology,
+        which is resolved using the TechnologyCatalog, and thus is not
+        covered by the version of the MeteringPoint.
+
+        :param version: Row with (at least) version, tech_code and
+            fuel_code of the MeteringPoint
+        """
+        technology_type = technology_catalog.get_technology_type(
+            session, version.tech_code, version.fuel_code)
+
+        etag = make_etag(
+            version.version,
+            technology_type,
+            encoding.mimetype,
+        )
+
+        return etag, technology_type
+
+
+class GetMeteringPointDetailsBatch(Endpoint):
+    """
+    Returns details about many MeteringPoints (by their GSRN).
+    """
+
+    @dataclass
+    class Request:
+        gsrn: List[str] = field(default_factory=list)
+
+    @dataclass
+    class Response:
+        success: bool
+
+        # Accessible MeteringPoints mapped by GSRN (unknown or inaccessible
+        # GSRNs are omitted)
+        meteringpoints: Dict[str, MeteringPoint]
+
+    def __init__(
+            self,
+            max_size: int = DETAILS_BATCH_MAX_SIZE,
+            access_cache: Optional[AccessCache] = None,
+    ):
+        """
+        :param max_size: Max. number of GSRNs per request
+        :param access_cache: Cache of subjects' accessible MeteringPoints
+        """
+        self.max_size = max_size
+        self.access_cache = access_cache
+
     @db.session()
     def handle_request(
             self,
@@ -91,15 +500,180 @@ class GetMeteringPointDetails(Endpoint):
         """
         Handle HTTP request.
         """
-        meteringpoint = MeteringPointQuery(session) \
-            .is_accessible_by(context.token.subject) \
-            .has_gsrn(request.gsrn) \
-            .one_or_none()
-        # meteringpoint = MeteringPointQuery(session) \
-        #     .has_gsrn(request.gsrn) \
-        #     .one_or_none()
+        gsrn = set(request.gsrn)
+
+        if len(gsrn) > self.max_size:
+            raise BadRequest(
+                body=f'Can not request more than {self.max_size} GSRNs')
+
+        if gsrn:
+            meteringpoints = query_accessible_meteringpoints(
+                session=session,
+                subject=context.get_subject(required=True),
+                access_cache=self.access_cache,
+            )
+            meteringpoints = meteringpoints \
+                .has_any_gsrn(list(gsrn)) \
+                .all_meteringpoints(
+                    technology_catalog.get_technologies(session))
+        else:
+            meteringpoints = []
 
         return self.Response(
-            success=meteringpoint is not None,
-            meteringpoint=meteringpoint,
+            success=True,
+            meteringpoints={mp.gsrn: mp for mp in meteringpoints},
         )
+
+
+class ExportMeteringPoints(Endpoint):
+    """
+    Exports all MeteringPoints accessible by the subject (optionally
+    filtered) in one response, as NDJSON or CSV.
+
+    MeteringPoints are fetched from the database using a server-side
+    cursor, and streamed to the client in chunks as they are fetched,
+    so any number of MeteringPoints can be exported in constant memory.
+    """
+
+    @dataclass
+    class Request:
+        format: MeteringPointExportFormat = \
+            field(default=MeteringPointExportFormat.ndjson)
+        filters: Optional[MeteringPointFilters] = field(default=None)
+
+    # Columns of CSV exports
+    CSV_COLUMNS = \
+        ('gsrn', 'type', 'sector') + \
+        tuple(f'address_{f}' for f in ADDRESS_FIELDS) + \
+        ('tech_code', 'fuel_code', 'technology_type')
+
+    def __init__(
+            self,
+            chunk_size: int = EXPORT_CHUNK_SIZE,
+            access_cache: Optional[AccessCache] = None,
+    ):
+        """
+        :param chunk_size: Number of MeteringPoints to fetch from the
+            database (and send to the client) at a time
+        :param access_cache: Cache of subjects' accessible MeteringPoints
+        """
+        self.chunk_size = chunk_size
+        self.access_cache = access_cache
+
+    def handle_request(
+            self,
+            request: Request,
+            context: Context,
+    ) -> StreamingResponse:
+        """
+        Handle HTTP request.
+        """
+        subject = context.get_subject(required=True)
+
+        if request.format is MeteringPointExportFormat.csv:
+            body = self._export_csv(subject, request.filters)
+            mimetype = 'text/csv'
+        else:
+            body = self._export_ndjson(subject, request.filters)
+            mimetype = 'application/x-ndjson'
+
+        return StreamingResponse(
+            status=200,
+            body=body,
+            mimetype=mimetype,
+        )
+
+    def _iter_chunks(
+            self,
+            subject: str,
+            filters: Optional[MeteringPointFilters],
+    ) -> Iterator[Tuple[List[Any], TTechnologies]]:
+        """
+        Yields rows of MeteringPoints accessible by the subject, ordered
+        by GSRN, in chunks of at most "chunk_size" rows, along with the
+        known technologies.
+
+        Invoked while the response is being sent, ie. after
+        handle_request() has returned, so it uses its own session.
+        """
+        with db.make_session() as session:
+            technologies = technology_catalog.get_technologies(session)
+
+            query = query_accessible_meteringpoints(
+                session=session,
+                subject=subject,
+                access_cache=self.access_cache,
+            )
+
+            if filters:
+                query = query.apply_filters(filters)
+
+            # Fetches "chunk_size" rows at a time from a server-side cursor
+            chunks = query \
+                .apply_ordering(MeteringPointOrdering(
+                    key=MeteringPointOrderingKeys.gsrn,
+                )) \
+                .iter_chunks(
+                    size=self.chunk_size,
+                    columns=DbMeteringPointRead.__table__.columns,
+                )
+
+            for rows in chunks:
+                yield rows, technologies
+
+    def _export_ndjson(
+            self,
+            subject: str,
+            filters: Optional[MeteringPointFilters],
+    ) -> Iterator[bytes]:
+        """
+        Yields chunks of serialized MeteringPoints, one per line.
+        """
+        for rows, technologies in self._iter_chunks(subject, filters):
+            yield b''.join(
+                json_serializer.serialize(
+                    DbMeteringPointRead.build_meteringpoint(row, technologies),
+                    schema=MeteringPoint,
+                ) + b'\n'
+                for row in rows
+            )
+
+    def _export_csv(
+            self,
+            subject: str,
+            filters: Optional[MeteringPointFilters],
+    ) -> Iterator[str]:
+        """
+        Yields chunks of CSV rows, starting with a header row.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.CSV_COLUMNS)
+
+        for rows, technologies in self._iter_chunks(subject, filters):
+            for row in rows:
+                values = dict(row._mapping)
+                values['technology_type'] = \
+                    technologies.get((row.tech_code, row.fuel_code))
+
+                writer.writerow([
+                    self._csv_value(values[c]) for c in self.CSV_COLUMNS
+                ])
+
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def _csv_value(self, value):
+        """
+        Formats a column value for CSV exports.
+        """
+        if value is None:
+            return ''
+        elif isinstance(value, Enum):
+            return value.value
+        else:
+            return value
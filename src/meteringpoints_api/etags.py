@@ -0,0 +1,66 @@
+"""
+Conditional requests using ETags.
+
+Endpoints compute the ETag of a response from the version of the data it
+is built from, which is cheap to look up (ie. the version of a single
+MeteringPoint, or the generation of a subject's data), and answer
+requests with a matching If-None-Match header with 304 Not Modified,
+without building (or serializing) the response.
+"""
+import hashlib
+from typing import Dict, Any
+
+from energytt_platform.api import Context
+
+
+# Clients may store responses, but must revalidate them before reuse
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Returns a strong ETag which is a digest of the provided parts.
+    """
+    digest = hashlib.sha1()
+
+    for part in parts:
+        digest.update(str(part).encode('utf8'))
+        digest.update(b'\0')
+
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """
+    Returns the headers of a response with the provided ETag.
+    """
+    return {
+        'ETag': etag,
+        'Cache-Control': CACHE_CONTROL,
+    }
+
+
+def is_not_modified(context: Context, etag: str) -> bool:
+    """
+    Returns True if the client already has the response with the provided
+    ETag, ie. if it matches any ETag of the request's If-None-Match header.
+    """
+    header = context.headers.get('If-None-Match')
+
+    if not header:
+        return False
+    elif header.strip() == '*':
+        return True
+
+    return any(
+        strip_weak(tag.strip()) == etag
+        for tag in header.split(',')
+    )
+
+
+def strip_weak(etag: str) -> str:
+    """
+    Strips the W/ prefix of weak ETags, as If-None-Match uses the weak
+    comparison of ETags.
+    """
+    return etag[2:] if etag.startswith('W/') else etag
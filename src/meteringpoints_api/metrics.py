@@ -0,0 +1,107 @@
+"""
+Exposes Prometheus metrics on the API, and observes the latency and
+database queries of each HTTP request.
+
+When served by multiple worker processes (see gunicorn.conf.py), metrics
+are aggregated across processes via PROMETHEUS_MULTIPROC_DIR.
+"""
+import os
+import time
+
+import flask
+from prometheus_client import (
+    REGISTRY,
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+from energytt_platform.api import Application
+
+from meteringpoints_shared.metrics import (
+    REQUEST_LATENCY,
+    REQUEST_DB_QUERIES,
+    REQUEST_DB_TIME,
+    start_tracking_queries,
+    stop_tracking_queries,
+)
+
+
+def metrics_view() -> flask.Response:
+    """
+    Returns all metrics in Prometheus' text format.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return flask.Response(
+        generate_latest(registry),
+        mimetype=CONTENT_TYPE_LATEST,
+    )
+
+
+def before_request():
+    """
+    Starts tracking time and database queries for the current request.
+    """
+    stats, token = start_tracking_queries()
+    flask.g.metrics_query_stats = stats
+    flask.g.metrics_query_token = token
+    flask.g.metrics_begin = time.perf_counter()
+
+
+def after_request(response: flask.Response) -> flask.Response:
+    """
+    Observes time and database queries for the current request.
+    """
+    if 'metrics_begin' not in flask.g:
+        return response
+
+    elapsed = time.perf_counter() - flask.g.metrics_begin
+    stats = flask.g.metrics_query_stats
+    stop_tracking_queries(flask.g.metrics_query_token)
+
+    if flask.request.url_rule is not None:
+        endpoint = flask.request.url_rule.rule
+    else:
+        endpoint = 'unknown'
+
+    REQUEST_LATENCY \
+        .labels(
+            method=flask.request.method,
+            endpoint=endpoint,
+            status=str(response.status_code),
+        ) \
+        .observe(elapsed)
+
+    REQUEST_DB_QUERIES.labels(endpoint=endpoint).observe(stats.count)
+    REQUEST_DB_TIME.labels(endpoint=endpoint).observe(stats.duration)
+
+    return response
+
+
+def instrument(app: Application, path: str = '/metrics'):
+    """
+    Adds a metrics endpoint to the application, and observes the latency
+    and database queries of each request.
+
+    Requests to the metrics endpoint itself are not observed.
+    """
+    flask_app = app.wsgi_app
+
+    flask_app.add_url_rule(
+        rule=path,
+        endpoint=path,
+        methods=['GET'],
+        view_func=metrics_view,
+    )
+
+    @flask_app.before_request
+    def _before_request():
+        if flask.request.path != path:
+            before_request()
+
+    flask_app.after_request(after_request)
@@ -0,0 +1,58 @@
+from functools import cached_property
+from dataclasses import dataclass, field
+from typing import Iterable, Dict, Optional, Union
+
+from energytt_platform.api import HttpResponse
+
+
+@dataclass
+class StreamingResponse(HttpResponse):
+    """
+    A response whose body is an iterable of chunks, which are sent to the
+    client as they are produced (using chunked transfer encoding), so the
+    response is never held in memory as a whole.
+    """
+
+    # Response body (chunks)
+    body: Optional[Iterable[Union[str, bytes]]] = \
+        field(default=None)
+
+    # Response mimetype
+    mimetype: str = \
+        field(default='application/octet-stream')
+
+    @cached_property
+    def actual_mimetype(self) -> str:
+        return self.mimetype
+
+
+@dataclass
+class EncodedResponse(HttpResponse):
+    """
+    A response whose body is already encoded, ie. as JSON or MessagePack
+    (see encoding.py), or from a cache.
+    """
+
+    # Response body (encoded)
+    body: Optional[bytes] = \
+        field(default=None)
+
+    # Response mimetype
+    mimetype: str = \
+        field(default='application/json')
+
+    @cached_property
+    def actual_mimetype(self) -> str:
+        return self.mimetype
+
+
+class NotModified(HttpResponse):
+    """
+    HTTP 304 Not Modified (without a body).
+
+    Returned when the client already has the requested response, as
+    identified by its ETag (see etags.py).
+    """
+    def __init__(self, headers: Dict[str, str], **kwargs):
+        super(NotModified, self).__init__(
+            status=304, headers=headers, **kwargs)
@@ -0,0 +1,19 @@
+"""
+Production WSGI entry point of the API.
+
+Serve using gunicorn and its configuration in gunicorn.conf.py, ie.:
+
+    gunicorn --config gunicorn.conf.py meteringpoints_api.wsgi:app
+
+The application is created when the module is imported, which gunicorn
+does once in the master process (preload_app) before forking workers.
+Listening for access cache invalidations (and technology changes) is
+deferred until each worker has been forked (see post_fork() in
+gunicorn.conf.py).
+"""
+from .app import create_app, create_access_cache
+
+
+access_cache = create_access_cache(start_listening=False)
+
+app = create_app(access_cache=access_cache, start_listening=False)
@@ -1,14 +1,126 @@
 """
-Runs a Message Bus consumer.
+Runs a Message Bus consumer:
+
+    python -m meteringpoints_consumer
+
+Or imports snapshot files (see meteringpoints_consumer.snapshot):
+
+    python -m meteringpoints_consumer import-snapshot --meteringpoints FILE
 """
+import logging
+import argparse
+
 from energytt_platform.bus import topics as t
 
 from meteringpoints_shared.bus import broker
+from meteringpoints_shared.config import (
+    CONSUMER_MODE,
+    CONSUMER_BATCH_SIZE,
+    CONSUMER_BATCH_TIMEOUT_MS,
+    CONSUMER_WORKERS,
+    CONSUMER_COALESCE,
+    CONSUMER_LEDGER,
+    CONSUMER_METRICS_PORT,
+)
 
-from .handlers import dispatcher
+from .metrics import start_metrics_server
+from .handlers import dispatcher, message_handlers, bulk_message_handlers
+from .batch import BatchConsumer, BatchDispatcher
+from .parallel import ParallelConsumer
+from .snapshot import SNAPSHOT_TABLES, READERS, main as import_snapshots
 
 
-broker.listen(
-    topics=[t.AUTH, t.METERINGPOINTS, t.TECHNOLOGIES],
-    handler=dispatcher,
-)
+logger = logging.getLogger(__name__)
+
+
+TOPICS = [t.AUTH, t.METERINGPOINTS, t.TECHNOLOGIES]
+
+
+def consume():
+    """
+    Consumes messages from the Message Bus (forever).
+    """
+    if CONSUMER_LEDGER and CONSUMER_MODE in ('single', 'parallel'):
+        logger.warning(
+            'CONSUMER_LEDGER is only supported by CONSUMER_MODE=batch, '
+            'ignoring it in CONSUMER_MODE=%s', CONSUMER_MODE)
+
+    start_metrics_server(port=CONSUMER_METRICS_PORT)
+
+    if CONSUMER_MODE == 'single':
+        broker.listen(
+            topics=TOPICS,
+            handler=dispatcher,
+        )
+    elif CONSUMER_MODE == 'batch':
+        BatchConsumer(
+            broker=broker,
+            dispatcher=BatchDispatcher(
+                handlers=message_handlers,
+                bulk_handlers=bulk_message_handlers,
+            ),
+            batch_size=CONSUMER_BATCH_SIZE,
+            timeout_ms=CONSUMER_BATCH_TIMEOUT_MS,
+            coalesce=CONSUMER_COALESCE,
+            ledger=CONSUMER_LEDGER,
+        ).listen(topics=TOPICS)
+    elif CONSUMER_MODE == 'parallel':
+        ParallelConsumer(
+            broker=broker,
+            dispatcher=BatchDispatcher(
+                handlers=message_handlers,
+                bulk_handlers=bulk_message_handlers,
+            ),
+            workers=CONSUMER_WORKERS,
+            batch_size=CONSUMER_BATCH_SIZE,
+            timeout_ms=CONSUMER_BATCH_TIMEOUT_MS,
+            coalesce=CONSUMER_COALESCE,
+        ).listen(topics=TOPICS)
+    else:
+        raise RuntimeError('Unknown CONSUMER_MODE: %s' % CONSUMER_MODE)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='meteringpoints_consumer')
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('consume', help='Consume messages (default)')
+
+    snapshot_parser = subparsers.add_parser(
+        'import-snapshot',
+        help='Bulk import snapshot files (CSV or NDJSON, optionally gzip)',
+    )
+    snapshot_parser.add_argument(
+        '--format', choices=READERS,
+        help='Format of the files (default: determined by file extension)',
+    )
+
+    for table in SNAPSHOT_TABLES:
+        snapshot_parser.add_argument(
+            f'--{table.name}', metavar='FILE', dest=table.name,
+            help=f'Snapshot of {table.name} '
+                 f'(columns: {", ".join(table.columns)})',
+        )
+
+    args = parser.parse_args()
+
+    if args.command == 'import-snapshot':
+        snapshots = {
+            table.name: getattr(args, table.name)
+            for table in SNAPSHOT_TABLES
+            if getattr(args, table.name) is not None
+        }
+
+        if not snapshots:
+            snapshot_parser.error('No snapshot files provided')
+
+        # Reports progress
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+        import_snapshots(snapshots=snapshots, format=args.format)
+    else:
+        consume()
+
+
+if __name__ == '__main__':
+    main()
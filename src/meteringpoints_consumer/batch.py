@@ -0,0 +1,167 @@
+"""
+Micro-batching of Message Bus messages.
+
+Messages are polled from the broker in batches and applied within a
+single database transaction per batch, instead of a transaction per
+message. Messages are applied in the order they were received, so the
+order of messages for each MeteringPoint is preserved.
+"""
+import logging
+from itertools import groupby
+from typing import List, Dict, Type, Optional
+
+from energytt_platform.bus import Message, MessageBroker
+from energytt_platform.bus.broker import TTopicList
+
+from meteringpoints_shared.db import db
+from meteringpoints_shared.utils import chunks
+from meteringpoints_shared.controller import controller
+from meteringpoints_shared.metrics import \
+    BATCH_SIZE, BATCH_LATENCY, observe_handler, timed
+
+from .coalesce import coalesce
+from .ledger import TOffsets, skip_applied, batch_records
+from .handlers import TSessionHandler, TBulkSessionHandler
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchDispatcher(object):
+    """
+    Dispatches a batch of messages to their appropriate handlers within
+    a single database transaction.
+
+    Consecutive messages of the same type are grouped together. Groups are
+    applied in the order they were received in, either by a bulk handler
+    (if one exists for the message type) or one message at a time.
+    """
+    def __init__(
+            self,
+            handlers: Dict[Type[Message], TSessionHandler],
+            bulk_handlers: Optional[
+                Dict[Type[Message], TBulkSessionHandler]] = None,
+    ):
+        """
+        :param handlers: Handlers for each message type
+        :param bulk_handlers: Handlers for groups of messages of each type
+        """
+        self.handlers = {
+            message_type: observe_handler(handler, message_type, 'batch')
+            for message_type, handler in handlers.items()
+        }
+        self.bulk_handlers = {
+            message_type: observe_handler(handler, message_type, 'bulk')
+            for message_type, handler in (bulk_handlers or {}).items()
+        }
+
+    @db.atomic()
+    def __call__(
+            self,
+            batch: List[Message],
+            session: db.Session,
+            offsets: Optional[TOffsets] = None,
+    ):
+        """
+        Applies a batch of messages. Either all or none of the messages
+        are applied.
+
+        :param batch: The messages to apply
+        :param session: Database session
+        :param offsets: Offsets of the applied messages to record in the
+            same transaction (see meteringpoints_consumer.ledger)
+        """
+        for message_type, messages in groupby(batch, key=type):
+            bulk_handler = self.bulk_handlers.get(message_type)
+
+            if bulk_handler is not None:
+                bulk_handler(list(messages), session=session)
+                continue
+
+            handler = self.handlers.get(message_type)
+
+            if handler is None:
+                logger.debug('Ignoring messages of type %s', message_type)
+                continue
+
+            for msg in messages:
+                handler(msg, session=session)
+
+        if offsets:
+            controller.set_applied_offsets(session, offsets)
+
+
+class BatchConsumer(object):
+    """
+    Consumes messages from the broker in batches.
+
+    Each poll returns at most the messages that arrived within the timeout,
+    which are split into batches of "batch_size" messages. The broker
+    (auto-)commits offsets upon the next poll, which happens only after
+    all batches from the previous poll has been committed to the database.
+
+    With a ledger, the broker must provide the position of messages (see
+    KafkaRecordBroker). Already applied messages are then skipped, and the
+    offsets of applied messages are committed along with each batch.
+    """
+    def __init__(
+            self,
+            broker: MessageBroker,
+            dispatcher: BatchDispatcher,
+            batch_size: int,
+            timeout_ms: int,
+            coalesce: bool = True,
+            ledger: bool = False,
+    ):
+        """
+        :param broker: The broker to consume messages from
+        :param dispatcher: Applies batches of messages
+        :param batch_size: Max. number of messages applied in one transaction
+        :param timeout_ms: Max. time to wait for messages when polling
+        :param coalesce: Whether to skip updates superseded by later
+            messages received within the same poll
+        :param ledger: Whether to skip messages which have already been
+            applied, and record the offsets of applied messages
+        """
+        self.broker = broker
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size
+        self.timeout_ms = timeout_ms
+        self.coalesce = coalesce
+        self.ledger = ledger
+
+    def listen(self, topics: TTopicList):
+        """
+        Subscribes to the provided topics and applies messages in batches.
+        """
+        self.broker.subscribe(topics)
+
+        while True:
+            self.consume()
+
+    def consume(self):
+        """
+        Polls the broker once and applies received messages in batches.
+        """
+        timeout = self.timeout_ms / 1000
+
+        if self.ledger:
+            records = skip_applied(self.broker.poll_records(timeout=timeout))
+            messages = [record.message for record in records]
+        else:
+            messages = self.broker.poll_list(timeout=timeout)
+
+        if self.coalesce:
+            messages = coalesce(messages)
+
+        if self.ledger:
+            batches = batch_records(records, messages, self.batch_size)
+        else:
+            batches = (
+                (batch, None) for batch in chunks(messages, self.batch_size))
+
+        for batch, offsets in batches:
+            BATCH_SIZE.observe(len(batch))
+
+            with timed(BATCH_LATENCY):
+                self.dispatcher(batch, offsets=offsets)
@@ -0,0 +1,83 @@
+"""
+Coalescing of superseded messages.
+
+MeteringPoint updates are last-writer-wins, so when many updates of the
+same MeteringPoint are received together (ie. when history is replayed),
+only the last update of each entity (the MeteringPoint itself, its address
+and its technology) needs to be applied. A MeteringPointRemoved cancels
+all updates of the MeteringPoint received before it.
+
+Messages are only ever removed, never merged or reordered, so applying
+the coalesced messages results in the same state as applying all of them.
+"""
+from typing import List, Dict, Set, FrozenSet, Optional, Tuple
+
+from energytt_platform.bus import Message, messages as m
+
+from meteringpoints_shared.metrics import COALESCED_MESSAGES
+
+
+METERINGPOINT = 'meteringpoint'
+ADDRESS = 'address'
+TECHNOLOGY = 'technology'
+
+ALL_ENTITIES = frozenset((METERINGPOINT, ADDRESS, TECHNOLOGY))
+
+
+def get_updated_entities(
+        msg: Message,
+) -> Optional[Tuple[str, FrozenSet[str]]]:
+    """
+    Returns the GSRN and the entities (of the MeteringPoint) which the
+    message overwrites, or None if the message can not be superseded.
+    """
+    if isinstance(msg, m.MeteringPointUpdate):
+        entities = {METERINGPOINT}
+        if msg.meteringpoint.address:
+            entities.add(ADDRESS)
+        if msg.meteringpoint.technology:
+            entities.add(TECHNOLOGY)
+        return msg.meteringpoint.gsrn, frozenset(entities)
+    elif isinstance(msg, m.MeteringPointAddressUpdate):
+        return msg.gsrn, frozenset((ADDRESS,))
+    elif isinstance(msg, m.MeteringPointTechnologyUpdate):
+        return msg.gsrn, frozenset((TECHNOLOGY,))
+    elif isinstance(msg, m.MeteringPointRemoved):
+        return msg.gsrn, ALL_ENTITIES
+    else:
+        return None
+
+
+def coalesce(messages: List[Message]) -> List[Message]:
+    """
+    Removes updates which are superseded by later messages, preserving
+    the order of the remaining messages.
+
+    An update is superseded if all of the entities it overwrites are
+    overwritten again (or removed) by later messages.
+    """
+    # Entities of each MeteringPoint overwritten by later messages
+    overwritten: Dict[str, Set[str]] = {}
+    coalesced: List[Message] = []
+
+    for msg in reversed(messages):
+        updated = get_updated_entities(msg)
+
+        if updated is None:
+            coalesced.append(msg)
+            continue
+
+        gsrn, entities = updated
+        overwritten_entities = overwritten.setdefault(gsrn, set())
+
+        if isinstance(msg, m.MeteringPointRemoved) \
+                or not entities <= overwritten_entities:
+            coalesced.append(msg)
+
+        overwritten_entities.update(entities)
+
+    coalesced.reverse()
+
+    COALESCED_MESSAGES.inc(len(messages) - len(coalesced))
+
+    return coalesced
@@ -1,13 +1,15 @@
-from energytt_platform.bus import MessageDispatcher, messages as m
+from typing import List, Dict, Type, Callable
+
+from energytt_platform.bus import Message, MessageDispatcher, messages as m
 
 from meteringpoints_shared.db import db
 from meteringpoints_shared.controller import controller
+from meteringpoints_shared.metrics import observe_handler
 
 
 # -- MeteringPoints ----------------------------------------------------------
 
 
-@db.atomic()
 def on_meteringpoint_update(
         msg: m.MeteringPointUpdate,
         session: db.Session,
@@ -36,8 +38,17 @@ def on_meteringpoint_update(
             technology=msg.meteringpoint.technology,
         )
 
+    controller.refresh_meteringpoint_read(
+        session=session,
+        gsrn=[msg.meteringpoint.gsrn],
+    )
+
+    controller.bump_subject_generations_for_meteringpoints(
+        session=session,
+        gsrn=[msg.meteringpoint.gsrn],
+    )
+
 
-@db.atomic()
 def on_meteringpoint_removed(
         msg: m.MeteringPointRemoved,
         session: db.Session,
@@ -45,6 +56,18 @@ def on_meteringpoint_removed(
     """
     TODO
     """
+    # Must happen before delegates are deleted
+    controller.bump_subject_generations_for_meteringpoints(
+        session=session,
+        gsrn=[msg.gsrn],
+    )
+
+    controller.notify_access_changed_for_meteringpoints(
+        session=session,
+        gsrn=[msg.gsrn],
+    )
+
+    # Also deletes the MeteringPoint's read model
     controller.delete_meteringpoint(
         session=session,
         gsrn=msg.gsrn,
@@ -54,7 +77,6 @@ def on_meteringpoint_removed(
 # -- MeteringPoint Addresses -------------------------------------------------
 
 
-@db.atomic()
 def on_meteringpoint_address_update(
         msg: m.MeteringPointAddressUpdate,
         session: db.Session,
@@ -74,11 +96,20 @@ def on_meteringpoint_address_update(
             address=msg.address,
         )
 
+    controller.refresh_meteringpoint_read(
+        session=session,
+        gsrn=[msg.gsrn],
+    )
+
+    controller.bump_subject_generations_for_meteringpoints(
+        session=session,
+        gsrn=[msg.gsrn],
+    )
+
 
 # -- MeteringPoint Technologies ----------------------------------------------
 
 
-@db.atomic()
 def on_meteringpoint_technology_update(
         msg: m.MeteringPointTechnologyUpdate,
         session: db.Session,
@@ -98,11 +129,20 @@ def on_meteringpoint_technology_update(
             technology=msg.codes,
         )
 
+    controller.refresh_meteringpoint_read(
+        session=session,
+        gsrn=[msg.gsrn],
+    )
+
+    controller.bump_subject_generations_for_meteringpoints(
+        session=session,
+        gsrn=[msg.gsrn],
+    )
+
 
 # -- MeteringPoint Delegates -------------------------------------------------
 
 
-@db.atomic()
 def on_meteringpoint_delegate_granted(
         msg: m.MeteringPointDelegateGranted,
         session: db.Session,
@@ -121,8 +161,17 @@ def on_meteringpoint_delegate_granted(
         subject=msg.delegate.subject,
     )
 
+    controller.bump_subject_generations(
+        session=session,
+        subjects=[msg.delegate.subject],
+    )
+
+    controller.notify_access_changed(
+        session=session,
+        subjects=[msg.delegate.subject],
+    )
+
 
-@db.atomic()
 def on_meteringpoint_delegate_revoked(
         msg: m.MeteringPointDelegateRevoked,
         session: db.Session,
@@ -141,11 +190,20 @@ def on_meteringpoint_delegate_revoked(
         subject=msg.delegate.subject,
     )
 
+    controller.bump_subject_generations(
+        session=session,
+        subjects=[msg.delegate.subject],
+    )
+
+    controller.notify_access_changed(
+        session=session,
+        subjects=[msg.delegate.subject],
+    )
+
 
 # -- Technologies ------------------------------------------------------------
 
 
-@db.atomic()
 def on_technology_update(
         msg: m.TechnologyUpdate,
         session: db.Session,
@@ -153,16 +211,26 @@ def on_technology_update(
     """
     TODO
     """
-    technology = controller.get_or_create_technology(
+    controller.set_technology(
+        session=session,
+        technology=msg.technology,
+    )
+
+    # The read model only holds technology codes, and the API resolves
+    # the type of technology using its TechnologyCatalog
+    controller.notify_technology_changed(
         session=session,
         tech_code=msg.technology.tech_code,
         fuel_code=msg.technology.fuel_code,
     )
 
-    technology.type = msg.technology.type
+    controller.bump_subject_generations_for_technology(
+        session=session,
+        tech_code=msg.technology.tech_code,
+        fuel_code=msg.technology.fuel_code,
+    )
 
 
-@db.atomic()
 def on_technology_removed(
         msg: m.TechnologyRemoved,
         session: db.Session,
@@ -170,17 +238,180 @@ def on_technology_removed(
     """
     TODO
     """
+    controller.bump_subject_generations_for_technology(
+        session=session,
+        tech_code=msg.codes.tech_code,
+        fuel_code=msg.codes.fuel_code,
+    )
+
     controller.delete_technology(
         session=session,
         tech_code=msg.codes.tech_code,
         fuel_code=msg.codes.fuel_code,
     )
 
+    controller.notify_technology_changed(
+        session=session,
+        tech_code=msg.codes.tech_code,
+        fuel_code=msg.codes.fuel_code,
+    )
+
+
+# -- Bulk handlers -----------------------------------------------------------
+
+
+def on_meteringpoint_update_bulk(
+        messages: List[m.MeteringPointUpdate],
+        session: db.Session,
+):
+    """
+    Applies many MeteringPointUpdate messages using set-based upserts.
+    """
+    meteringpoints = [msg.meteringpoint for msg in messages]
+
+    controller.bulk_upsert_meteringpoints(
+        session=session,
+        meteringpoints=meteringpoints,
+    )
+
+    controller.bulk_set_meteringpoint_addresses(
+        session=session,
+        addresses={
+            mp.gsrn: mp.address
+            for mp in meteringpoints
+            if mp.address
+        },
+    )
+
+    controller.bulk_set_meteringpoint_technologies(
+        session=session,
+        technologies={
+            mp.gsrn: mp.technology
+            for mp in meteringpoints
+            if mp.technology
+        },
+    )
+
+    controller.refresh_meteringpoint_read(
+        session=session,
+        gsrn=[mp.gsrn for mp in meteringpoints],
+    )
+
+    controller.bump_subject_generations_for_meteringpoints(
+        session=session,
+        gsrn=[mp.gsrn for mp in meteringpoints],
+    )
+
+
+def on_meteringpoint_removed_bulk(
+        messages: List[m.MeteringPointRemoved],
+        session: db.Session,
+):
+    """
+    Applies many MeteringPointRemoved messages using a single statement
+    for deleting the MeteringPoints and all of their associated data.
+    """
+    gsrn = list(dict.fromkeys(msg.gsrn for msg in messages))
+
+    # Must happen before delegates are deleted
+    controller.bump_subject_generations_for_meteringpoints(
+        session=session,
+        gsrn=gsrn,
+    )
+
+    controller.notify_access_changed_for_meteringpoints(
+        session=session,
+        gsrn=gsrn,
+    )
+
+    # Also deletes the MeteringPoints' read model
+    controller.delete_meteringpoints(
+        session=session,
+        gsrn=gsrn,
+    )
+
+
+def on_meteringpoint_address_update_bulk(
+        messages: List[m.MeteringPointAddressUpdate],
+        session: db.Session,
+):
+    """
+    Applies many MeteringPointAddressUpdate messages using set-based
+    upserts and deletes. Only the last update for each GSRN is applied.
+    """
+    addresses = {msg.gsrn: msg.address for msg in messages}
+
+    deleted_gsrn = [gsrn for gsrn, a in addresses.items() if a is None]
+
+    if deleted_gsrn:
+        controller.bulk_delete_meteringpoint_addresses(
+            session=session,
+            gsrn=deleted_gsrn,
+        )
+
+    controller.bulk_set_meteringpoint_addresses(
+        session=session,
+        addresses={g: a for g, a in addresses.items() if a is not None},
+    )
+
+    controller.refresh_meteringpoint_read(
+        session=session,
+        gsrn=list(addresses),
+    )
+
+    controller.bump_subject_generations_for_meteringpoints(
+        session=session,
+        gsrn=list(addresses),
+    )
+
+
+def on_meteringpoint_technology_update_bulk(
+        messages: List[m.MeteringPointTechnologyUpdate],
+        session: db.Session,
+):
+    """
+    Applies many MeteringPointTechnologyUpdate messages using set-based
+    upserts and deletes. Only the last update for each GSRN is applied.
+    """
+    technologies = {msg.gsrn: msg.codes for msg in messages}
+
+    deleted_gsrn = [gsrn for gsrn, t in technologies.items() if t is None]
+
+    if deleted_gsrn:
+        controller.bulk_delete_meteringpoint_technologies(
+            session=session,
+            gsrn=deleted_gsrn,
+        )
+
+    controller.bulk_set_meteringpoint_technologies(
+        session=session,
+        technologies={
+            g: t for g, t in technologies.items() if t is not None
+        },
+    )
+
+    controller.refresh_meteringpoint_read(
+        session=session,
+        gsrn=list(technologies),
+    )
+
+    controller.bump_subject_generations_for_meteringpoints(
+        session=session,
+        gsrn=list(technologies),
+    )
+
 
 # -- Dispatcher --------------------------------------------------------------
 
 
-dispatcher = MessageDispatcher({
+TSessionHandler = Callable[[Message, db.Session], None]
+TBulkSessionHandler = Callable[[List[Message], db.Session], None]
+
+
+# Handlers for each message type. Handlers expect an ongoing database
+# transaction, which allows applying many messages within the same
+# transaction (see meteringpoints_consumer.batch).
+message_handlers: Dict[Type[Message], TSessionHandler] = {
     m.MeteringPointUpdate: on_meteringpoint_update,
     m.MeteringPointRemoved: on_meteringpoint_removed,
     m.MeteringPointAddressUpdate: on_meteringpoint_address_update,
@@ -189,4 +420,20 @@ dispatcher = MessageDispatcher({
     m.MeteringPointDelegateRevoked: on_meteringpoint_delegate_revoked,
     m.TechnologyUpdate: on_technology_update,
     m.TechnologyRemoved: on_technology_removed,
+}
+
+
+# Handlers applying many consecutive messages of the same type at once
+bulk_message_handlers: Dict[Type[Message], TBulkSessionHandler] = {
+    m.MeteringPointUpdate: on_meteringpoint_update_bulk,
+    m.MeteringPointRemoved: on_meteringpoint_removed_bulk,
+    m.MeteringPointAddressUpdate: on_meteringpoint_address_update_bulk,
+    m.MeteringPointTechnologyUpdate: on_meteringpoint_technology_update_bulk,
+}
+
+
+# Dispatches a single message, applying it in its own transaction
+dispatcher = MessageDispatcher({
+    message_type: observe_handler(db.atomic()(handler), message_type)
+    for message_type, handler in message_handlers.items()
 })
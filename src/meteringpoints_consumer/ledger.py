@@ -0,0 +1,84 @@
+"""
+Ledger of applied Message Bus messages.
+
+The consumer records the offset of the last message it applied from each
+partition within the same transaction as the changes the messages
+resulted in (see DbAppliedOffset). Messages redelivered after a restart,
+rebalance or replay, which have already been applied, are skipped before
+dispatching them, without touching the domain tables.
+
+Offsets are only meaningful if messages from each partition are applied
+in order, which is the case in batch mode, but not in parallel mode
+(where lanes commit independently of each other).
+"""
+from typing import List, Dict, Tuple, Iterator
+
+from energytt_platform.bus import Message
+
+from meteringpoints_shared.db import db
+from meteringpoints_shared.bus import BusRecord
+from meteringpoints_shared.controller import controller, TPartition
+from meteringpoints_shared.metrics import SKIPPED_MESSAGES
+
+
+# Offset of the last applied message of each partition
+TOffsets = Dict[TPartition, int]
+
+
+def skip_applied(records: List[BusRecord]) -> List[BusRecord]:
+    """
+    Removes records which have already been applied, preserving the
+    order of the remaining records.
+    """
+    if not records:
+        return records
+
+    with db.make_session() as session:
+        applied = controller.get_applied_offsets(
+            session=session,
+            partitions=((r.topic, r.partition) for r in records),
+        )
+
+    remaining = [
+        r for r in records
+        if r.offset > applied.get((r.topic, r.partition), -1)
+    ]
+
+    SKIPPED_MESSAGES.inc(len(records) - len(remaining))
+
+    return remaining
+
+
+def batch_records(
+        records: List[BusRecord],
+        messages: List[Message],
+        batch_size: int,
+) -> Iterator[Tuple[List[Message], TOffsets]]:
+    """
+    Splits the provided messages (a subset of the records' messages, in
+    the same order, ie. after coalescing) into batches of at most
+    "batch_size" messages, and yields each batch with the offsets to
+    record when applying it.
+
+    The offsets of a batch cover all records received up to (and
+    including) its last message, including records whose messages were
+    left out, as these have been superseded by messages applied in the
+    same, or a later, batch. A final batch without messages is yielded
+    if the last records' messages were all left out.
+    """
+    included = set(id(msg) for msg in messages)
+    batch: List[Message] = []
+    offsets: TOffsets = {}
+
+    for record in records:
+        offsets[(record.topic, record.partition)] = record.offset
+
+        if id(record.message) in included:
+            batch.append(record.message)
+
+            if len(batch) == batch_size:
+                yield batch, offsets
+                batch, offsets = [], {}
+
+    if offsets:
+        yield batch, offsets
@@ -0,0 +1,13 @@
+"""
+Exposes Prometheus metrics from the consumer over HTTP.
+"""
+from prometheus_client import start_http_server
+
+
+def start_metrics_server(port: int):
+    """
+    Starts a HTTP server (in a background thread) exposing metrics.
+    Consumer lag is sampled by the broker when polling (see
+    KafkaRecordBroker), as the Kafka consumer is not thread-safe.
+    """
+    start_http_server(port)
@@ -0,0 +1,216 @@
+"""
+Parallel application of Message Bus messages.
+
+Messages are polled from the broker and partitioned into lanes by the
+GSRN of the MeteringPoint they concern, using a stable hash. Each lane is
+applied by its own worker thread (with its own database connection) in
+micro-batches, so messages for the same MeteringPoint are applied in the
+order they were received, while messages for unrelated MeteringPoints are
+applied in parallel.
+
+Technology messages concern all MeteringPoints with the technology, and
+are applied in a dedicated lane. They act as barriers: messages received
+before a technology message are applied before it, and messages received
+after it are applied after it.
+"""
+import zlib
+import logging
+from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Type, Callable, Optional
+
+from sqlalchemy.exc import OperationalError
+
+from energytt_platform.bus import Message, MessageBroker, messages as m
+from energytt_platform.bus.broker import TTopicList
+
+from meteringpoints_shared.utils import chunks
+from meteringpoints_shared.metrics import BATCH_SIZE, BATCH_LATENCY, timed
+
+from .batch import BatchDispatcher
+from .coalesce import coalesce
+
+
+logger = logging.getLogger(__name__)
+
+
+# Returns the GSRN a message concerns
+TKeyFunction = Callable[[Message], str]
+
+
+# GSRN of the MeteringPoint each message type concerns
+message_keys: Dict[Type[Message], TKeyFunction] = {
+    m.MeteringPointUpdate: lambda msg: msg.meteringpoint.gsrn,
+    m.MeteringPointRemoved: lambda msg: msg.gsrn,
+    m.MeteringPointAddressUpdate: lambda msg: msg.gsrn,
+    m.MeteringPointTechnologyUpdate: lambda msg: msg.gsrn,
+    m.MeteringPointDelegateGranted: lambda msg: msg.delegate.gsrn,
+    m.MeteringPointDelegateRevoked: lambda msg: msg.delegate.gsrn,
+}
+
+
+# Message types applied in the dedicated technology lane
+technology_messages = (
+    m.TechnologyUpdate,
+    m.TechnologyRemoved,
+)
+
+
+# PostgreSQL error codes of transactions which can safely be retried
+# (deadlock_detected and serialization_failure)
+RETRYABLE_PGCODES = ('40P01', '40001')
+
+
+class ParallelConsumer(object):
+    """
+    Consumes messages from the broker, applying them in parallel lanes
+    keyed by GSRN.
+
+    Each poll returns at most the messages that arrived within the timeout.
+    The broker (auto-)commits offsets upon the next poll, which happens
+    only after all lanes have committed their messages from the previous
+    poll to the database.
+    """
+    def __init__(
+            self,
+            broker: MessageBroker,
+            dispatcher: BatchDispatcher,
+            workers: int,
+            batch_size: int,
+            timeout_ms: int,
+            coalesce: bool = True,
+            max_attempts: int = 3,
+    ):
+        """
+        :param broker: The broker to consume messages from
+        :param dispatcher: Applies batches of messages
+        :param workers: Number of lanes (and worker threads) for messages
+            keyed by GSRN
+        :param batch_size: Max. number of messages applied in one transaction
+        :param timeout_ms: Max. time to wait for messages when polling
+        :param coalesce: Whether to skip updates superseded by later
+            messages received within the same poll
+        :param max_attempts: Max. number of times to apply a batch if
+            its transaction is aborted due to a deadlock (or similar)
+        """
+        if workers < 1:
+            raise ValueError('workers must be at least 1')
+
+        self.broker = broker
+        self.dispatcher = dispatcher
+        self.workers = workers
+        self.batch_size = batch_size
+        self.timeout_ms = timeout_ms
+        self.coalesce = coalesce
+        self.max_attempts = max_attempts
+
+        # A single-threaded executor per lane, so each lane is applied
+        # by the same thread (and connection) in order
+        self.lanes = [
+            ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix=f'consumer-lane-{i}',
+            )
+            for i in range(workers)
+        ]
+
+    def get_lane(self, msg: Message) -> int:
+        """
+        Returns the lane to apply a (non-technology) message in.
+        Messages of unknown types are applied in the first lane.
+        """
+        key = message_keys.get(type(msg))
+
+        if key is None:
+            return 0
+
+        return zlib.crc32(key(msg).encode('utf8')) % self.workers
+
+    def partition(self, messages: List[Message]) -> Dict[int, List[Message]]:
+        """
+        Partitions messages into lanes, preserving their order within
+        each lane.
+        """
+        lanes: Dict[int, List[Message]] = {}
+
+        for msg in messages:
+            lanes.setdefault(self.get_lane(msg), []).append(msg)
+
+        return lanes
+
+    def listen(self, topics: TTopicList):
+        """
+        Subscribes to the provided topics and applies messages in parallel.
+        """
+        self.broker.subscribe(topics)
+
+        while True:
+            self.consume()
+
+    def consume(self):
+        """
+        Polls the broker once and applies received messages in parallel.
+        """
+        messages = self.broker.poll_list(timeout=self.timeout_ms / 1000)
+
+        if self.coalesce:
+            messages = coalesce(messages)
+
+        segments = groupby(
+            messages,
+            key=lambda msg: isinstance(msg, technology_messages),
+        )
+
+        for is_technology, segment in segments:
+            if is_technology:
+                self.apply(list(segment))
+            else:
+                self.wait([
+                    self.lanes[lane].submit(self.apply, lane_messages)
+                    for lane, lane_messages
+                    in self.partition(list(segment)).items()
+                ])
+
+    def wait(self, futures: List[Future]):
+        """
+        Waits for all lanes to complete, raising the first exception
+        raised by any of them (if any).
+        """
+        exception: Optional[BaseException] = None
+
+        for future in futures:
+            if future.exception() is not None and exception is None:
+                exception = future.exception()
+
+        if exception is not None:
+            raise exception
+
+    def apply(self, messages: List[Message]):
+        """
+        Applies messages (of one lane) in batches.
+        """
+        for batch in chunks(messages, self.batch_size):
+            BATCH_SIZE.observe(len(batch))
+
+            with timed(BATCH_LATENCY):
+                self.dispatch(batch)
+
+    def dispatch(self, batch: List[Message]):
+        """
+        Applies a batch of messages in one transaction, retrying if the
+        transaction is aborted due to concurrent transactions.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return self.dispatcher(batch)
+            except OperationalError as e:
+                pgcode = getattr(e.orig, 'pgcode', None)
+
+                if pgcode not in RETRYABLE_PGCODES \
+                        or attempt == self.max_attempts:
+                    raise
+
+                logger.warning(
+                    'Retrying batch of %d messages after error %s '
+                    '(attempt %d of %d)',
+                    len(batch), pgcode, attempt, self.max_attempts)
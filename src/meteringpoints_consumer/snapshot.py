@@ -0,0 +1,453 @@
+"""
+Bulk import of snapshots, ie. for the initial load of a fresh database.
+
+Snapshot files (CSV with a header row, or NDJSON with one flat object per
+line) are streamed into temporary staging tables using PostgreSQL's COPY,
+and merged into the actual tables with one INSERT ... SELECT ... ON
+CONFLICT statement per table. Rows are never held in memory (beyond a
+small buffer) and no ORM objects are built, so snapshots of any size are
+imported in constant memory.
+
+If a snapshot contains the same key more than once, its last row wins.
+All files are imported within a single transaction, after which the
+read model is rebuilt and the generation of all subjects is incremented.
+
+Usage:
+
+    python -m meteringpoints_consumer import-snapshot \\
+        --meteringpoints meteringpoints.csv \\
+        --addresses addresses.ndjson \\
+        --delegates delegates.csv.gz
+"""
+import io
+import csv
+import sys
+import gzip
+import time
+import logging
+from dataclasses import dataclass
+from typing import Tuple, Dict, Iterator, Optional, TextIO, Any
+
+import psycopg2
+import rapidjson
+import sqlalchemy as sa
+from sqlalchemy import text, select
+from sqlalchemy.dialects.postgresql import insert
+
+from meteringpoints_shared.db import db
+from meteringpoints_shared.controller import controller
+from meteringpoints_shared.notify import \
+    notify, ACCESS_CHANGED_CHANNEL, TECHNOLOGY_CHANGED_CHANNEL
+from meteringpoints_shared.models import (
+    ADDRESS_FIELDS,
+    DbMeteringPoint,
+    DbMeteringPointAddress,
+    DbMeteringPointTechnology,
+    DbMeteringPointDelegate,
+    DbTechnology,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Number of rows between progress reports
+PROGRESS_INTERVAL = 1000000
+
+# Column of staging tables which preserves the order of rows
+ROW_NUMBER_COLUMN = 'snapshot_row'
+
+
+TRow = Tuple[Optional[str], ...]
+
+
+@dataclass(frozen=True)
+class SnapshotTable:
+    """
+    A table which can be imported from a snapshot.
+    """
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    key: Tuple[str, ...]
+
+    @property
+    def staging_table(self) -> str:
+        return f'snapshot_{self.table}'
+
+    @property
+    def update_columns(self) -> Tuple[str, ...]:
+        return tuple(c for c in self.columns if c not in self.key)
+
+
+# Tables in the order they are imported
+SNAPSHOT_TABLES = (
+    SnapshotTable(
+        name='meteringpoints',
+        table=DbMeteringPoint.__tablename__,
+        columns=('gsrn', 'type', 'sector'),
+        key=('gsrn',),
+    ),
+    SnapshotTable(
+        name='addresses',
+        table=DbMeteringPointAddress.__tablename__,
+        columns=('gsrn',) + ADDRESS_FIELDS,
+        key=('gsrn',),
+    ),
+    SnapshotTable(
+        name='technologies',
+        table=DbTechnology.__tablename__,
+        columns=('tech_code', 'fuel_code', 'type'),
+        key=('tech_code', 'fuel_code'),
+    ),
+    SnapshotTable(
+        name='meteringpoint-technologies',
+        table=DbMeteringPointTechnology.__tablename__,
+        columns=('gsrn', 'tech_code', 'fuel_code'),
+        key=('gsrn',),
+    ),
+    SnapshotTable(
+        name='delegates',
+        table=DbMeteringPointDelegate.__tablename__,
+        columns=('gsrn', 'subject'),
+        key=('gsrn', 'subject'),
+    ),
+)
+
+
+class SnapshotError(Exception):
+    """
+    Raised when a snapshot file is invalid.
+    """
+    pass
+
+
+# -- Reading snapshots -------------------------------------------------------
+
+
+def open_snapshot(path: str) -> TextIO:
+    """
+    Opens a snapshot file for reading (decompressing *.gz files).
+    A path of "-" reads from stdin.
+    """
+    if path == '-':
+        return sys.stdin
+    elif path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf8', newline='')
+    else:
+        return open(path, 'r', encoding='utf8', newline='')
+
+
+def get_format(path: str) -> str:
+    """
+    Returns the format of a snapshot file ('csv' or 'ndjson') based on
+    its file extension.
+    """
+    name = path[:-3] if path.endswith('.gz') else path
+
+    if name.endswith('.csv'):
+        return 'csv'
+    elif name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    else:
+        raise SnapshotError(
+            f'Can not determine format of {path}, please provide --format')
+
+
+def read_csv(file: TextIO, table: SnapshotTable) -> Iterator[TRow]:
+    """
+    Reads rows from a CSV file with a header row. Empty values are NULL.
+    Empty lines are skipped.
+    """
+    reader = csv.reader(file)
+    header = next(reader, None)
+
+    if header is None:
+        return
+
+    unknown = set(header) - set(table.columns)
+    missing = set(table.key) - set(header)
+
+    if unknown or missing:
+        raise SnapshotError(
+            f'Invalid header for {table.name}: '
+            f'unknown columns {sorted(unknown)}, '
+            f'missing columns {sorted(missing)}')
+
+    indexes = [
+        header.index(column) if column in header else None
+        for column in table.columns
+    ]
+
+    for values in reader:
+        if not values:
+            continue
+
+        if len(values) != len(header):
+            raise SnapshotError(
+                f'Invalid row for {table.name} on line {reader.line_num}: '
+                f'expected {len(header)} values, got {len(values)}')
+
+        yield tuple(
+            (values[i] or None) if i is not None else None
+            for i in indexes
+        )
+
+
+def read_ndjson(file: TextIO, table: SnapshotTable) -> Iterator[TRow]:
+    """
+    Reads rows from a file with a (flat) JSON object per line.
+    Empty lines are skipped.
+    """
+    key_indexes = [table.columns.index(c) for c in table.key]
+
+    for line_num, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            obj = rapidjson.loads(line)
+        except ValueError as e:
+            raise SnapshotError(
+                f'Invalid JSON for {table.name} on line {line_num}: {e}')
+
+        if not isinstance(obj, dict):
+            raise SnapshotError(
+                f'Invalid row for {table.name} on line {line_num}: '
+                f'expected a JSON object')
+
+        row = tuple(obj.get(column) for column in table.columns)
+
+        if any(row[i] is None for i in key_indexes):
+            raise SnapshotError(
+                f'Missing key {table.key} for {table.name} '
+                f'on line {line_num}: {line.strip()}')
+
+        yield row
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+class CopyStream(object):
+    """
+    A (read-only) file-like object, which serializes rows as CSV for
+    COPY FROM STDIN as they are read, and reports progress.
+
+    Errors reading rows (ie. SnapshotError) are kept in error, as psycopg2
+    replaces them with an error of its own when the COPY fails.
+    """
+    def __init__(self, rows: Iterator[TRow], name: str):
+        self.rows = rows
+        self.name = name
+        self.error: Optional[Exception] = None
+        self.count = 0
+        self.begin = time.perf_counter()
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or self.buffer.tell() < size:
+            try:
+                row = next(self.rows, None)
+            except Exception as e:
+                self.error = e
+                raise
+
+            if row is None:
+                break
+
+            self.writer.writerow(row)
+            self.count += 1
+
+            if self.count % PROGRESS_INTERVAL == 0:
+                report(self.name, 'copied', self.count, self.begin)
+
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def report(name: str, action: str, count: int, begin: float):
+    """
+    Logs the number of rows processed and rows per second.
+    """
+    elapsed = time.perf_counter() - begin
+    rate = count / elapsed if elapsed else 0
+
+    logger.info(
+        'Snapshot %s: %d rows %s in %.1f sec (%d rows/sec)',
+        name, count, action, elapsed, rate)
+
+
+# -- Importing snapshots -----------------------------------------------------
+
+
+def copy_snapshot(
+        session: db.Session,
+        table: SnapshotTable,
+        file: TextIO,
+        format: str,
+) -> int:
+    """
+    Copies rows from a snapshot file into a (new) staging table, which is
+    dropped when the transaction ends. Returns the number of rows copied.
+    """
+    session.execute(text(
+        f'CREATE TEMPORARY TABLE {table.staging_table} '
+        f'(LIKE {table.table}) ON COMMIT DROP'
+    ))
+
+    session.execute(text(
+        f'ALTER TABLE {table.staging_table} '
+        f'ADD COLUMN {ROW_NUMBER_COLUMN} BIGSERIAL'
+    ))
+
+    stream = CopyStream(READERS[format](file, table), table.name)
+
+    # COPY using the DBAPI (psycopg2) connection of the session,
+    # within its transaction
+    cursor = session.connection().connection.cursor()
+
+    try:
+        cursor.copy_expert(
+            f'COPY {table.staging_table} ({", ".join(table.columns)}) '
+            f'FROM STDIN WITH (FORMAT csv)',
+            stream,
+        )
+    except psycopg2.Error:
+        if stream.error is not None:
+            raise stream.error from None
+        raise
+
+    report(table.name, 'copied', stream.count, stream.begin)
+
+    return stream.count
+
+
+def merge_snapshot(session: db.Session, table: SnapshotTable) -> int:
+    """
+    Merges rows from the staging table into the actual table, inserting
+    new rows and updating existing ones. Returns the number of rows merged.
+    """
+    begin = time.perf_counter()
+
+    staging = sa.table(
+        table.staging_table,
+        *(sa.column(c) for c in table.columns + (ROW_NUMBER_COLUMN,)),
+    )
+
+    target = sa.table(table.table, *(sa.column(c) for c in table.columns))
+
+    key = [staging.c[c] for c in table.key]
+
+    # Last row of each key
+    rows = select(*(staging.c[c] for c in table.columns)) \
+        .distinct(*key) \
+        .order_by(*key, staging.c[ROW_NUMBER_COLUMN].desc())
+
+    stmt = insert(target).from_select(table.columns, rows)
+
+    if table.update_columns:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=table.key,
+            set_={c: stmt.excluded[c] for c in table.update_columns},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=table.key)
+
+    count = session.execute(stmt).rowcount
+
+    report(table.name, 'merged', count, begin)
+
+    return count
+
+
+def import_snapshots(
+        session: db.Session,
+        snapshots: Dict[str, str],
+        format: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Imports snapshot files within the session's transaction (without
+    committing it), and returns the number of rows copied and merged for
+    each table.
+
+    :param session: Database session
+    :param snapshots: Paths to snapshot files mapped by table name
+        (see SNAPSHOT_TABLES)
+    :param format: Format of the files ('csv' or 'ndjson'), determined
+        by their file extension if omitted
+    """
+    tables = {table.name: table for table in SNAPSHOT_TABLES}
+    unknown = set(snapshots) - set(tables)
+
+    if unknown:
+        raise SnapshotError(f'Unknown snapshot tables: {sorted(unknown)}')
+
+    result = {}
+
+    for table in SNAPSHOT_TABLES:
+        path = snapshots.get(table.name)
+
+        if path is None:
+            continue
+
+        file_format = format or get_format(path)
+
+        try:
+            with open_snapshot(path) as file:
+                copied = copy_snapshot(
+                    session=session,
+                    table=table,
+                    file=file,
+                    format=file_format,
+                )
+        except SnapshotError as e:
+            raise SnapshotError(f'{path}: {e}') from None
+
+        merged = merge_snapshot(session, table)
+
+        result[table.name] = {'copied': copied, 'merged': merged}
+
+        if table.name == 'delegates':
+            staging = sa.table(table.staging_table, sa.column('subject'))
+            subjects = select(staging.c.subject).distinct().subquery()
+            notify(session, ACCESS_CHANGED_CHANNEL, subjects.c.subject)
+        elif table.name == 'technologies':
+            notify(session, TECHNOLOGY_CHANGED_CHANNEL, '*')
+
+    begin = time.perf_counter()
+    controller.rebuild_meteringpoint_read(session)
+    controller.bump_all_subject_generations(session)
+    logger.info(
+        'Snapshot read model rebuilt in %.1f sec',
+        time.perf_counter() - begin)
+
+    return result
+
+
+def main(snapshots: Dict[str, str], format: Optional[str] = None):
+    """
+    Imports snapshot files and commits.
+
+    :param snapshots: Paths to snapshot files mapped by table name
+    :param format: Format of the files, determined by their file
+        extension if omitted
+    """
+    begin = time.perf_counter()
+
+    with db.make_session() as session:
+        import_snapshots(
+            session=session,
+            snapshots=snapshots,
+            format=format,
+        )
+        session.commit()
+
+    logger.info(
+        'Snapshot imported in %.1f sec', time.perf_counter() - begin)
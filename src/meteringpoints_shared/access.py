@@ -0,0 +1,221 @@
+from uuid import uuid4
+from threading import Lock
+from typing import FrozenSet, Optional, Any
+
+from .db import db
+from .cache import Cache, LRUCache
+from .queries import DelegateQuery
+from .models import DbMeteringPointDelegate
+from .notify import NotificationListener, ACCESS_CHANGED_CHANNEL
+
+
+# Cached (process-locally) in place of the GSRNs of subjects with access
+# to more than max_gsrn MeteringPoints
+TOO_MANY = object()
+
+# Cached in the shared store in place of the GSRNs (see TOO_MANY)
+TOO_MANY_SHARED = b'*'
+
+# Key of the epoch in the shared store, which prefixes all other keys
+EPOCH_KEY = 'epoch'
+
+
+class AccessCache(object):
+    """
+    Cache of the GSRNs each subject has been delegated access to.
+
+    Entries are cached process-locally, and optionally in a shared store
+    (ie. RedisCache), so processes can reuse entries loaded by each other
+    instead of each loading them from the database.
+
+    Entries are invalidated when notified by the consumer that a subject's
+    access has changed (see NotificationListener). Every process listens,
+    and deletes the subject from both its local cache and the shared store.
+    The cache is only used while listening for notifications, as otherwise
+    it could serve stale data. Without a listener, is_enabled is always
+    False.
+
+    Notifications are lost while not listening, so all entries are
+    invalidated upon every (re)connect. Keys in the shared store are
+    prefixed by an epoch, which is replaced upon connecting, so entries
+    stored before are never used again, even if every process lost its
+    connection at once and none was left to invalidate them.
+
+    Subjects with access to more than max_gsrn MeteringPoints are cached
+    as such (TOO_MANY) instead of their GSRNs, as filtering by that many
+    GSRNs is slower than joining delegates in the database.
+    """
+    def __init__(
+            self,
+            max_size: int,
+            max_gsrn: Optional[int] = None,
+            ttl: Optional[float] = None,
+            shared: Optional[Cache[str, bytes]] = None,
+    ):
+        """
+        :param max_size: Max. number of subjects to cache (process-locally)
+        :param max_gsrn: Max. number of GSRNs to cache for a subject
+            (None = unlimited)
+        :param ttl: Max. time-to-live for entries in seconds
+        :param shared: Store shared by all processes (if any)
+        """
+        self.entries: LRUCache[str, Any] = \
+            LRUCache(max_size=max_size, ttl=ttl)
+        self.max_gsrn = max_gsrn
+        self.shared = shared
+        self.listener: Optional[NotificationListener] = None
+        self._invalidations = 0
+        self._lock = Lock()
+
+    @property
+    def is_enabled(self) -> bool:
+        """
+        Returns True if the cache is listening for invalidations.
+        """
+        return self.listener is not None and self.listener.connected.is_set()
+
+    def start_listening(self):
+        """
+        Starts listening for invalidations in a background thread.
+        """
+        self.listener = NotificationListener(
+            channel=ACCESS_CHANGED_CHANNEL,
+            on_notify=self.invalidate,
+            on_connect=self.clear,
+        )
+        self.listener.start()
+
+    def get_accessible_gsrn(
+            self,
+            session: db.Session,
+            subject: str,
+    ) -> Optional[FrozenSet[str]]:
+        """
+        Returns GSRN of all MeteringPoints the subject has access to,
+        loading them from the database if not cached. Returns None if
+        the subject has access to more than max_gsrn MeteringPoints.
+        """
+        gsrn = self.entries.get(subject)
+
+        if gsrn is None:
+            gsrn = self._load(session, subject)
+
+        return None if gsrn is TOO_MANY else gsrn
+
+    def _load(self, session: db.Session, subject: str) -> Any:
+        """
+        Loads GSRN (or TOO_MANY) of the subject from the shared store,
+        or from the database if not shared, and caches them.
+        """
+
+        # An invalidation may arrive while loading, in which case the
+        # loaded data might already be stale. Likewise, if the epoch is
+        # replaced while loading, the loaded data is stored by the epoch
+        # it was loaded in, and is never used.
+        invalidations = self._invalidations
+        epoch = self._get_epoch()
+        gsrn = self._get_shared(epoch, subject)
+
+        if gsrn is None:
+            query = DelegateQuery(session) \
+                .has_subject(subject) \
+                .with_entities(DbMeteringPointDelegate.gsrn)
+
+            if self.max_gsrn is not None:
+                query = query.limit(self.max_gsrn + 1)
+
+            gsrn = frozenset(row.gsrn for row in query)
+
+            if self.max_gsrn is not None and len(gsrn) > self.max_gsrn:
+                gsrn = TOO_MANY
+
+            with self._lock:
+                if invalidations == self._invalidations:
+                    self._set_shared(epoch, subject, gsrn)
+
+        with self._lock:
+            if invalidations == self._invalidations:
+                self.entries.set(subject, gsrn)
+
+        return gsrn
+
+    def _get_epoch(self) -> Optional[str]:
+        """
+        Returns the current epoch of the shared store (if any), starting
+        a new epoch if it has none (ie. if it has expired).
+        """
+        if self.shared is None:
+            return None
+
+        epoch = self.shared.get(EPOCH_KEY)
+
+        if epoch is None:
+            return self._new_epoch()
+
+        return epoch.decode()
+
+    def _new_epoch(self) -> str:
+        """
+        Starts a new epoch of the shared store, so entries stored in any
+        previous epoch are never used again.
+        """
+        epoch = uuid4().hex
+        self.shared.set(EPOCH_KEY, epoch.encode())
+        return epoch
+
+    def _get_shared(self, epoch: Optional[str], subject: str) -> Any:
+        """
+        Returns GSRN (or TOO_MANY) cached for the subject in the shared
+        store, if any.
+        """
+        if self.shared is None:
+            return None
+
+        value = self.shared.get(f'{epoch}:{subject}')
+
+        if value is None:
+            return None
+        elif value == TOO_MANY_SHARED:
+            return TOO_MANY
+        elif not value:
+            return frozenset()
+
+        return frozenset(value.decode().split('\n'))
+
+    def _set_shared(self, epoch: Optional[str], subject: str, gsrn: Any):
+        """
+        Caches GSRN (or TOO_MANY) for the subject in the shared store,
+        if any.
+        """
+        if self.shared is None:
+            return
+
+        if gsrn is TOO_MANY:
+            value = TOO_MANY_SHARED
+        else:
+            value = '\n'.join(sorted(gsrn)).encode()
+
+        self.shared.set(f'{epoch}:{subject}', value)
+
+    def invalidate(self, subject: str):
+        """
+        Invalidates cached access for a subject.
+        """
+        with self._lock:
+            self._invalidations += 1
+            self.entries.delete(subject)
+
+            if self.shared is not None:
+                self.shared.delete(f'{self._get_epoch()}:{subject}')
+
+    def clear(self):
+        """
+        Invalidates cached access for all subjects, both in this process
+        and in the shared store (by starting a new epoch).
+        """
+        with self._lock:
+            self._invalidations += 1
+            self.entries.clear()
+
+            if self.shared is not None:
+                self._new_epoch()
@@ -1,9 +1,113 @@
-from energytt_platform.bus import get_default_broker
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Iterable
+
+from kafka import KafkaConsumer
+
+from energytt_platform.bus import \
+    Message, KafkaMessageBroker, MessageSerializer, message_registry
 
 from meteringpoints_shared.config import MESSAGE_BUS_SERVERS
+from meteringpoints_shared.metrics import CONSUMER_LAG
+
+
+@dataclass(frozen=True)
+class BusRecord:
+    """
+    A message received from the Message Bus, and its position (offset)
+    within the partition of the topic it was received from.
+    """
+    topic: str
+    partition: int
+    offset: int
+    message: Message
+
+
+class KafkaRecordBroker(KafkaMessageBroker):
+    """
+    KafkaMessageBroker which can also return the position of each message
+    received, allowing consumers to keep track of applied messages.
+
+    Consumer lag is sampled after polling (at most once every
+    LAG_SAMPLE_INTERVAL seconds) into the CONSUMER_LAG gauge. KafkaConsumer
+    is not thread-safe, so it is only sampled by the thread polling it.
+    """
+
+    # Min. seconds between sampling consumer lag
+    LAG_SAMPLE_INTERVAL = 5
+
+    _lag_sampled_at = None
+
+    @property
+    def kafka_consumer(self) -> KafkaConsumer:
+        """
+        The underlying Kafka consumer. Not thread-safe, so must only be
+        used by the thread polling the broker.
+        """
+        return self._kafka_consumer
+
+    def get_lag(self) -> float:
+        """
+        Returns the max. number of messages the consumer is behind any of
+        its assigned partitions, as reported by the Kafka client.
+        """
+        fetch_metrics = self.kafka_consumer.metrics() \
+            .get('consumer-fetch-manager-metrics', {})
+
+        return fetch_metrics.get('records-lag-max', float('nan'))
+
+    def sample_lag(self):
+        """
+        Samples consumer lag into the CONSUMER_LAG gauge, unless sampled
+        within the last LAG_SAMPLE_INTERVAL seconds.
+        """
+        now = time.monotonic()
+
+        if self._lag_sampled_at is None \
+                or now - self._lag_sampled_at >= self.LAG_SAMPLE_INTERVAL:
+            self._lag_sampled_at = now
+            CONSUMER_LAG.set(self.get_lag())
+
+    def __iter__(self) -> Iterable[Message]:
+        for record in self.kafka_consumer:
+            yield record.value
+            self.sample_lag()
+
+    def poll(self, timeout: float = 0) -> Dict[str, List[Message]]:
+        res = super(KafkaRecordBroker, self).poll(timeout=timeout)
+        self.sample_lag()
+        return res
+
+    def poll_list(self, timeout: float = 0) -> List[Message]:
+        res = super(KafkaRecordBroker, self).poll_list(timeout=timeout)
+        self.sample_lag()
+        return res
+
+    def poll_records(self, timeout: float = 0) -> List[BusRecord]:
+        """
+        Polls the broker for at least one message with a timeout.
+        Returns records from any topics subscribed to, in the order
+        they were received within each partition.
+
+        :param timeout: Timeout in seconds
+        """
+        res = self.kafka_consumer.poll(timeout_ms=timeout * 1000)
+        self.sample_lag()
+
+        return [
+            BusRecord(
+                topic=partition.topic,
+                partition=partition.partition,
+                offset=record.offset,
+                message=record.value,
+            )
+            for partition, record_list in res.items()
+            for record in record_list
+        ]
 
 
-broker = get_default_broker(
+broker = KafkaRecordBroker(
     group='meteringpoints',
     servers=MESSAGE_BUS_SERVERS,
+    serializer=MessageSerializer(registry=message_registry),
 )
@@ -0,0 +1,192 @@
+import time
+import logging
+from threading import Lock
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Generic, TypeVar, Hashable, Optional
+
+# Only required when using RedisCache
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+TKey = TypeVar('TKey', bound=Hashable)
+TValue = TypeVar('TValue')
+
+
+logger = logging.getLogger(__name__)
+
+
+def require_redis(setting: str, url: Optional[str]):
+    """
+    Raises RuntimeError unless Redis can be used as configured by the
+    setting, so a misconfigured cache fails at startup rather than
+    when first used.
+
+    :param setting: Name of the setting which selected Redis
+    :param url: Redis URL (from configuration)
+    """
+    if redis is None:
+        raise RuntimeError(
+            f'{setting}=redis requires the redis package, '
+            f'install it with: pip install redis')
+
+    if not url:
+        raise RuntimeError(
+            f'{setting}=redis requires a Redis URL, '
+            f'ie. redis://localhost:6379/0')
+
+
+class Cache(ABC, Generic[TKey, TValue]):
+    """
+    Interface of caches, allowing users of a cache to be indifferent to
+    where entries are stored.
+    """
+
+    @abstractmethod
+    def get(self, key: TKey) -> Optional[TValue]:
+        """
+        Returns the value for key, or None if it does not exist
+        or has expired.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: TKey, value: TValue):
+        """
+        Sets value for key.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: TKey):
+        """
+        Deletes the value for key (if it exists).
+        """
+        raise NotImplementedError
+
+
+class LRUCache(Cache[TKey, TValue]):
+    """
+    A thread-safe, process-local cache bounded by size (evicting the least
+    recently used entry first) and by time-to-live for each entry.
+    """
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        """
+        :param max_size: Max. number of entries in the cache
+        :param ttl: Max. time-to-live for entries in seconds (None = forever)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: TKey) -> Optional[TValue]:
+        """
+        Returns the value for key, or None if it does not exist
+        or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            value, expires = entry
+
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return value
+
+    def set(self, key: TKey, value: TValue):
+        """
+        Sets value for key, evicting the least recently used entry
+        if the cache is full.
+        """
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+        else:
+            expires = None
+
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: TKey):
+        """
+        Deletes the value for key (if it exists).
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Deletes all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache(Cache[str, bytes]):
+    """
+    A cache shared by all processes (and hosts) using Redis, bounded by
+    time-to-live for each entry. Redis bounds the size of the cache, and
+    should be configured to evict the least recently used entries first
+    (maxmemory-policy allkeys-lru).
+
+    Errors communicating with Redis are logged and treated as misses,
+    so the cache being unavailable does not fail requests.
+    """
+    def __init__(
+            self,
+            url: str,
+            ttl: Optional[float] = None,
+            prefix: str = 'meteringpoints:',
+    ):
+        """
+        :param url: Redis URL, ie. redis://localhost:6379/0
+        :param ttl: Max. time-to-live for entries in seconds (None = forever)
+        :param prefix: Prefix of keys in Redis
+        """
+        if redis is None:
+            raise RuntimeError('RedisCache requires the redis package')
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get(self.prefix + key)
+        except redis.RedisError:
+            logger.exception('Failed to get %s from Redis', key)
+            return None
+
+    def set(self, key: str, value: bytes):
+        if self.ttl is not None:
+            px = int(self.ttl * 1000)
+        else:
+            px = None
+
+        try:
+            self.client.set(self.prefix + key, value, px=px)
+        except redis.RedisError:
+            logger.exception('Failed to set %s in Redis', key)
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self.prefix + key)
+        except redis.RedisError:
+            logger.exception('Failed to delete %s from Redis', key)
@@ -0,0 +1,119 @@
+from threading import Lock
+from typing import Dict, Tuple, Optional
+
+from energytt_platform.models.tech import TechnologyType
+
+from .db import db
+from .models import DbTechnology
+from .queries import TechnologyQuery
+from .notify import NotificationListener, TECHNOLOGY_CHANGED_CHANNEL
+
+
+# (tech_code, fuel_code)
+TTechnologyKey = Tuple[str, str]
+
+TTechnologies = Dict[TTechnologyKey, TechnologyType]
+
+
+class TechnologyCatalog(object):
+    """
+    Process-local catalog of all known technologies, mapping technology
+    codes to the type of technology.
+
+    The technology table is tiny and rarely changes, so the entire
+    catalog is (re)loaded when notified by the consumer that a technology
+    has changed (see NotificationListener), and the version is incremented.
+    Without a listener the catalog could be stale, so it is loaded from the
+    database every time instead.
+    """
+    def __init__(self):
+        self.listener: Optional[NotificationListener] = None
+        self.version = 0
+        self._technologies: Optional[TTechnologies] = None
+        self._lock = Lock()
+
+    @property
+    def is_enabled(self) -> bool:
+        """
+        Returns True if the catalog is listening for changes, and has
+        been loaded.
+        """
+        return self.listener is not None \
+            and self.listener.connected.is_set() \
+            and self._technologies is not None
+
+    def start_listening(self):
+        """
+        Starts listening for changes in a background thread. The catalog
+        is loaded upon connecting, and reloaded upon each change.
+        """
+        if self.listener is not None:
+            return
+
+        self.listener = NotificationListener(
+            channel=TECHNOLOGY_CHANGED_CHANNEL,
+            on_notify=lambda payload: self.reload(),
+            on_connect=self.reload,
+        )
+        self.listener.start()
+
+    def get_technologies(self, session: db.Session) -> TTechnologies:
+        """
+        Returns the type of all known technologies mapped by their codes.
+        """
+        if self.is_enabled:
+            return self._technologies
+
+        return self.load(session)
+
+    def get_technology_type(
+            self,
+            session: db.Session,
+            tech_code: Optional[str],
+            fuel_code: Optional[str],
+    ) -> Optional[TechnologyType]:
+        """
+        Returns the type of a single technology (if known), without loading
+        the entire catalog from the database when not listening.
+        """
+        if self.is_enabled:
+            return self._technologies.get((tech_code, fuel_code))
+
+        if tech_code is None or fuel_code is None:
+            return None
+
+        return TechnologyQuery(session) \
+            .has_tech_code(tech_code) \
+            .has_fuel_code(fuel_code) \
+            .with_entities(DbTechnology.type) \
+            .scalar()
+
+    def load(self, session: db.Session) -> TTechnologies:
+        """
+        Loads all technologies from the database.
+        """
+        return {
+            (row.tech_code, row.fuel_code): row.type
+            for row in session.query(
+                DbTechnology.tech_code,
+                DbTechnology.fuel_code,
+                DbTechnology.type,
+            )
+        }
+
+    def reload(self):
+        """
+        Reloads the catalog from the database.
+        """
+        with db.make_session() as session:
+            technologies = self.load(session)
+
+        with self._lock:
+            self._technologies = technologies
+            self.version += 1
+
+
+# -- Singletons --------------------------------------------------------------
+
+
+technology_catalog = TechnologyCatalog()
@@ -26,3 +26,125 @@ SQL_URI = os.environ.get('SQL_URI', '')
 
 # Number of concurrent connection to SQL database
 SQL_POOL_SIZE = int(os.getenv('SQL_POOL_SIZE', 1))
+
+# Max. number of connections to open beyond SQL_POOL_SIZE under load
+SQL_MAX_OVERFLOW = int(os.getenv('SQL_MAX_OVERFLOW', 10))
+
+# Max. age of connections before they are replaced (seconds, -1 = never)
+SQL_POOL_RECYCLE = int(os.getenv('SQL_POOL_RECYCLE', 1800))
+
+# Whether to test connections for liveness upon checkout
+SQL_POOL_PRE_PING = os.getenv('SQL_POOL_PRE_PING', '1') == '1'
+
+# Number of connections to SQL database shared by all requests when
+# serving the API asynchronously (see meteringpoints_api.asgi), and the
+# max. number of additional connections to open under load
+ASYNC_SQL_POOL_SIZE = int(os.getenv('ASYNC_SQL_POOL_SIZE', 20))
+ASYNC_SQL_MAX_OVERFLOW = int(os.getenv('ASYNC_SQL_MAX_OVERFLOW', 10))
+
+
+# -- API ---------------------------------------------------------------------
+
+# Max. number of GSRNs to request at once from POST /details/batch
+DETAILS_BATCH_MAX_SIZE = int(os.environ.get('DETAILS_BATCH_MAX_SIZE', 500))
+
+# Number of rows fetched from the database (and sent to the client) at a
+# time when streaming exports from POST /export
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+
+
+# -- Compression -------------------------------------------------------------
+
+# Whether to compress API responses (negotiated by Accept-Encoding)
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+
+# Min. size of responses to compress (bytes); smaller responses are sent
+# uncompressed, as the saving does not outweigh the cost
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+# Compression levels, favouring CPU cost over compression ratio
+COMPRESSION_LEVEL_GZIP = int(os.environ.get('COMPRESSION_LEVEL_GZIP', 5))
+COMPRESSION_LEVEL_BROTLI = int(os.environ.get('COMPRESSION_LEVEL_BROTLI', 4))
+COMPRESSION_LEVEL_ZSTD = int(os.environ.get('COMPRESSION_LEVEL_ZSTD', 3))
+
+
+# -- Caching -----------------------------------------------------------------
+
+# Max. number of exact totals to cache for POST /list
+COUNT_CACHE_SIZE = int(os.environ.get('COUNT_CACHE_SIZE', 10000))
+
+# Max. time to cache exact totals for POST /list (seconds)
+COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', 300))
+
+# Whether to cache responses of POST /list
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', '0') == '1'
+
+# Where to cache responses; "memory" (in each process) or "redis"
+# (shared by all processes, requires RESPONSE_CACHE_REDIS_URL)
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+
+# Redis URL, ie. redis://localhost:6379/0 (when caching responses in Redis)
+RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL')
+
+# Max. number of responses to cache (in memory, otherwise bounded by Redis)
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 10000))
+
+# Max. time to cache responses (seconds)
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+
+# Whether to cache which MeteringPoints each subject has access to
+# (requires a connection to listen for invalidations from the consumer)
+ACCESS_CACHE_ENABLED = os.environ.get('ACCESS_CACHE_ENABLED', '1') == '1'
+
+# Where to share cached access between processes; "memory" (not shared,
+# each process caches on its own) or "redis" (requires
+# ACCESS_CACHE_REDIS_URL)
+ACCESS_CACHE_BACKEND = os.environ.get('ACCESS_CACHE_BACKEND', 'memory')
+
+# Redis URL, ie. redis://localhost:6379/0 (when sharing access in Redis)
+ACCESS_CACHE_REDIS_URL = os.environ.get('ACCESS_CACHE_REDIS_URL')
+
+# Max. number of subjects to cache access for (in each process)
+ACCESS_CACHE_SIZE = int(os.environ.get('ACCESS_CACHE_SIZE', 10000))
+
+# Max. time to cache access for a subject (seconds)
+ACCESS_CACHE_TTL = int(os.environ.get('ACCESS_CACHE_TTL', 300))
+
+# Max. number of GSRNs to cache for a subject; subjects with access to
+# more MeteringPoints are filtered by joining delegates in the database
+# instead (large IN-lists are slower than the join)
+ACCESS_CACHE_MAX_GSRN = int(os.environ.get('ACCESS_CACHE_MAX_GSRN', 1000))
+
+
+# -- Consumer ----------------------------------------------------------------
+
+# How the consumer applies messages; either one message per
+# transaction ('single'), many messages per transaction ('batch'),
+# or many messages per transaction in parallel lanes keyed by GSRN
+# ('parallel')
+CONSUMER_MODE = os.environ.get('CONSUMER_MODE', 'single')
+
+# Max. number of messages applied within one transaction (batch/parallel)
+CONSUMER_BATCH_SIZE = int(os.environ.get('CONSUMER_BATCH_SIZE', 500))
+
+# Max. time to wait for messages when polling the broker (batch/parallel)
+CONSUMER_BATCH_TIMEOUT_MS = int(
+    os.environ.get('CONSUMER_BATCH_TIMEOUT_MS', 1000))
+
+# Whether to skip updates superseded by later messages received within
+# the same poll (batch/parallel mode)
+CONSUMER_COALESCE = os.environ.get('CONSUMER_COALESCE', '1') == '1'
+
+# Whether to record the offset of applied messages, and skip messages
+# which have already been applied, ie. when replayed (batch mode only,
+# where it is enabled by default)
+CONSUMER_LEDGER = os.environ.get(
+    'CONSUMER_LEDGER', '1' if CONSUMER_MODE == 'batch' else '0') == '1'
+
+# Number of lanes (worker threads) applying messages (parallel mode).
+# Each lane holds a database connection, so SQL_POOL_SIZE (plus
+# SQL_MAX_OVERFLOW) should be at least CONSUMER_WORKERS.
+CONSUMER_WORKERS = int(os.environ.get('CONSUMER_WORKERS', 4))
+
+# Port to expose Prometheus metrics on (over HTTP)
+CONSUMER_METRICS_PORT = int(os.environ.get('CONSUMER_METRICS_PORT', 9094))
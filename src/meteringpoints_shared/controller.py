@@ -1,15 +1,26 @@
-from typing import Union
+from typing import List, Dict, Tuple, Any, Union, Iterable, Optional
+from sqlalchemy import select, delete, literal, and_, exists, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
 
 from energytt_platform.models.common import Address
 from energytt_platform.models.tech import Technology, TechnologyCodes
+from energytt_platform.models.meteringpoints import MeteringPoint
 
 from meteringpoints_shared.db import db
+from meteringpoints_shared.notify import \
+    notify, ACCESS_CHANGED_CHANNEL, TECHNOLOGY_CHANGED_CHANNEL
+from meteringpoints_shared.utils import chunks
 from meteringpoints_shared.models import (
+    ADDRESS_FIELDS,
     DbMeteringPoint,
+    DbMeteringPointRead,
     DbMeteringPointAddress,
     DbMeteringPointTechnology,
     DbMeteringPointDelegate,
     DbTechnology,
+    DbSubjectGeneration,
+    DbAppliedOffset,
+    meteringpoint_read_version,
 )
 from meteringpoints_shared.queries import (
     MeteringPointQuery,
@@ -17,6 +28,21 @@ from meteringpoints_shared.queries import (
     MeteringPointTechnologyQuery,
     DelegateQuery,
     TechnologyQuery,
+    SubjectGenerationQuery,
+    AppliedOffsetQuery,
+)
+
+
+# Max. number of rows to insert/update in a single bulk statement
+BULK_CHUNK_SIZE = 1000
+
+
+# Models holding data associated with a MeteringPoint (by GSRN)
+ASSOCIATED_MODELS = (
+    DbMeteringPointAddress,
+    DbMeteringPointTechnology,
+    DbMeteringPointDelegate,
+    DbMeteringPointRead,
 )
 
 
@@ -25,6 +51,9 @@ TAddress = Union[
     DbMeteringPointAddress,
 ]
 
+# (topic, partition)
+TPartition = Tuple[str, int]
+
 TTechnology = Union[
     Technology,
     TechnologyCodes,
@@ -58,6 +87,29 @@ class DatabaseController(object):
 
         return meteringpoint
 
+    def bulk_upsert_meteringpoints(
+            self,
+            session: db.Session,
+            meteringpoints: Iterable[MeteringPoint],
+    ):
+        """
+        Creates or updates many DbMeteringPoints (type and sector only)
+        using a single INSERT ... ON CONFLICT statement per chunk.
+
+        If the same GSRN occurs multiple times, the last occurrence wins.
+        """
+        rows = {
+            mp.gsrn: {'gsrn': mp.gsrn, 'type': mp.type, 'sector': mp.sector}
+            for mp in meteringpoints
+        }
+
+        self._bulk_upsert(
+            session=session,
+            model=DbMeteringPoint,
+            rows=rows.values(),
+            update_columns=('type', 'sector'),
+        )
+
     def delete_meteringpoint(
             self,
             session: db.Session,
@@ -66,21 +118,39 @@ class DatabaseController(object):
         """
         Delete a DbMeteringPoint and all of its associated data.
         """
-        MeteringPointQuery(session) \
-            .has_gsrn(gsrn) \
-            .delete()
+        self.delete_meteringpoints(session=session, gsrn=[gsrn])
 
-        MeteringPointAddressQuery(session) \
-            .has_gsrn(gsrn) \
-            .delete()
+    def delete_meteringpoints(
+            self,
+            session: db.Session,
+            gsrn: List[str],
+    ):
+        """
+        Deletes many DbMeteringPoints and all of their associated data
+        (address, technology, delegates and read model) with a single
+        statement (per chunk), deleting from the other tables using
+        data-modifying CTEs.
+
+        Foreign keys (with cascading deletes) are not an option, as data
+        associated with a MeteringPoint may be received before the
+        MeteringPoint itself.
+        """
+        session.flush()
 
-        MeteringPointTechnologyQuery(session) \
-            .has_gsrn(gsrn) \
-            .delete()
+        for chunk in chunks(gsrn, BULK_CHUNK_SIZE):
+            stmt = delete(DbMeteringPoint.__table__) \
+                .where(DbMeteringPoint.gsrn.in_(chunk))
 
-        DelegateQuery(session) \
-            .has_gsrn(gsrn) \
-            .delete()
+            for model in ASSOCIATED_MODELS:
+                stmt = stmt.add_cte(
+                    delete(model.__table__)
+                    .where(model.gsrn.in_(chunk))
+                    .cte(f'delete_{model.__tablename__}')
+                )
+
+            session.execute(stmt)
+
+            self._expunge(session, chunk)
 
     # -- MeteringPoint Addresses ---------------------------------------------
 
@@ -115,6 +185,33 @@ class DatabaseController(object):
         meteringpoint_address.location_description = \
             address.location_description
 
+    def bulk_set_meteringpoint_addresses(
+            self,
+            session: db.Session,
+            addresses: Dict[str, TAddress],
+    ):
+        """
+        Creates or updates addresses for many DbMeteringPoints using a
+        single INSERT ... ON CONFLICT statement per chunk.
+
+        :param session: Database session
+        :param addresses: Addresses mapped by GSRN
+        """
+        rows = (
+            dict(
+                gsrn=gsrn,
+                **{f: getattr(address, f) for f in ADDRESS_FIELDS},
+            )
+            for gsrn, address in addresses.items()
+        )
+
+        self._bulk_upsert(
+            session=session,
+            model=DbMeteringPointAddress,
+            rows=rows,
+            update_columns=ADDRESS_FIELDS,
+        )
+
     def delete_meteringpoint_address(
             self,
             session: db.Session,
@@ -127,6 +224,18 @@ class DatabaseController(object):
             .has_gsrn(gsrn) \
             .delete()
 
+    def bulk_delete_meteringpoint_addresses(
+            self,
+            session: db.Session,
+            gsrn: List[str],
+    ):
+        """
+        Deletes addresses for many DbMeteringPoints.
+        """
+        MeteringPointAddressQuery(session) \
+            .has_any_gsrn(gsrn) \
+            .delete(synchronize_session=False)
+
     # -- MeteringPoint Delegates ---------------------------------------------
 
     def grant_meteringpoint_delegate(
@@ -185,6 +294,34 @@ class DatabaseController(object):
         meteringpoint_technology.tech_code = technology.tech_code
         meteringpoint_technology.fuel_code = technology.fuel_code
 
+    def bulk_set_meteringpoint_technologies(
+            self,
+            session: db.Session,
+            technologies: Dict[str, TTechnology],
+    ):
+        """
+        Creates or updates technology codes for many DbMeteringPoints
+        using a single INSERT ... ON CONFLICT statement per chunk.
+
+        :param session: Database session
+        :param technologies: Technologies mapped by GSRN
+        """
+        rows = (
+            {
+                'gsrn': gsrn,
+                'tech_code': technology.tech_code,
+                'fuel_code': technology.fuel_code,
+            }
+            for gsrn, technology in technologies.items()
+        )
+
+        self._bulk_upsert(
+            session=session,
+            model=DbMeteringPointTechnology,
+            rows=rows,
+            update_columns=('tech_code', 'fuel_code'),
+        )
+
     def delete_meteringpoint_technology(
             self,
             session: db.Session,
@@ -197,41 +334,383 @@ class DatabaseController(object):
             .has_gsrn(gsrn) \
             .delete()
 
+    def bulk_delete_meteringpoint_technologies(
+            self,
+            session: db.Session,
+            gsrn: List[str],
+    ):
+        """
+        Deletes technology codes for many DbMeteringPoints.
+        """
+        MeteringPointTechnologyQuery(session) \
+            .has_any_gsrn(gsrn) \
+            .delete(synchronize_session=False)
+
     # -- Technologies --------------------------------------------------------
 
-    def get_or_create_technology(
+    def set_technology(
+            self,
+            session: db.Session,
+            technology: Technology,
+    ):
+        """
+        Creates or updates a technology with a single statement.
+        """
+        self._bulk_upsert(
+            session=session,
+            model=DbTechnology,
+            rows=[{
+                'tech_code': technology.tech_code,
+                'fuel_code': technology.fuel_code,
+                'type': technology.type,
+            }],
+            update_columns=['type'],
+            index_elements=['tech_code', 'fuel_code'],
+        )
+
+    def delete_technology(
             self,
             session: db.Session,
             tech_code: str,
             fuel_code: str,
-    ) -> DbTechnology:
+    ):
         """
         TODO
         """
-        technology = TechnologyQuery(session) \
+        TechnologyQuery(session) \
             .has_tech_code(tech_code) \
             .has_fuel_code(fuel_code) \
-            .one_or_none()
+            .delete()
 
-        if technology is None:
-            technology = DbTechnology(tech_code=tech_code, fuel_code=fuel_code)
-            session.add(technology)
+    # -- Subject generations -------------------------------------------------
 
-        return technology
+    def get_subject_generation(
+            self,
+            session: db.Session,
+            subject: str,
+    ) -> int:
+        """
+        Returns the current generation of the subject's data.
+        """
+        generation = SubjectGenerationQuery(session) \
+            .has_subject(subject) \
+            .with_entities(DbSubjectGeneration.generation) \
+            .scalar()
 
-    def delete_technology(
+        return generation or 0
+
+    def bump_subject_generations(
+            self,
+            session: db.Session,
+            subjects: Iterable[str],
+    ):
+        """
+        Increments the generation of each of the provided subjects.
+        """
+        subjects = set(subjects)
+
+        if subjects:
+            self._bump_generations(
+                session=session,
+                stmt=insert(DbSubjectGeneration.__table__).values([
+                    {'subject': subject, 'generation': 1}
+                    for subject in sorted(subjects)
+                ]),
+            )
+
+    def bump_subject_generations_for_meteringpoints(
+            self,
+            session: db.Session,
+            gsrn: List[str],
+    ):
+        """
+        Increments the generation of each subject which has been delegated
+        access to any of the MeteringPoints with the provided GSRN.
+        """
+        subjects = select(DbMeteringPointDelegate.subject, literal(1)) \
+            .where(DbMeteringPointDelegate.gsrn.in_(gsrn)) \
+            .distinct() \
+            .order_by(DbMeteringPointDelegate.subject)
+
+        self._bump_generations(
+            session=session,
+            stmt=insert(DbSubjectGeneration.__table__).from_select(
+                ['subject', 'generation'], subjects),
+        )
+
+    def bump_subject_generations_for_technology(
             self,
             session: db.Session,
             tech_code: str,
             fuel_code: str,
     ):
         """
-        TODO
+        Increments the generation of each subject which has been delegated
+        access to any MeteringPoint with the provided technology codes.
         """
-        TechnologyQuery(session) \
-            .has_tech_code(tech_code) \
-            .has_fuel_code(fuel_code) \
-            .delete()
+        subjects = select(DbMeteringPointDelegate.subject, literal(1)) \
+            .join(DbMeteringPointTechnology, and_(
+                DbMeteringPointTechnology.gsrn == DbMeteringPointDelegate.gsrn,
+                DbMeteringPointTechnology.tech_code == tech_code,
+                DbMeteringPointTechnology.fuel_code == fuel_code,
+            )) \
+            .distinct() \
+            .order_by(DbMeteringPointDelegate.subject)
+
+        self._bump_generations(
+            session=session,
+            stmt=insert(DbSubjectGeneration.__table__).from_select(
+                ['subject', 'generation'], subjects),
+        )
+
+    def bump_all_subject_generations(self, session: db.Session):
+        """
+        Increments the generation of each subject which has been delegated
+        access to any MeteringPoint.
+        """
+        subjects = select(DbMeteringPointDelegate.subject, literal(1)) \
+            .distinct() \
+            .order_by(DbMeteringPointDelegate.subject)
+
+        self._bump_generations(
+            session=session,
+            stmt=insert(DbSubjectGeneration.__table__).from_select(
+                ['subject', 'generation'], subjects),
+        )
+
+    # -- Applied offsets -----------------------------------------------------
+
+    def get_applied_offsets(
+            self,
+            session: db.Session,
+            partitions: Iterable[TPartition],
+    ) -> Dict[TPartition, int]:
+        """
+        Returns the offset of the last applied message of each of the
+        provided partitions (from which any messages have been applied).
+        """
+        partitions = list(set(partitions))
+
+        if not partitions:
+            return {}
+
+        return {
+            (row.topic, row.partition): row.offset
+            for row in AppliedOffsetQuery(session)
+            .has_any_partition(partitions)
+        }
+
+    def set_applied_offsets(
+            self,
+            session: db.Session,
+            offsets: Dict[TPartition, int],
+    ):
+        """
+        Records the offset of the last applied message of each partition.
+        Offsets never decrease.
+        """
+        if not offsets:
+            return
+
+        # Inserted in order, so concurrent transactions lock the rows
+        # in the same order (avoiding deadlocks)
+        stmt = insert(DbAppliedOffset.__table__).values([
+            {'topic': topic, 'partition': partition, 'offset': offset}
+            for (topic, partition), offset in sorted(offsets.items())
+        ])
+
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=['topic', 'partition'],
+            set_={'offset': func.greatest(
+                DbAppliedOffset.offset, stmt.excluded.offset)},
+        ))
+
+    # -- Read model ----------------------------------------------------------
+
+    def refresh_meteringpoint_read(
+            self,
+            session: db.Session,
+            gsrn: List[str],
+    ):
+        """
+        Rebuilds the denormalized DbMeteringPointRead of each MeteringPoint
+        with the provided GSRN from the normalized tables, deleting those
+        of MeteringPoints which no longer exist.
+
+        Must be invoked (within the same transaction) after changing any
+        data of the MeteringPoints.
+        """
+        session.flush()
+
+        for chunk in chunks(gsrn, BULK_CHUNK_SIZE):
+            self._refresh_read(session, DbMeteringPoint.gsrn.in_(chunk))
+
+            session.query(DbMeteringPointRead) \
+                .filter(DbMeteringPointRead.gsrn.in_(chunk)) \
+                .filter(~exists().where(
+                    DbMeteringPoint.gsrn == DbMeteringPointRead.gsrn)) \
+                .delete(synchronize_session=False)
+
+    def rebuild_meteringpoint_read(self, session: db.Session):
+        """
+        Rebuilds the denormalized DbMeteringPointRead of all MeteringPoints
+        from the normalized tables, deleting those of MeteringPoints which
+        no longer exist.
+        """
+        session.flush()
+
+        self._refresh_read(session)
+
+        session.query(DbMeteringPointRead) \
+            .filter(~exists().where(
+                DbMeteringPoint.gsrn == DbMeteringPointRead.gsrn)) \
+            .delete(synchronize_session=False)
+
+    # -- Notifications -------------------------------------------------------
+
+    def notify_access_changed(
+            self,
+            session: db.Session,
+            subjects: Iterable[str],
+    ):
+        """
+        Notifies listeners that the subjects' access has changed.
+        Notifications are delivered when the transaction commits.
+        """
+        for subject in set(subjects):
+            notify(session, ACCESS_CHANGED_CHANNEL, subject)
+
+    def notify_technology_changed(
+            self,
+            session: db.Session,
+            tech_code: str,
+            fuel_code: str,
+    ):
+        """
+        Notifies listeners (ie. TechnologyCatalog) that a technology has
+        changed or has been removed.
+        """
+        notify(
+            session=session,
+            channel=TECHNOLOGY_CHANGED_CHANNEL,
+            payload=f'{tech_code}/{fuel_code}',
+        )
+
+    def notify_access_changed_for_meteringpoints(
+            self,
+            session: db.Session,
+            gsrn: List[str],
+    ):
+        """
+        Notifies listeners that the access has changed for each subject
+        which has been delegated access to any of the MeteringPoints with
+        the provided GSRN.
+        """
+        subjects = select(DbMeteringPointDelegate.subject) \
+            .where(DbMeteringPointDelegate.gsrn.in_(gsrn)) \
+            .distinct() \
+            .subquery()
+
+        notify(session, ACCESS_CHANGED_CHANNEL, subjects.c.subject)
+
+    # -- Helpers -------------------------------------------------------------
+
+    def _expunge(self, session: db.Session, gsrn: List[str]):
+        """
+        Removes (deleted) MeteringPoints and their associated data with the
+        provided GSRN from the session, so they are not mistaken for
+        existing rows if recreated within the same transaction.
+        """
+        gsrn = set(gsrn)
+        models = (DbMeteringPoint,) + ASSOCIATED_MODELS
+
+        for obj in list(session):
+            if isinstance(obj, models) and obj.gsrn in gsrn:
+                session.expunge(obj)
+
+    def _bump_generations(self, session: db.Session, stmt: Any):
+        """
+        Executes an INSERT statement of subject generations, incrementing
+        the generation of subjects which already exist.
+
+        Statements must insert subjects in order, so concurrent
+        transactions lock the rows in the same order (avoiding deadlocks).
+        """
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=['subject'],
+            set_={'generation': DbSubjectGeneration.generation + 1},
+        ))
+
+    def _refresh_read(self, session: db.Session, *criteria: Any):
+        """
+        Upserts DbMeteringPointRead for each MeteringPoint matching the
+        criteria with a single INSERT ... SELECT statement, joining the
+        MeteringPoint with its address and technology codes.
+
+        Existing rows are only updated (and given a new version) if any
+        of their columns actually changed.
+        """
+        columns = ['type', 'sector']
+        columns.extend(f'address_{f}' for f in ADDRESS_FIELDS)
+        columns.extend(('tech_code', 'fuel_code'))
+
+        rows = select(
+            DbMeteringPoint.gsrn,
+            DbMeteringPoint.type,
+            DbMeteringPoint.sector,
+            *(getattr(DbMeteringPointAddress, f) for f in ADDRESS_FIELDS),
+            DbMeteringPointTechnology.tech_code,
+            DbMeteringPointTechnology.fuel_code,
+        ) \
+            .outerjoin(DbMeteringPointAddress, (
+                DbMeteringPointAddress.gsrn == DbMeteringPoint.gsrn
+            )) \
+            .outerjoin(DbMeteringPointTechnology, (
+                DbMeteringPointTechnology.gsrn == DbMeteringPoint.gsrn
+            )) \
+            .where(*criteria)
+
+        table = DbMeteringPointRead.__table__
+        stmt = insert(table).from_select(['gsrn'] + columns, rows)
+
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=['gsrn'],
+            set_={
+                'version': meteringpoint_read_version.next_value(),
+                **{c: stmt.excluded[c] for c in columns},
+            },
+            where=tuple_(*(table.c[c] for c in columns)).is_distinct_from(
+                tuple_(*(stmt.excluded[c] for c in columns))),
+        ))
+
+    def _bulk_upsert(
+            self,
+            session: db.Session,
+            model: Any,
+            rows: Iterable[Dict[str, Any]],
+            update_columns: Iterable[str],
+            index_elements: Optional[List[str]] = None,
+            chunk_size: int = BULK_CHUNK_SIZE,
+    ):
+        """
+        Inserts rows into the model's table, updating the provided columns
+        of existing rows (identified by "index_elements") on conflict.
+
+        Rows within one chunk must be unique on "index_elements", as
+        PostgreSQL does not allow updating the same row twice in a
+        single statement.
+        """
+        if index_elements is None:
+            index_elements = ['gsrn']
+
+        for chunk in chunks(rows, chunk_size):
+            stmt = insert(model.__table__).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={c: stmt.excluded[c] for c in update_columns},
+            )
+
+            session.execute(stmt)
 
 
 # -- Singletons --------------------------------------------------------------
@@ -1,9 +1,50 @@
+from typing import Dict, Any
+
 from energytt_platform.sql import SqlEngine
 
-from .config import SQL_URI, SQL_POOL_SIZE
+from .metrics import TimedQueuePool
+from .config import (
+    SQL_URI,
+    SQL_POOL_SIZE,
+    SQL_MAX_OVERFLOW,
+    SQL_POOL_RECYCLE,
+    SQL_POOL_PRE_PING,
+)
+
+
+class MeteringPointsSqlEngine(SqlEngine):
+    """
+    SqlEngine with configurable pooling, which observes the time spent
+    waiting for pooled connections.
+    """
+    def __init__(
+            self,
+            *args: Any,
+            max_overflow: int = 10,
+            pool_recycle: int = -1,
+            pool_pre_ping: bool = True,
+            **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.pool_pre_ping = pool_pre_ping
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return dict(
+            super().settings,
+            poolclass=TimedQueuePool,
+            max_overflow=self.max_overflow,
+            pool_recycle=self.pool_recycle,
+            pool_pre_ping=self.pool_pre_ping,
+        )
 
 
-db = SqlEngine(
+db = MeteringPointsSqlEngine(
     uri=SQL_URI,
     pool_size=SQL_POOL_SIZE,
+    max_overflow=SQL_MAX_OVERFLOW,
+    pool_recycle=SQL_POOL_RECYCLE,
+    pool_pre_ping=SQL_POOL_PRE_PING,
 )
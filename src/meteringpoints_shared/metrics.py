@@ -0,0 +1,232 @@
+"""
+Prometheus metrics shared by the API and the consumer.
+
+Database queries are counted and timed for all engines. The number and
+duration of queries are tracked per "unit of work" (an HTTP request or a
+message) by wrapping it in track_queries().
+"""
+import time
+from functools import wraps
+from contextvars import ContextVar, Token
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, Iterator, Tuple, Callable, Type, Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from prometheus_client import Histogram, Gauge, Counter
+
+
+# -- Metrics -----------------------------------------------------------------
+
+
+REQUEST_LATENCY = Histogram(
+    'meteringpoints_request_latency_seconds',
+    'Time spent handling HTTP requests',
+    ['method', 'endpoint', 'status'],
+)
+
+REQUEST_SECTION_LATENCY = Histogram(
+    'meteringpoints_request_section_latency_seconds',
+    'Time spent in sections of endpoints (ie. counting or querying)',
+    ['handler', 'section'],
+)
+
+REQUEST_DB_QUERIES = Histogram(
+    'meteringpoints_request_db_queries',
+    'Number of database queries per HTTP request',
+    ['endpoint'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+REQUEST_DB_TIME = Histogram(
+    'meteringpoints_request_db_time_seconds',
+    'Time spent in database queries per HTTP request',
+    ['endpoint'],
+)
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    'meteringpoints_response_cache_requests',
+    'Number of lookups in the response cache by result (hit or miss)',
+    ['handler', 'result'],
+)
+
+HANDLER_LATENCY = Histogram(
+    'meteringpoints_handler_latency_seconds',
+    'Time spent handling messages, including committing the transaction',
+    ['message_type', 'mode'],
+)
+
+HANDLER_DB_QUERIES = Histogram(
+    'meteringpoints_handler_db_queries',
+    'Number of database queries per handled message (or group of messages)',
+    ['message_type', 'mode'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+BATCH_SIZE = Histogram(
+    'meteringpoints_consumer_batch_size',
+    'Number of messages applied within one transaction',
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+
+BATCH_LATENCY = Histogram(
+    'meteringpoints_consumer_batch_latency_seconds',
+    'Time spent applying a batch of messages, including committing',
+)
+
+COALESCED_MESSAGES = Counter(
+    'meteringpoints_consumer_coalesced_messages',
+    'Number of messages skipped as they were superseded by later messages',
+)
+
+SKIPPED_MESSAGES = Counter(
+    'meteringpoints_consumer_skipped_messages',
+    'Number of messages skipped as they had already been applied',
+)
+
+CONSUMER_LAG = Gauge(
+    'meteringpoints_consumer_lag',
+    'Max. number of messages the consumer is behind any partition',
+)
+
+POOL_CHECKOUT_WAIT = Histogram(
+    'meteringpoints_db_pool_checkout_wait_seconds',
+    'Time spent waiting for a connection from the connection pool',
+    buckets=(.0001, .0005, .001, .005, .01, .05, .1, .5, 1, 5, 10, 30),
+)
+
+
+# -- Query tracking ----------------------------------------------------------
+
+
+@dataclass
+class QueryStats:
+    """
+    Number and total duration of database queries within a unit of work.
+    """
+    count: int = 0
+    duration: float = 0.0
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = \
+    ContextVar('query_stats', default=None)
+
+
+def start_tracking_queries() -> Tuple[QueryStats, Token]:
+    """
+    Starts tracking the number and duration of database queries executed
+    in the current thread (or task) until stop_tracking_queries() is invoked
+    with the returned token.
+    """
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    return stats, token
+
+
+def stop_tracking_queries(token: Token):
+    """
+    Stops tracking database queries started by start_tracking_queries().
+    """
+    _query_stats.reset(token)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Tracks the number and duration of database queries executed within
+    the context (in the current thread or task).
+    """
+    stats, token = start_tracking_queries()
+
+    try:
+        yield stats
+    finally:
+        stop_tracking_queries(token)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    duration = time.perf_counter() - conn.info['query_start_time'].pop()
+    stats = _query_stats.get()
+
+    if stats is not None:
+        stats.count += 1
+        stats.duration += duration
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    if context.connection is not None:
+        start_times = context.connection.info.get('query_start_time')
+        if start_times:
+            start_times.pop()
+
+
+# -- Timing ------------------------------------------------------------------
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels: str):
+    """
+    Observes the time spent within the context in a histogram.
+    """
+    begin = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        if labels:
+            histogram = histogram.labels(**labels)
+        histogram.observe(time.perf_counter() - begin)
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool which observes the time spent waiting for connections.
+    """
+    def _do_get(self):
+        begin = time.perf_counter()
+
+        try:
+            return super(TimedQueuePool, self)._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - begin)
+
+
+def observe_handler(
+        handler: Callable[..., Any],
+        message_type: Type[Any],
+        mode: str = 'single',
+) -> Callable[..., Any]:
+    """
+    Wraps a message handler, observing its latency and database queries.
+
+    :param handler: The handler to wrap
+    :param message_type: Type of messages handled
+    :param mode: How messages are applied ('single', 'batch' or 'bulk')
+    """
+    labels = {'message_type': message_type.__name__, 'mode': mode}
+    latency = HANDLER_LATENCY.labels(**labels)
+    queries = HANDLER_DB_QUERIES.labels(**labels)
+
+    @wraps(handler)
+    def observed_handler(*args, **kwargs):
+        begin = time.perf_counter()
+
+        with track_queries() as stats:
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                latency.observe(time.perf_counter() - begin)
+                queries.observe(stats.count)
+
+    return observed_handler
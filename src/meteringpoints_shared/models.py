@@ -1,13 +1,15 @@
+import base64
 import sqlalchemy as sa
 from enum import Enum
-from typing import List, Optional
+from typing import List, Dict, Tuple, Optional, Any
 from dataclasses import dataclass, field
 from sqlalchemy.orm import relationship
 
-from energytt_platform.serialize import Serializable
-from energytt_platform.models.tech import TechnologyType
-from energytt_platform.models.common import ResultOrdering
-from energytt_platform.models.meteringpoints import MeteringPointType
+from energytt_platform.serialize import Serializable, json_serializer
+from energytt_platform.models.tech import Technology, TechnologyType
+from energytt_platform.models.common import Address, ResultOrdering, Order
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
 
 from .db import db
 
@@ -25,6 +27,30 @@ class MeteringPointFilters(Serializable):
     sector: Optional[List[str]] = field(default=None)
 
 
+class MeteringPointCountMode(Enum):
+    """
+    How to count the total number of MeteringPoints when querying.
+    """
+    # Count exactly (always queries the database)
+    exact = 'exact'
+    # Count exactly, but reuse cached count until the subject's data changes
+    cached = 'cached'
+    # Estimate count using the query planner's statistics
+    estimate = 'estimate'
+    # Do not count
+    none = 'none'
+
+
+class MeteringPointExportFormat(Enum):
+    """
+    Formats MeteringPoints can be exported in.
+    """
+    # A JSON object per line (serialized MeteringPoint)
+    ndjson = 'ndjson'
+    # CSV with a header row (address and technology flattened)
+    csv = 'csv'
+
+
 class MeteringPointOrderingKeys(Enum):
     """
     Keys to order MeteringPoints by when querying.
@@ -37,9 +63,94 @@ class MeteringPointOrderingKeys(Enum):
 MeteringPointOrdering = ResultOrdering[MeteringPointOrderingKeys]
 
 
+@dataclass
+class MeteringPointCursor(Serializable):
+    """
+    Position in a list of MeteringPoints for keyset pagination.
+
+    Holds the ordering of the list along with the value of the ordering key
+    and GSRN (tie-breaker) of the last MeteringPoint on the previous page.
+    Clients receive it as an opaque string (see encode() and decode()).
+    """
+    key: MeteringPointOrderingKeys
+    order: Order
+    gsrn: str
+    value: Optional[str] = field(default=None)
+
+    class DecodeError(Exception):
+        """
+        Raised when decoding an invalid cursor.
+        """
+        pass
+
+    @classmethod
+    def after(
+            cls,
+            meteringpoint: Any,
+            ordering: MeteringPointOrdering,
+    ) -> 'MeteringPointCursor':
+        """
+        Creates a cursor positioned after the provided MeteringPoint
+        (either a MeteringPoint or one of its SQL representations).
+        """
+        key = ordering.key or MeteringPointOrderingKeys.gsrn
+        value = getattr(meteringpoint, key.value)
+
+        if isinstance(value, Enum):
+            value = value.value
+
+        return cls(
+            key=key,
+            order=ordering.order,
+            gsrn=meteringpoint.gsrn,
+            value=value,
+        )
+
+    @classmethod
+    def decode(cls, cursor: str) -> 'MeteringPointCursor':
+        """
+        Decodes a cursor previously encoded using encode().
+        """
+        try:
+            return json_serializer.deserialize(
+                data=base64.urlsafe_b64decode(cursor.encode()),
+                schema=cls,
+            )
+        except Exception as e:
+            raise cls.DecodeError(str(e))
+
+    def encode(self) -> str:
+        """
+        Encodes the cursor as an opaque string.
+        """
+        return base64.urlsafe_b64encode(
+            json_serializer.serialize(self)).decode()
+
+    def matches(self, ordering: MeteringPointOrdering) -> bool:
+        """
+        Returns True if the cursor was created using the provided ordering.
+        """
+        key = ordering.key or MeteringPointOrderingKeys.gsrn
+        return self.key is key and self.order is ordering.order
+
+
 # -- Database models ---------------------------------------------------------
 
 
+ADDRESS_FIELDS = (
+    'street_code',
+    'street_name',
+    'building_number',
+    'floor_id',
+    'room_id',
+    'post_code',
+    'city_name',
+    'city_sub_division_name',
+    'municipality_code',
+    'location_description',
+)
+
+
 class DbMeteringPoint(db.ModelBase):
     """
     SQL representation of a MeteringPoint.
@@ -48,20 +159,36 @@ class DbMeteringPoint(db.ModelBase):
     __table_args__ = (
         sa.PrimaryKeyConstraint('gsrn'),
         sa.UniqueConstraint('gsrn'),
+
+        # Filtering and ordering by type/sector, using GSRN as tie-breaker
+        # (see MeteringPointQuery.apply_ordering() and apply_cursor()).
+        # Includes the other column, allowing index-only scans when
+        # filtering by both type and sector.
+        sa.Index(
+            'ix_meteringpoint_type_gsrn', 'type', 'gsrn',
+            postgresql_include=['sector'],
+        ),
+        sa.Index(
+            'ix_meteringpoint_sector_gsrn', 'sector', 'gsrn',
+            postgresql_include=['type'],
+        ),
     )
 
     gsrn = sa.Column(sa.String(), index=True, nullable=False)
-    sector = sa.Column(sa.String(), index=True)
-    type = sa.Column(sa.Enum(MeteringPointType), index=True)
+    sector = sa.Column(sa.String())
+    type = sa.Column(sa.Enum(MeteringPointType))
 
     # -- Relationships -------------------------------------------------------
 
+    # Loaded on access only. The API reads from DbMeteringPointRead,
+    # which includes the address and technology.
+
     address = relationship(
         'DbMeteringPointAddress',
         primaryjoin='foreign(DbMeteringPoint.gsrn) == DbMeteringPointAddress.gsrn',  # noqa: E501
         uselist=False,
         viewonly=True,
-        lazy='joined',
+        lazy='select',
     )
 
     # TODO Rewrite this?
@@ -77,7 +204,7 @@ class DbMeteringPoint(db.ModelBase):
         ),
         uselist=False,
         viewonly=True,
-        lazy='joined',
+        lazy='select',
     )
 
 
@@ -126,6 +253,13 @@ class DbMeteringPointDelegate(db.ModelBase):
     __tablename__ = 'meteringpoint_delegate'
     __table_args__ = (
         sa.PrimaryKeyConstraint('gsrn', 'subject'),
+
+        # Looking up MeteringPoints accessible by a subject
+        # (see MeteringPointQuery.is_accessible_by())
+        sa.Index(
+            'ix_meteringpoint_delegate_subject_gsrn', 'subject', 'gsrn',
+            unique=True,
+        ),
     )
 
     gsrn = sa.Column(sa.String(), index=True, nullable=False)
@@ -147,3 +281,163 @@ class DbTechnology(db.ModelBase):
 
     # TODO Use String instead of Enum (forward compatibility)
     type = sa.Column(sa.Enum(TechnologyType))
+
+
+# Versions of DbMeteringPointRead. A new version is drawn every time a
+# row changes, so versions are never reused, not even if a MeteringPoint
+# is removed and later recreated.
+meteringpoint_read_version = sa.Sequence(
+    'meteringpoint_read_version_seq',
+    metadata=db.ModelBase.metadata,
+)
+
+
+class DbMeteringPointRead(db.ModelBase):
+    """
+    Denormalized (read-only) representation of a MeteringPoint, including
+    its address and technology, which the API reads from. Maintained by the
+    consumer from the normalized tables (see
+    DatabaseController.refresh_meteringpoint_read()).
+    """
+    __tablename__ = 'meteringpoint_read'
+    __table_args__ = (
+        sa.PrimaryKeyConstraint('gsrn'),
+
+        # Filtering and ordering by type/sector (see DbMeteringPoint)
+        sa.Index(
+            'ix_meteringpoint_read_type_gsrn', 'type', 'gsrn',
+            postgresql_include=['sector'],
+        ),
+        sa.Index(
+            'ix_meteringpoint_read_sector_gsrn', 'sector', 'gsrn',
+            postgresql_include=['type'],
+        ),
+    )
+
+    gsrn = sa.Column(sa.String(), nullable=False)
+    sector = sa.Column(sa.String())
+    type = sa.Column(sa.Enum(MeteringPointType))
+
+    # Address
+    address_street_code = sa.Column(sa.String())
+    address_street_name = sa.Column(sa.String())
+    address_building_number = sa.Column(sa.String())
+    address_floor_id = sa.Column(sa.String())
+    address_room_id = sa.Column(sa.String())
+    address_post_code = sa.Column(sa.String())
+    address_city_name = sa.Column(sa.String())
+    address_city_sub_division_name = sa.Column(sa.String())
+    address_municipality_code = sa.Column(sa.String())
+    address_location_description = sa.Column(sa.String())
+
+    # Technology codes (the type of technology is resolved using the
+    # TechnologyCatalog, so changing a technology does not require
+    # refreshing the MeteringPoints with it)
+    tech_code = sa.Column(sa.String())
+    fuel_code = sa.Column(sa.String())
+
+    # Changes whenever any of the above changes (used for ETags)
+    version = sa.Column(
+        sa.BigInteger(),
+        meteringpoint_read_version,
+        server_default=meteringpoint_read_version.next_value(),
+        nullable=False,
+    )
+
+    @property
+    def address(self) -> Optional[Address]:
+        """
+        Returns the MeteringPoint's address, if it has any.
+        """
+        return self.build_address(self)
+
+    # -- Building from rows --------------------------------------------------
+
+    # The following accept either an instance of this class or a row
+    # selecting (at least) the same columns, which allows building
+    # MeteringPoints without hydrating ORM objects.
+
+    @staticmethod
+    def build_address(row: Any) -> Optional[Address]:
+        """
+        Builds the address of a MeteringPoint row, if it has any.
+        """
+        values = {f: getattr(row, f'address_{f}') for f in ADDRESS_FIELDS}
+
+        if any(v is not None for v in values.values()):
+            return Address(**values)
+
+    @staticmethod
+    def build_technology(
+            row: Any,
+            technologies: Dict[Tuple[str, str], TechnologyType],
+    ) -> Optional[Technology]:
+        """
+        Builds the technology of a MeteringPoint row, if its technology
+        codes are known technology.
+
+        :param row: The MeteringPoint row
+        :param technologies: Type of known technologies mapped by
+            (tech_code, fuel_code), see TechnologyCatalog
+        """
+        technology_type = technologies.get((row.tech_code, row.fuel_code))
+
+        if technology_type is not None:
+            return Technology(
+                tech_code=row.tech_code,
+                fuel_code=row.fuel_code,
+                type=technology_type,
+            )
+
+    @classmethod
+    def build_meteringpoint(
+            cls,
+            row: Any,
+            technologies: Dict[Tuple[str, str], TechnologyType],
+    ) -> MeteringPoint:
+        """
+        Builds a MeteringPoint from a MeteringPoint row.
+
+        :param row: The MeteringPoint row
+        :param technologies: Type of known technologies mapped by
+            (tech_code, fuel_code), see TechnologyCatalog
+        """
+        return MeteringPoint(
+            gsrn=row.gsrn,
+            type=row.type,
+            sector=row.sector,
+            technology=cls.build_technology(row, technologies),
+            address=cls.build_address(row),
+        )
+
+
+class DbSubjectGeneration(db.ModelBase):
+    """
+    Generation counter for a subject, which is incremented whenever any
+    MeteringPoint (or its data) accessible by the subject changes.
+    Used to invalidate data cached per subject.
+    """
+    __tablename__ = 'subject_generation'
+    __table_args__ = (
+        sa.PrimaryKeyConstraint('subject'),
+    )
+
+    subject = sa.Column(sa.String(), nullable=False)
+    generation = sa.Column(sa.Integer(), nullable=False, default=0)
+
+
+class DbAppliedOffset(db.ModelBase):
+    """
+    Offset of the last message applied by the consumer from a partition
+    of a Message Bus topic. Written within the same transaction as the
+    changes the message(s) resulted in, so messages redelivered after a
+    restart (or rebalance) can be skipped.
+    """
+    __tablename__ = 'applied_offset'
+    __table_args__ = (
+        sa.PrimaryKeyConstraint('topic', 'partition'),
+    )
+
+    topic = sa.Column(sa.String(), nullable=False)
+    partition = sa.Column(sa.Integer(), nullable=False)
+    offset = sa.Column(sa.BigInteger(), nullable=False)
@@ -0,0 +1,110 @@
+"""
+Notifications between the consumer and the API using PostgreSQL's
+LISTEN/NOTIFY. Notifications are sent within the consumer's transaction,
+so they are only delivered once (and if) the transaction commits.
+"""
+import select
+import logging
+from threading import Thread, Event
+from typing import Callable, Optional
+
+from sqlalchemy import func
+
+from .db import db
+
+
+# Channel notified with the subject whenever a subject's delegated
+# access to MeteringPoints changes
+ACCESS_CHANGED_CHANNEL = 'meteringpoints_access_changed'
+
+# Channel notified with the technology codes ("tech_code/fuel_code")
+# whenever a technology changes or is removed
+TECHNOLOGY_CHANGED_CHANNEL = 'meteringpoints_technology_changed'
+
+
+logger = logging.getLogger(__name__)
+
+
+def notify(session: db.Session, channel: str, payload):
+    """
+    Sends a notification on the channel within the session's transaction.
+
+    :param session: Database session
+    :param channel: Channel to notify
+    :param payload: Payload; either a string or a column expression
+    """
+    session.execute(func.pg_notify(channel, payload).select())
+
+
+class NotificationListener(Thread):
+    """
+    Listens for notifications on a channel in a background thread,
+    invoking a callback with the payload of each notification.
+
+    Notifications sent while not connected are lost, so on_connect
+    is invoked every time a (new) connection has been established,
+    allowing the owner to discard state that might be stale.
+    """
+
+    # Seconds to wait before reconnecting after a connection failure
+    RECONNECT_DELAY = 5
+
+    def __init__(
+            self,
+            channel: str,
+            on_notify: Callable[[str], None],
+            on_connect: Optional[Callable[[], None]] = None,
+    ):
+        super(NotificationListener, self).__init__(daemon=True)
+        self.channel = channel
+        self.on_notify = on_notify
+        self.on_connect = on_connect
+        self.connected = Event()
+        self.stopped = Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception('Listening on %s failed', self.channel)
+            finally:
+                self.connected.clear()
+
+            self.stopped.wait(self.RECONNECT_DELAY)
+
+    def stop(self):
+        self.stopped.set()
+
+    def _listen(self):
+        """
+        Listens for notifications until the connection fails
+        or the listener is stopped.
+        """
+        connection = db.engine.raw_connection()
+        connection.detach()
+
+        try:
+            dbapi_connection = connection.connection
+            dbapi_connection.autocommit = True
+
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute('LISTEN %s' % self.channel)
+
+            if self.on_connect is not None:
+                self.on_connect()
+
+            self.connected.set()
+
+            while not self.stopped.is_set():
+                if select.select([dbapi_connection], [], [], 1) == \
+                        ([], [], []):
+                    continue
+
+                dbapi_connection.poll()
+
+                while dbapi_connection.notifies:
+                    notification = dbapi_connection.notifies.pop(0)
+                    self.on_notify(notification.payload)
+        finally:
+            connection.close()
@@ -1,30 +1,122 @@
-from typing import List
-from sqlalchemy import orm, asc, desc, and_
+from typing import List, Dict, Tuple, Iterator, Optional, Sequence, Any
+from sqlalchemy import orm, asc, desc, and_, or_, tuple_, literal
+from sqlalchemy.sql.expression import Executable, ClauseElement
+from sqlalchemy.ext.compiler import compiles
 
 from energytt_platform.sql import SqlQuery
-from energytt_platform.models.meteringpoints import MeteringPointType
+from energytt_platform.models.common import Order
+from energytt_platform.models.tech import TechnologyType
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
 
+from .utils import chunks
 from .models import (
     MeteringPointFilters,
     MeteringPointOrdering,
     MeteringPointOrderingKeys,
+    MeteringPointCursor,
     DbMeteringPoint,
+    DbMeteringPointRead,
     DbMeteringPointTechnology,
     DbMeteringPointAddress,
     DbMeteringPointDelegate,
     DbTechnology,
+    DbSubjectGeneration,
+    DbAppliedOffset,
 )
 
 
+# Default number of rows fetched at a time when streaming results
+STREAM_CHUNK_SIZE = 1000
+
+
+# -- Helpers -----------------------------------------------------------------
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN statement, which returns the query plan (as JSON) for the
+    provided statement. The statement is only executed if analyze=True.
+    """
+    inherit_cache = False
+
+    def __init__(self, statement, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, 'postgresql')
+def _compile_explain(element: Explain, compiler, **kwargs) -> str:
+    if element.analyze:
+        options = 'ANALYZE, BUFFERS, FORMAT JSON'
+    else:
+        options = 'FORMAT JSON'
+
+    return 'EXPLAIN (%s) %s' % (
+        options,
+        compiler.process(element.statement, **kwargs),
+    )
+
+
+class StreamingQuery(SqlQuery):
+    """
+    SqlQuery which, in addition to all()/one_or_none(), can iterate large
+    results using a (named) server-side cursor, fetching a limited number
+    of rows at a time instead of loading the entire result into memory.
+
+    Results must be consumed within the session's transaction.
+    """
+
+    def stream(
+            self,
+            size: int = STREAM_CHUNK_SIZE,
+            columns: Optional[Sequence[Any]] = None,
+    ) -> Iterator[Any]:
+        """
+        Yields results one at a time, fetching "size" rows at a time.
+
+        If columns are provided, only these are selected, and lightweight
+        (named) row tuples are yielded instead of ORM entities, which are
+        neither hydrated nor added to the session's identity map.
+
+        :param size: Number of rows to fetch at a time
+        :param columns: Columns to select instead of the query's entities
+        """
+        q = self.q
+
+        if columns is not None:
+            q = q.with_entities(*columns)
+
+        yield from q \
+            .execution_options(stream_results=True) \
+            .yield_per(size)
+
+    def iter_chunks(
+            self,
+            size: int = STREAM_CHUNK_SIZE,
+            columns: Optional[Sequence[Any]] = None,
+    ) -> Iterator[List[Any]]:
+        """
+        Yields results in lists of at most "size" results each, fetching
+        one list at a time (see stream()).
+
+        :param size: Max. number of results per list
+        :param columns: Columns to select instead of the query's entities
+        """
+        return chunks(self.stream(size, columns), size)
+
+
 # -- MeteringPoints ----------------------------------------------------------
 
 
-class MeteringPointQuery(SqlQuery):
+class MeteringPointQuery(StreamingQuery):
     """
     Query DbMeteringPoint.
     """
+    model = DbMeteringPoint
+
     def _get_base_query(self) -> orm.Query:
-        return self.session.query(DbMeteringPoint)
+        return self.session.query(self.model)
 
     def apply_filters(
             self,
@@ -49,55 +141,154 @@ class MeteringPointQuery(SqlQuery):
             ordering: MeteringPointOrdering,
     ) -> 'MeteringPointQuery':
         """
-        Applies provided ordering.
+        Applies provided ordering. GSRN is used as tie-breaker, making the
+        ordering deterministic (which keyset pagination depends on).
         """
-        fields = {
-            MeteringPointOrderingKeys.gsrn: DbMeteringPoint.gsrn,
-            MeteringPointOrderingKeys.type: DbMeteringPoint.type,
-            MeteringPointOrderingKeys.sector: DbMeteringPoint.sector,
-        }
+        field = self._get_ordering_field(ordering)
 
         if ordering.asc:
-            return self.q.order_by(asc(fields[ordering.key]))
+            direction = asc
         elif ordering.desc:
-            return self.q.order_by(desc(fields[ordering.key]))
+            direction = desc
         else:
             raise RuntimeError('Should NOT have happened')
 
+        if field is self.model.gsrn:
+            order_by = (direction(field),)
+        else:
+            order_by = (direction(field), direction(self.model.gsrn))
+
+        return self.__class__(
+            session=self.session,
+            q=self.q.order_by(*order_by),
+        )
+
+    def apply_cursor(
+            self,
+            cursor: MeteringPointCursor,
+    ) -> 'MeteringPointQuery':
+        """
+        Filters query; only include MeteringPoints positioned after the
+        cursor, given that the query is ordered the same way as when the
+        cursor was created (using apply_ordering()).
+
+        PostgreSQL orders NULL values last when ordering ascending, and
+        first when ordering descending, which is taken into account.
+        """
+        field = self._get_ordering_field(MeteringPointOrdering(
+            key=cursor.key,
+            order=cursor.order,
+        ))
+
+        gsrn = self.model.gsrn
+        value = cursor.value
+
+        if cursor.key is MeteringPointOrderingKeys.type and value is not None:
+            value = MeteringPointType(value)
+
+        # Row-value comparison allows PostgreSQL to use a (key, gsrn) index
+        position = tuple_(
+            literal(value, field.type),
+            literal(cursor.gsrn, gsrn.type),
+        )
+
+        if field is gsrn:
+            if cursor.order is Order.asc:
+                return self.filter(gsrn > cursor.gsrn)
+            else:
+                return self.filter(gsrn < cursor.gsrn)
+
+        if cursor.order is Order.asc:
+            if value is None:
+                return self.filter(field.is_(None), gsrn > cursor.gsrn)
+            else:
+                return self.filter(or_(
+                    tuple_(field, gsrn) > position,
+                    field.is_(None),
+                ))
+        else:
+            if value is None:
+                return self.filter(or_(
+                    and_(field.is_(None), gsrn < cursor.gsrn),
+                    field.isnot(None),
+                ))
+            else:
+                return self.filter(tuple_(field, gsrn) < position)
+
+    def _get_ordering_field(self, ordering: MeteringPointOrdering):
+        """
+        Returns the column to order by for the provided ordering.
+        """
+        fields = {
+            MeteringPointOrderingKeys.gsrn: self.model.gsrn,
+            MeteringPointOrderingKeys.type: self.model.type,
+            MeteringPointOrderingKeys.sector: self.model.sector,
+        }
+
+        return fields[ordering.key or MeteringPointOrderingKeys.gsrn]
+
+    def offset(self, offset: int) -> 'MeteringPointQuery':
+        """
+        Skips the first "offset" results.
+        """
+        return self.__class__(session=self.session, q=self.q.offset(offset))
+
+    def limit(self, limit: int) -> 'MeteringPointQuery':
+        """
+        Limits the number of results.
+        """
+        return self.__class__(session=self.session, q=self.q.limit(limit))
+
     def has_gsrn(self, gsrn: str) -> 'MeteringPointQuery':
         """
         Filters query; only include MeteringPoint with the
         provided GSRN.
         """
-        return self.filter(DbMeteringPoint.gsrn == gsrn)
+        return self.filter(self.model.gsrn == gsrn)
 
     def has_any_gsrn(self, gsrn: List[str]) -> 'MeteringPointQuery':
         """
         Filters query; only include MeteringPoints with any of
         the provided GSRN.
         """
-        return self.filter(DbMeteringPoint.gsrn.in_(gsrn))
+        return self.filter(self.model.gsrn.in_(gsrn))
 
     def is_type(self, type: MeteringPointType) -> 'MeteringPointQuery':
         """
         Filters query; only include MeteringPoints with the
         provided type.
         """
-        return self.filter(DbMeteringPoint.type == type)
+        return self.filter(self.model.type == type)
 
     def in_sector(self, sector: str) -> 'MeteringPointQuery':
         """
         Filters query; only include MeteringPoints within the
         provided sector.
         """
-        return self.filter(DbMeteringPoint.sector == sector)
+        return self.filter(self.model.sector == sector)
 
     def in_any_sector(self, sector: List[str]) -> 'MeteringPointQuery':
         """
         Filters query; only include MeteringPoints within any
         of the provided sectors.
         """
-        return self.filter(DbMeteringPoint.sector.in_(sector))
+        return self.filter(self.model.sector.in_(sector))
+
+    def estimate_count(self) -> int:
+        """
+        Returns the query planner's estimate of the number of results,
+        which is significantly cheaper than count() for large results.
+        """
+        statement = self.q \
+            .with_entities(self.model.gsrn) \
+            .order_by(None) \
+            .statement
+
+        plan = self.session \
+            .execute(Explain(statement)) \
+            .scalar()
+
+        return int(plan[0]['Plan']['Plan Rows'])
 
     def is_accessible_by(self, subject: str) -> 'MeteringPointQuery':
         """
@@ -106,13 +297,71 @@ class MeteringPointQuery(SqlQuery):
         return self.__class__(
             session=self.session,
             q=self.q.join(DbMeteringPointDelegate, and_(
-                DbMeteringPointDelegate.gsrn == DbMeteringPoint.gsrn,
+                DbMeteringPointDelegate.gsrn == self.model.gsrn,
                 DbMeteringPointDelegate.subject == subject,
             )),
         )
 
 
-class MeteringPointAddressQuery(SqlQuery):
+class MeteringPointReadQuery(MeteringPointQuery):
+    """
+    Query DbMeteringPointRead; the denormalized representation of
+    MeteringPoints (including address and technology) which the API
+    reads from.
+    """
+    model = DbMeteringPointRead
+
+    def all_meteringpoints(
+            self,
+            technologies: Dict[Tuple[str, str], TechnologyType],
+    ) -> List[MeteringPoint]:
+        """
+        Returns all results as MeteringPoints, built directly from the
+        selected columns, which skips hydrating ORM objects and adding
+        them to the session's identity map.
+
+        :param technologies: Type of known technologies mapped by
+            (tech_code, fuel_code), see TechnologyCatalog
+        """
+        return [
+            self.model.build_meteringpoint(row, technologies)
+            for row in self.all_rows()
+        ]
+
+    def all_rows(self) -> List[Any]:
+        """
+        Returns all results as rows of the model's columns, in the order
+        of the model's columns.
+        """
+        return self.q \
+            .with_entities(*self.model.__table__.columns) \
+            .all()
+
+    def one_row_or_none(self) -> Optional[Any]:
+        """
+        Returns the single result (if any) as a row of the model's columns,
+        without building a MeteringPoint from it (see all_meteringpoints()).
+        """
+        return self.q \
+            .with_entities(*self.model.__table__.columns) \
+            .one_or_none()
+
+    def one_version_or_none(self) -> Optional[Any]:
+        """
+        Returns the version and technology codes (only) of the single
+        result (if any), which is enough to tell whether a client's copy
+        of the MeteringPoint is up-to-date.
+        """
+        return self.q \
+            .with_entities(
+                self.model.version,
+                self.model.tech_code,
+                self.model.fuel_code,
+            ) \
+            .one_or_none()
+
+
+class MeteringPointAddressQuery(StreamingQuery):
     """
     Query DbMeteringPointAddress.
     """
@@ -122,8 +371,11 @@ class MeteringPointAddressQuery(SqlQuery):
     def has_gsrn(self, gsrn: str) -> 'MeteringPointAddressQuery':
         return self.filter(DbMeteringPointAddress.gsrn == gsrn)
 
+    def has_any_gsrn(self, gsrn: List[str]) -> 'MeteringPointAddressQuery':
+        return self.filter(DbMeteringPointAddress.gsrn.in_(gsrn))
 
-class MeteringPointTechnologyQuery(SqlQuery):
+
+class MeteringPointTechnologyQuery(StreamingQuery):
     """
     Query DbMeteringPointTechnology.
     """
@@ -133,8 +385,11 @@ class MeteringPointTechnologyQuery(SqlQuery):
     def has_gsrn(self, gsrn: str) -> 'MeteringPointTechnologyQuery':
         return self.filter(DbMeteringPointTechnology.gsrn == gsrn)
 
+    def has_any_gsrn(self, gsrn: List[str]) -> 'MeteringPointTechnologyQuery':
+        return self.filter(DbMeteringPointTechnology.gsrn.in_(gsrn))
+
 
-class DelegateQuery(SqlQuery):
+class DelegateQuery(StreamingQuery):
     """
     Query MeteringPointDelegate.
     """
@@ -144,6 +399,9 @@ class DelegateQuery(SqlQuery):
     def has_gsrn(self, gsrn: str) -> 'DelegateQuery':
         return self.filter(DbMeteringPointDelegate.gsrn == gsrn)
 
+    def has_any_gsrn(self, gsrn: List[str]) -> 'DelegateQuery':
+        return self.filter(DbMeteringPointDelegate.gsrn.in_(gsrn))
+
     def has_subject(self, subject: str) -> 'DelegateQuery':
         return self.filter(DbMeteringPointDelegate.subject == subject)
 
@@ -151,7 +409,7 @@ class DelegateQuery(SqlQuery):
 # -- Technologies ------------------------------------------------------------
 
 
-class TechnologyQuery(SqlQuery):
+class TechnologyQuery(StreamingQuery):
     """
     Query Technology.
     """
@@ -163,3 +421,41 @@ class TechnologyQuery(SqlQuery):
 
     def has_fuel_code(self, fuel_code: str) -> 'TechnologyQuery':
         return self.filter(DbTechnology.fuel_code == fuel_code)
+
+
+# -- Subjects ----------------------------------------------------------------
+
+
+class SubjectGenerationQuery(StreamingQuery):
+    """
+    Query DbSubjectGeneration.
+    """
+    def _get_base_query(self) -> orm.Query:
+        return self.session.query(DbSubjectGeneration)
+
+    def has_subject(self, subject: str) -> 'SubjectGenerationQuery':
+        return self.filter(DbSubjectGeneration.subject == subject)
+
+
+# -- Applied offsets ---------------------------------------------------------
+
+
+class AppliedOffsetQuery(StreamingQuery):
+    """
+    Query DbAppliedOffset.
+    """
+    def _get_base_query(self) -> orm.Query:
+        return self.session.query(DbAppliedOffset)
+
+    def has_any_partition(
+            self,
+            partitions: List[Tuple[str, int]],
+    ) -> 'AppliedOffsetQuery':
+        """
+        Filters query; only include offsets of any of the provided
+        (topic, partition).
+        """
+        return self.filter(tuple_(
+            DbAppliedOffset.topic,
+            DbAppliedOffset.partition,
+        ).in_(partitions))
@@ -0,0 +1,18 @@
+from itertools import islice
+from typing import List, Iterable, Iterator, TypeVar
+
+
+T = TypeVar('T')
+
+
+def chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Splits items into lists of at most "size" items each.
+    """
+    iterator = iter(items)
+
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
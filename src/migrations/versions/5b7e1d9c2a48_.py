@@ -0,0 +1,66 @@
+"""Denormalized read model of MeteringPoints
+
+Revision ID: 5b7e1d9c2a48
+Revises: 8d4e2b6a90c3
+Create Date: 2026-10-17 14:02:51.730419
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e1d9c2a48'
+down_revision = '8d4e2b6a90c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('meteringpoint_read',
+    sa.Column('gsrn', sa.String(), nullable=False),
+    sa.Column('sector', sa.String(), nullable=True),
+    sa.Column('type', postgresql.ENUM('production', 'consumption', name='energydirection', create_type=False), nullable=True),
+    sa.Column('address_street_code', sa.String(), nullable=True),
+    sa.Column('address_street_name', sa.String(), nullable=True),
+    sa.Column('address_building_number', sa.String(), nullable=True),
+    sa.Column('address_floor_id', sa.String(), nullable=True),
+    sa.Column('address_room_id', sa.String(), nullable=True),
+    sa.Column('address_post_code', sa.String(), nullable=True),
+    sa.Column('address_city_name', sa.String(), nullable=True),
+    sa.Column('address_city_sub_division_name', sa.String(), nullable=True),
+    sa.Column('address_municipality_code', sa.String(), nullable=True),
+    sa.Column('address_location_description', sa.String(), nullable=True),
+    sa.Column('tech_code', sa.String(), nullable=True),
+    sa.Column('fuel_code', sa.String(), nullable=True),
+    sa.Column('technology_type', postgresql.ENUM('coal', 'nuclear', 'solar', 'wind', name='technologytype', create_type=False), nullable=True),
+    sa.PrimaryKeyConstraint('gsrn')
+    )
+
+    # Populate from the normalized tables before creating indexes
+    op.execute("""
+        INSERT INTO meteringpoint_read
+        SELECT
+            mp.gsrn, mp.sector, mp.type,
+            a.street_code, a.street_name, a.building_number, a.floor_id,
+            a.room_id, a.post_code, a.city_name, a.city_sub_division_name,
+            a.municipality_code, a.location_description,
+            t.tech_code, t.fuel_code, tech.type
+        FROM meteringpoint AS mp
+        LEFT JOIN meteringpoint_address AS a
+            ON a.gsrn = mp.gsrn
+        LEFT JOIN meteringpoint_technology AS t
+            ON t.gsrn = mp.gsrn
+        LEFT JOIN technology AS tech
+            ON tech.tech_code = t.tech_code AND tech.fuel_code = t.fuel_code
+    """)
+
+    op.create_index('ix_meteringpoint_read_type_gsrn', 'meteringpoint_read', ['type', 'gsrn'], unique=False, postgresql_include=['sector'])
+    op.create_index('ix_meteringpoint_read_sector_gsrn', 'meteringpoint_read', ['sector', 'gsrn'], unique=False, postgresql_include=['type'])
+
+
+def downgrade():
+    op.drop_index('ix_meteringpoint_read_sector_gsrn', table_name='meteringpoint_read')
+    op.drop_index('ix_meteringpoint_read_type_gsrn', table_name='meteringpoint_read')
+    op.drop_table('meteringpoint_read')
@@ -0,0 +1,37 @@
+"""Composite indexes for delegate lookups and filtering/ordering
+
+Revision ID: 8d4e2b6a90c3
+Revises: 3f1c9a7e5b21
+Create Date: 2026-10-17 11:40:08.502117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4e2b6a90c3'
+down_revision = '3f1c9a7e5b21'
+branch_labels = None
+depends_on = None
+
+
+# Indexes are created/dropped concurrently to avoid locking the tables
+# for writes, which can not be done within a transaction.
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_meteringpoint_delegate_subject_gsrn', 'meteringpoint_delegate', ['subject', 'gsrn'], unique=True, postgresql_concurrently=True)
+        op.create_index('ix_meteringpoint_type_gsrn', 'meteringpoint', ['type', 'gsrn'], unique=False, postgresql_include=['sector'], postgresql_concurrently=True)
+        op.create_index('ix_meteringpoint_sector_gsrn', 'meteringpoint', ['sector', 'gsrn'], unique=False, postgresql_include=['type'], postgresql_concurrently=True)
+        op.drop_index('ix_meteringpoint_type', table_name='meteringpoint', postgresql_concurrently=True)
+        op.drop_index('ix_meteringpoint_sector', table_name='meteringpoint', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_meteringpoint_sector', 'meteringpoint', ['sector'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_meteringpoint_type', 'meteringpoint', ['type'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_meteringpoint_sector_gsrn', table_name='meteringpoint', postgresql_concurrently=True)
+        op.drop_index('ix_meteringpoint_type_gsrn', table_name='meteringpoint', postgresql_concurrently=True)
+        op.drop_index('ix_meteringpoint_delegate_subject_gsrn', table_name='meteringpoint_delegate', postgresql_concurrently=True)
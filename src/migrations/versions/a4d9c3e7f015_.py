@@ -0,0 +1,28 @@
+"""Version of MeteringPoints in the read model
+
+Revision ID: a4d9c3e7f015
+Revises: e8b3f6c1a7d2
+Create Date: 2026-10-17 19:12:07.418236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d9c3e7f015'
+down_revision = 'e8b3f6c1a7d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(sa.schema.CreateSequence(
+        sa.Sequence('meteringpoint_read_version_seq')))
+    op.add_column('meteringpoint_read', sa.Column('version', sa.BigInteger(), server_default=sa.text("nextval('meteringpoint_read_version_seq'::regclass)"), nullable=False))
+
+
+def downgrade():
+    op.drop_column('meteringpoint_read', 'version')
+    op.execute(sa.schema.DropSequence(
+        sa.Sequence('meteringpoint_read_version_seq')))
@@ -0,0 +1,29 @@
+"""Offsets of applied Message Bus messages
+
+Revision ID: c2f7a1d4e9b3
+Revises: 5b7e1d9c2a48
+Create Date: 2026-10-17 16:21:07.342815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7a1d4e9b3'
+down_revision = '5b7e1d9c2a48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('applied_offset',
+    sa.Column('topic', sa.String(), nullable=False),
+    sa.Column('partition', sa.Integer(), nullable=False),
+    sa.Column('offset', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('topic', 'partition')
+    )
+
+
+def downgrade():
+    op.drop_table('applied_offset')
@@ -0,0 +1,32 @@
+"""Resolve technology type of the read model using the technology catalog
+
+Revision ID: e8b3f6c1a7d2
+Revises: c2f7a1d4e9b3
+Create Date: 2026-10-17 17:48:33.905164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3f6c1a7d2'
+down_revision = 'c2f7a1d4e9b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_column('meteringpoint_read', 'technology_type')
+
+
+def downgrade():
+    op.add_column('meteringpoint_read', sa.Column('technology_type', postgresql.ENUM('coal', 'nuclear', 'solar', 'wind', name='technologytype', create_type=False), nullable=True))
+
+    op.execute("""
+        UPDATE meteringpoint_read AS r
+        SET technology_type = tech.type
+        FROM technology AS tech
+        WHERE tech.tech_code = r.tech_code AND tech.fuel_code = r.fuel_code
+    """)
@@ -3,6 +3,7 @@ conftest.py according to pytest docs:
 https://docs.pytest.org/en/2.7.3/plugins.html?highlight=re#conftest-py-plugins
 """
 import pytest
+from uuid import uuid4
 from unittest.mock import patch
 from flask.testing import FlaskClient
 from datetime import datetime, timedelta, timezone
@@ -53,7 +54,13 @@ def token_encoder() -> TokenEncoder[InternalToken]:
 
 @pytest.fixture(scope='function')
 def token_subject() -> str:
-    yield 'bar'
+    """
+    The app (and thus its caches) lives across tests, while the database
+    does not, and subjects' generations are not unique across databases,
+    so use a unique subject for each test to avoid hitting totals,
+    responses and ETags of previous tests.
+    """
+    yield str(uuid4())
 
 
 @pytest.fixture(scope='function')
@@ -0,0 +1,18 @@
+from energytt_platform.bus import messages as m
+from energytt_platform.models.delegates import MeteringPointDelegate
+from energytt_platform.models.meteringpoints import MeteringPoint
+
+from meteringpoints_consumer.handlers import dispatcher
+
+
+def add_meteringpoint(gsrn: str, subject: str):
+    """
+    Adds a MeteringPoint and delegates access to it to the subject.
+    """
+    dispatcher(m.MeteringPointUpdate(
+        meteringpoint=MeteringPoint(gsrn=gsrn),
+    ))
+
+    dispatcher(m.MeteringPointDelegateGranted(
+        delegate=MeteringPointDelegate(subject=subject, gsrn=gsrn),
+    ))
@@ -0,0 +1,161 @@
+import json
+import pytest
+import asyncio
+from urllib.parse import urlencode
+from flask.testing import FlaskClient
+from typing import Dict, Any, Optional, Tuple
+
+from energytt_platform.bus import messages as m
+from energytt_platform.models.common import Address
+from energytt_platform.models.delegates import MeteringPointDelegate
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
+
+from meteringpoints_api.asgi import create_app, get_async_uri
+from meteringpoints_consumer.handlers import dispatcher
+from meteringpoints_shared.db import db
+
+
+@pytest.fixture(scope='function')
+def seeded_session(session: db.Session, token_subject: str) -> db.Session:
+    """
+    Seeds MeteringPoints gsrn0..gsrn2 delegated to the token subject.
+    """
+    for i in range(3):
+        dispatcher(m.MeteringPointUpdate(meteringpoint=MeteringPoint(
+            gsrn=f'gsrn{i}',
+            type=MeteringPointType.production,
+            sector='DK1',
+            address=Address(city_name=f'city{i}'),
+        )))
+
+        dispatcher(m.MeteringPointDelegateGranted(
+            delegate=MeteringPointDelegate(
+                subject=token_subject,
+                gsrn=f'gsrn{i}',
+            ),
+        ))
+
+    yield session
+
+
+def asgi_request(
+        method: str,
+        path: str,
+        token: Optional[str] = None,
+        query: Optional[Dict[str, str]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+) -> Tuple[int, bytes]:
+    """
+    Invokes a new instance of the ASGI application once, and returns
+    the response status and body.
+    """
+    async def invoke():
+        app = create_app()
+        body = json.dumps(json_body).encode() if json_body else b''
+        messages = []
+
+        headers = []
+        if token is not None:
+            headers.append((b'authorization', f'Bearer: {token}'.encode()))
+
+        async def receive():
+            return {'type': 'http.request', 'body': body}
+
+        async def send(message):
+            messages.append(message)
+
+        await app({
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': urlencode(query or {}).encode(),
+            'headers': headers,
+        }, receive, send)
+
+        await app.engine.dispose()
+
+        return messages[0]['status'], messages[1]['body']
+
+    return asyncio.run(invoke())
+
+
+class TestAsgiApplication:
+
+    def test__get_async_uri__should_use_asyncpg_driver(self):
+        assert get_async_uri('postgresql://u:p@host/db') \
+            == 'postgresql+asyncpg://u:p@host/db'
+        assert get_async_uri('postgresql+psycopg2://u:p@host/db') \
+            == 'postgresql+asyncpg://u:p@host/db'
+
+    @pytest.mark.parametrize('method, path, query, json_body', (
+        ('POST', '/list', None, None),
+        ('POST', '/list', None, {'limit': 2, 'ordering': {'key': 'gsrn', 'order': 'desc'}}),  # noqa: E501
+        ('POST', '/list', None, {'filters': {'gsrn': ['gsrn1']}}),
+        ('GET', '/details', {'gsrn': 'gsrn1'}, None),
+        ('GET', '/details', {'gsrn': 'Foo'}, None),
+        ('POST', '/details/batch', None, {'gsrn': ['gsrn0', 'gsrn2']}),
+    ))
+    def test__invoke_endpoint__should_return_same_response_as_wsgi_application(  # noqa: E501
+            self,
+            method: str,
+            path: str,
+            query: Optional[Dict[str, str]],
+            json_body: Optional[Dict[str, Any]],
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        expected = client.open(
+            method=method,
+            path=path,
+            query_string=query,
+            json=json_body,
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+        )
+
+        # -- Act -------------------------------------------------------------
+
+        status, body = asgi_request(
+            method=method,
+            path=path,
+            token=valid_token_encoded,
+            query=query,
+            json_body=json_body,
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert status == expected.status_code == 200
+        assert json.loads(body) == expected.json
+
+    def test__invoke_endpoint_without_token__should_return_status_401(
+            self,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        status, _ = asgi_request(method='POST', path='/list')
+
+        # -- Assert ----------------------------------------------------------
+
+        assert status == 401
+
+    def test__invoke_unknown_path__should_return_status_404(
+            self,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        status, _ = asgi_request(method='GET', path='/foo')
+
+        # -- Assert ----------------------------------------------------------
+
+        assert status == 404
@@ -0,0 +1,131 @@
+import gzip
+import json
+import pytest
+from flask.testing import FlaskClient
+
+from energytt_platform.bus import messages as m
+from energytt_platform.models.common import Address
+from energytt_platform.models.delegates import MeteringPointDelegate
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
+
+from meteringpoints_consumer.handlers import dispatcher
+from meteringpoints_shared.db import db
+
+
+@pytest.fixture(scope='function')
+def seeded_session(session: db.Session, token_subject: str) -> db.Session:
+    """
+    Seeds the database with 25 MeteringPoints delegated to the token
+    subject, so that listing them exceeds the compression threshold.
+    """
+    for i in range(25):
+        dispatcher(m.MeteringPointUpdate(
+            meteringpoint=MeteringPoint(
+                gsrn=f'gsrn{i:02d}',
+                type=MeteringPointType.production,
+                sector='DK1',
+                address=Address(city_name=f'city{i}'),
+            ),
+        ))
+
+        dispatcher(m.MeteringPointDelegateGranted(
+            delegate=MeteringPointDelegate(
+                subject=token_subject,
+                gsrn=f'gsrn{i:02d}',
+            ),
+        ))
+
+    yield session
+
+
+class TestCompression:
+
+    def test__accept_gzip__should_return_same_response_compressed_with_weak_etag(  # noqa: E501
+            self,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        r_plain = client.post(
+            path='/list',
+            json={'limit': 25},
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+        )
+
+        r_gzip = client.post(
+            path='/list',
+            json={'limit': 25},
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'Accept-Encoding': 'gzip',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r_plain.status_code == 200
+        assert 'Content-Encoding' not in r_plain.headers
+        assert len(r_plain.data) >= 1024
+
+        assert r_gzip.status_code == 200
+        assert r_gzip.headers['Content-Encoding'] == 'gzip'
+        assert r_gzip.headers['Vary'] == 'Accept, Accept-Encoding'
+        assert r_gzip.headers['ETag'] == f'W/{r_plain.headers["ETag"]}'
+        assert len(r_gzip.data) < len(r_plain.data)
+        assert gzip.decompress(r_gzip.data) == r_plain.data
+
+    def test__response_smaller_than_threshold__should_not_compress(
+            self,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.get(
+            path='/details?gsrn=gsrn01',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'Accept-Encoding': 'gzip',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert 'Content-Encoding' not in r.headers
+        assert r.json['meteringpoint']['gsrn'] == 'gsrn01'
+
+    def test__export_accept_gzip__should_return_streamed_response_compressed(  # noqa: E501
+            self,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/export',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'Accept-Encoding': 'gzip',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        lines = gzip.decompress(r.data).splitlines()
+
+        assert r.status_code == 200
+        assert r.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in r.headers
+        assert [json.loads(line)['gsrn'] for line in lines] == \
+            [f'gsrn{i:02d}' for i in range(25)]
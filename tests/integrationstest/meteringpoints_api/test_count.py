@@ -0,0 +1,157 @@
+import pytest
+from flask.testing import FlaskClient
+
+from energytt_platform.bus import messages as m
+from energytt_platform.models.delegates import MeteringPointDelegate
+
+from meteringpoints_consumer.handlers import dispatcher
+from meteringpoints_shared.db import db
+
+from tests.helpers import add_meteringpoint
+
+
+class TestGetMeteringPointListCount:
+
+    @pytest.mark.parametrize('count', (None, 'exact', 'cached'))
+    def test__count_exact_or_cached__should_return_exact_total(
+            self,
+            count: str,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        for i in range(5):
+            add_meteringpoint(gsrn=f'gsrn{i}', subject=token_subject)
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+            json={
+                'limit': 2,
+                'count': count,
+            } if count else {
+                'limit': 2,
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert r.json['success'] is True
+        assert r.json['total'] == 5
+        assert len(r.json['meteringpoints']) == 2
+
+    def test__count_none__should_not_return_total(
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+            json={
+                'count': 'none',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert r.json['success'] is True
+        assert r.json.get('total') is None
+        assert len(r.json['meteringpoints']) == 1
+
+    def test__count_estimate__should_return_estimated_total(
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+            json={
+                'count': 'estimate',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert r.json['success'] is True
+        assert isinstance(r.json['total'], int)
+        assert r.json['total'] >= 0
+
+    def test__count_cached__meteringpoints_change__should_invalidate_cached_total(  # noqa: E501
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        def get_total() -> int:
+            r = client.post(
+                path='/list',
+                headers={
+                    'Authorization': f'Bearer: {valid_token_encoded}',
+                },
+                json={
+                    'count': 'cached',
+                },
+            )
+            assert r.status_code == 200
+            return r.json['total']
+
+        # -- Act & Assert ----------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+        add_meteringpoint(gsrn='gsrn2', subject=token_subject)
+
+        assert get_total() == 2
+
+        add_meteringpoint(gsrn='gsrn3', subject=token_subject)
+
+        assert get_total() == 3
+
+        dispatcher(m.MeteringPointRemoved(gsrn='gsrn1'))
+
+        assert get_total() == 2
+
+        dispatcher(m.MeteringPointDelegateRevoked(
+            delegate=MeteringPointDelegate(
+                subject=token_subject,
+                gsrn='gsrn2',
+            ),
+        ))
+
+        assert get_total() == 1
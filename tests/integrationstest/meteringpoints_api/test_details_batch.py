@@ -0,0 +1,122 @@
+import pytest
+from typing import List
+from flask.testing import FlaskClient
+
+from energytt_platform.serialize import simple_serializer
+from energytt_platform.models.common import Address
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
+
+from meteringpoints_shared.db import db
+from meteringpoints_shared.controller import controller
+from meteringpoints_shared.models import (
+    DbMeteringPoint,
+    DbMeteringPointAddress,
+    DbMeteringPointDelegate,
+)
+
+
+@pytest.fixture(scope='function')
+def seeded_session(
+        session: db.Session,
+        token_subject: str,
+) -> db.Session:
+    """
+    Seeds the database with MeteringPoints gsrn0..gsrn4, of which only
+    gsrn0..gsrn2 are delegated to the token subject.
+    """
+    session.begin()
+
+    for i in range(5):
+        session.add(DbMeteringPoint(
+            gsrn=f'gsrn{i}',
+            type=MeteringPointType.production,
+            sector='DK1',
+        ))
+
+        session.add(DbMeteringPointAddress(
+            gsrn=f'gsrn{i}',
+            city_name=f'city{i}',
+        ))
+
+        if i < 3:
+            session.add(DbMeteringPointDelegate(
+                gsrn=f'gsrn{i}',
+                subject=token_subject,
+            ))
+
+    # The API reads from the denormalized read model
+    controller.rebuild_meteringpoint_read(session)
+
+    session.commit()
+
+    yield session
+
+
+class TestGetMeteringPointDetailsBatch:
+
+    @pytest.mark.parametrize('gsrn, expected_gsrn', (
+        ([], []),
+        (['gsrn0'], ['gsrn0']),
+        (['gsrn0', 'gsrn1', 'gsrn2'], ['gsrn0', 'gsrn1', 'gsrn2']),
+        (['gsrn0', 'gsrn0'], ['gsrn0']),
+        (['gsrn2', 'gsrn3', 'gsrn4', 'Foo'], ['gsrn2']),
+        (['gsrn3', 'gsrn4'], []),
+    ))
+    def test__request_many_gsrn__should_return_accessible_meteringpoints_mapped_by_gsrn(  # noqa: E501
+            self,
+            gsrn: List[str],
+            expected_gsrn: List[str],
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/details/batch',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+            json={
+                'gsrn': gsrn,
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert r.json['success'] is True
+        assert r.json['meteringpoints'] == {
+            g: simple_serializer.serialize(MeteringPoint(
+                gsrn=g,
+                type=MeteringPointType.production,
+                sector='DK1',
+                address=Address(city_name=f'city{g[-1]}'),
+            ))
+            for g in expected_gsrn
+        }
+
+    def test__request_too_many_gsrn__should_return_status_400(
+            self,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/details/batch',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+            json={
+                'gsrn': [f'gsrn{i}' for i in range(100000)],
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 400
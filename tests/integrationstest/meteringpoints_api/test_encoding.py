@@ -0,0 +1,86 @@
+import pytest
+from flask.testing import FlaskClient
+
+from energytt_platform.bus import messages as m
+from energytt_platform.models.common import Address
+from energytt_platform.models.delegates import MeteringPointDelegate
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
+
+from meteringpoints_consumer.handlers import dispatcher
+from meteringpoints_shared.db import db
+
+
+msgpack = pytest.importorskip('msgpack')
+
+
+@pytest.fixture(scope='function')
+def seeded_session(session: db.Session, token_subject: str) -> db.Session:
+    """
+    Seeds the database with a MeteringPoint delegated to the token subject.
+    """
+    dispatcher(m.MeteringPointUpdate(
+        meteringpoint=MeteringPoint(
+            gsrn='gsrn1',
+            type=MeteringPointType.production,
+            sector='DK1',
+            address=Address(city_name='city1'),
+        ),
+    ))
+
+    dispatcher(m.MeteringPointDelegateGranted(
+        delegate=MeteringPointDelegate(subject=token_subject, gsrn='gsrn1'),
+    ))
+
+    yield session
+
+
+class TestMessagePackEncoding:
+
+    @pytest.mark.parametrize('method, path, json', (
+        ('GET', '/details?gsrn=gsrn1', None),
+        ('POST', '/list', {}),
+    ))
+    def test__accept_msgpack__should_return_same_response_encoded_as_msgpack(  # noqa: E501
+            self,
+            method: str,
+            path: str,
+            json: dict,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        r_json = client.open(
+            method=method,
+            path=path,
+            json=json,
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+        )
+
+        r_msgpack = client.open(
+            method=method,
+            path=path,
+            json=json,
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'Accept': 'application/msgpack',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r_json.status_code == 200
+        assert r_json.headers['Content-Type'] == 'application/json'
+        assert r_json.headers['Vary'] == 'Accept, Accept-Encoding'
+
+        assert r_msgpack.status_code == 200
+        assert r_msgpack.headers['Content-Type'] == 'application/msgpack'
+        assert r_msgpack.headers['Vary'] == 'Accept, Accept-Encoding'
+        assert r_msgpack.headers['ETag'] != r_json.headers['ETag']
+
+        assert msgpack.unpackb(r_msgpack.data) == r_json.json
@@ -0,0 +1,221 @@
+from flask.testing import FlaskClient
+
+from energytt_platform.bus import messages as m
+from energytt_platform.models.common import Address
+
+from meteringpoints_consumer.handlers import dispatcher
+from meteringpoints_shared.db import db
+
+from tests.helpers import add_meteringpoint
+
+
+class TestGetMeteringPointDetailsETag:
+
+    def test__if_none_match_current_etag__should_return_status_304(
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        r1 = client.get(
+            path='/details?gsrn=gsrn1',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+        )
+
+        # -- Act -------------------------------------------------------------
+
+        r2 = client.get(
+            path='/details?gsrn=gsrn1',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'If-None-Match': r1.headers['ETag'],
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r1.status_code == 200
+        assert r1.json['success'] is True
+
+        assert r2.status_code == 304
+        assert r2.headers['ETag'] == r1.headers['ETag']
+        assert not r2.data
+
+    def test__if_none_match_etag_before_meteringpoint_changed__should_return_status_200_with_new_etag(  # noqa: E501
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        r1 = client.get(
+            path='/details?gsrn=gsrn1',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+        )
+
+        dispatcher(m.MeteringPointAddressUpdate(
+            gsrn='gsrn1',
+            address=Address(city_name='city1'),
+        ))
+
+        # -- Act -------------------------------------------------------------
+
+        r2 = client.get(
+            path='/details?gsrn=gsrn1',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'If-None-Match': r1.headers['ETag'],
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r2.status_code == 200
+        assert r2.headers['ETag'] != r1.headers['ETag']
+        assert r2.json['meteringpoint']['address']['city_name'] == 'city1'
+
+    def test__meteringpoint_not_accessible__should_not_return_etag(
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject='another-subject')
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.get(
+            path='/details?gsrn=gsrn1',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'If-None-Match': '*',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert r.json['success'] is False
+        assert 'ETag' not in r.headers
+
+
+class TestGetMeteringPointListETag:
+
+    def test__if_none_match_current_etag__should_return_status_304(
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        r1 = client.post(
+            path='/list',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+            json={'limit': 10},
+        )
+
+        # -- Act -------------------------------------------------------------
+
+        r2 = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'If-None-Match': f'W/{r1.headers["ETag"]}',
+            },
+            json={'limit': 10},
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r1.status_code == 200
+        assert r2.status_code == 304
+        assert not r2.data
+
+    def test__if_none_match_etag_of_another_request__should_return_status_200(  # noqa: E501
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        r1 = client.post(
+            path='/list',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+            json={'limit': 10},
+        )
+
+        # -- Act -------------------------------------------------------------
+
+        r2 = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'If-None-Match': r1.headers['ETag'],
+            },
+            json={'limit': 20},
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r2.status_code == 200
+        assert r2.headers['ETag'] != r1.headers['ETag']
+
+    def test__if_none_match_etag_before_subjects_data_changed__should_return_status_200(  # noqa: E501
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        r1 = client.post(
+            path='/list',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+            json={'limit': 10},
+        )
+
+        add_meteringpoint(gsrn='gsrn2', subject=token_subject)
+
+        # -- Act -------------------------------------------------------------
+
+        r2 = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+                'If-None-Match': r1.headers['ETag'],
+            },
+            json={'limit': 10},
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r2.status_code == 200
+        assert len(r2.json['meteringpoints']) == 2
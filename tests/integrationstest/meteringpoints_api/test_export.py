@@ -0,0 +1,150 @@
+import csv
+import json
+import pytest
+from flask.testing import FlaskClient
+
+from energytt_platform.serialize import simple_serializer
+from energytt_platform.models.common import Address
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
+
+from meteringpoints_api.endpoints import ExportMeteringPoints
+from meteringpoints_shared.db import db
+from meteringpoints_shared.controller import controller
+from meteringpoints_shared.models import (
+    DbMeteringPoint,
+    DbMeteringPointAddress,
+    DbMeteringPointDelegate,
+)
+
+
+@pytest.fixture(scope='function')
+def seeded_session(
+        session: db.Session,
+        token_subject: str,
+) -> db.Session:
+    """
+    Seeds the database with MeteringPoints gsrn00..gsrn24, of which only
+    those with an even number are delegated to the token subject.
+    """
+    session.begin()
+
+    for i in range(25):
+        session.add(DbMeteringPoint(
+            gsrn=f'gsrn{i:02d}',
+            type=MeteringPointType.production,
+            sector='DK1' if i < 10 else 'DK2',
+        ))
+
+        session.add(DbMeteringPointAddress(
+            gsrn=f'gsrn{i:02d}',
+            city_name=f'city{i}',
+        ))
+
+        if i % 2 == 0:
+            session.add(DbMeteringPointDelegate(
+                gsrn=f'gsrn{i:02d}',
+                subject=token_subject,
+            ))
+
+    # The API reads from the denormalized read model
+    controller.rebuild_meteringpoint_read(session)
+
+    session.commit()
+
+    yield session
+
+
+def expected_meteringpoint(i: int) -> MeteringPoint:
+    return MeteringPoint(
+        gsrn=f'gsrn{i:02d}',
+        type=MeteringPointType.production,
+        sector='DK1' if i < 10 else 'DK2',
+        address=Address(city_name=f'city{i}'),
+    )
+
+
+class TestExportMeteringPoints:
+
+    def test__export_ndjson__should_return_all_accessible_meteringpoints_one_per_line(  # noqa: E501
+            self,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/export',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert r.mimetype == 'application/x-ndjson'
+        assert [json.loads(line) for line in r.data.splitlines()] == [
+            simple_serializer.serialize(expected_meteringpoint(i))
+            for i in range(0, 25, 2)
+        ]
+
+    def test__export_csv_with_filters__should_return_header_and_filtered_meteringpoints(  # noqa: E501
+            self,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/export',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+            json={
+                'format': 'csv',
+                'filters': {'sector': ['DK1']},
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        rows = list(csv.DictReader(r.data.decode('utf8').splitlines()))
+
+        assert r.status_code == 200
+        assert r.mimetype == 'text/csv'
+        assert [row['gsrn'] for row in rows] == \
+            [f'gsrn{i:02d}' for i in range(0, 10, 2)]
+        assert rows[0]['type'] == 'production'
+        assert rows[0]['sector'] == 'DK1'
+        assert rows[0]['address_city_name'] == 'city0'
+        assert rows[0]['tech_code'] == ''
+
+    @pytest.mark.parametrize('chunk_size', (1, 3, 13, 100))
+    def test__export_in_chunks__should_return_all_meteringpoints_regardless_of_chunk_size(  # noqa: E501
+            self,
+            chunk_size: int,
+            token_subject: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        uut = ExportMeteringPoints(chunk_size=chunk_size)
+
+        # -- Act -------------------------------------------------------------
+
+        chunks = list(uut._export_ndjson(token_subject, None))
+
+        # -- Assert ----------------------------------------------------------
+
+        assert len(chunks) == -(-13 // chunk_size)
+        assert [
+            json.loads(line)['gsrn']
+            for chunk in chunks
+            for line in chunk.splitlines()
+        ] == [f'gsrn{i:02d}' for i in range(0, 25, 2)]
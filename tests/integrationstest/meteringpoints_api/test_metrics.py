@@ -0,0 +1,38 @@
+from flask.testing import FlaskClient
+
+from meteringpoints_shared.db import db
+
+
+class TestMetrics:
+
+    def test__invoke_endpoint__should_expose_request_metrics(
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+        )
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.get('/metrics')
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert r.mimetype == 'text/plain'
+
+        metrics = r.data.decode()
+
+        assert 'meteringpoints_request_latency_seconds_count{endpoint="/list",method="POST",status="200"}' in metrics  # noqa: E501
+        assert 'meteringpoints_request_db_queries_count{endpoint="/list"}' in metrics  # noqa: E501
+        assert 'meteringpoints_request_section_latency_seconds_count{handler="GetMeteringPointList",section="count"}' in metrics  # noqa: E501
+        assert 'endpoint="/metrics"' not in metrics
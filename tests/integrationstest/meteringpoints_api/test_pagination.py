@@ -0,0 +1,220 @@
+import pytest
+from typing import List, Dict, Any, Optional
+from flask.testing import FlaskClient
+
+from energytt_platform.models.meteringpoints import MeteringPointType
+
+from meteringpoints_shared.db import db
+from meteringpoints_shared.controller import controller
+from meteringpoints_shared.models import (
+    DbMeteringPoint,
+    DbMeteringPointDelegate,
+)
+
+
+TYPES = (MeteringPointType.consumption, MeteringPointType.production, None)
+SECTORS = ('DK1', 'DK2', None)
+
+
+@pytest.fixture(scope='function')
+def seeded_session(
+        session: db.Session,
+        token_subject: str,
+) -> db.Session:
+    """
+    Seeds the database with MeteringPoints (including some with NULL
+    type and sector) delegated to the token subject.
+    """
+    session.begin()
+
+    for i in range(11):
+        session.add(DbMeteringPoint(
+            gsrn=f'gsrn{i:02d}',
+            type=TYPES[i % len(TYPES)],
+            sector=SECTORS[(i // 2) % len(SECTORS)],
+        ))
+
+        session.add(DbMeteringPointDelegate(
+            gsrn=f'gsrn{i:02d}',
+            subject=token_subject,
+        ))
+
+    # The API reads from the denormalized read model
+    controller.rebuild_meteringpoint_read(session)
+
+    session.commit()
+
+    yield session
+
+
+def list_meteringpoints(
+        client: FlaskClient,
+        token: str,
+        **json: Any,
+) -> Dict[str, Any]:
+    """
+    Invokes POST /list and returns the response JSON.
+    """
+    r = client.post(
+        path='/list',
+        headers={
+            'Authorization': f'Bearer: {token}',
+        },
+        json=json,
+    )
+
+    assert r.status_code == 200
+    assert r.json['success'] is True
+
+    return r.json
+
+
+class TestGetMeteringPointListCursor:
+
+    @pytest.mark.parametrize('ordering', (
+        None,
+        {'key': 'gsrn', 'order': 'asc'},
+        {'key': 'gsrn', 'order': 'desc'},
+        {'key': 'type', 'order': 'asc'},
+        {'key': 'type', 'order': 'desc'},
+        {'key': 'sector', 'order': 'asc'},
+        {'key': 'sector', 'order': 'desc'},
+    ))
+    @pytest.mark.parametrize('limit', (1, 3, 11))
+    def test__page_through_meteringpoints_using_cursor__should_return_same_meteringpoints_as_offset(  # noqa: E501
+            self,
+            ordering: Optional[Dict[str, str]],
+            limit: int,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        expected = list_meteringpoints(
+            client=client,
+            token=valid_token_encoded,
+            limit=100,
+            ordering=ordering,
+        )
+
+        # -- Act -------------------------------------------------------------
+
+        returned_gsrn: List[str] = []
+        cursor = None
+
+        while True:
+            r = list_meteringpoints(
+                client=client,
+                token=valid_token_encoded,
+                limit=limit,
+                ordering=ordering,
+                cursor=cursor,
+            )
+
+            returned_gsrn.extend(mp['gsrn'] for mp in r['meteringpoints'])
+            cursor = r.get('next_cursor')
+
+            if cursor is None:
+                break
+
+        # -- Assert ----------------------------------------------------------
+
+        assert expected['total'] == 11
+        assert returned_gsrn == [mp['gsrn'] for mp in expected['meteringpoints']]  # noqa: E501
+
+    @pytest.mark.parametrize('limit, expected_page_sizes', (
+        (3, [3, 3, 3, 2]),
+        (10, [10, 1]),
+        (11, [11]),
+        (12, [11]),
+    ))
+    def test__page_through_meteringpoints_using_cursor__should_only_return_next_cursor_if_there_are_more_meteringpoints(  # noqa: E501
+            self,
+            limit: int,
+            expected_page_sizes: List[int],
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        pages: List[Dict[str, Any]] = []
+        cursor = None
+
+        while True:
+            r = list_meteringpoints(
+                client=client,
+                token=valid_token_encoded,
+                limit=limit,
+                cursor=cursor,
+            )
+
+            pages.append(r)
+            cursor = r.get('next_cursor')
+
+            if cursor is None:
+                break
+
+        # -- Assert ----------------------------------------------------------
+
+        assert [len(p['meteringpoints']) for p in pages] == expected_page_sizes
+
+    def test__provide_invalid_cursor__should_return_status_400(
+            self,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+            json={
+                'cursor': 'FooBar',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 400
+
+    def test__provide_cursor_with_different_ordering__should_return_status_400(  # noqa: E501
+            self,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            seeded_session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        first_page = list_meteringpoints(
+            client=client,
+            token=valid_token_encoded,
+            limit=2,
+            ordering={'key': 'sector', 'order': 'asc'},
+        )
+
+        # -- Act -------------------------------------------------------------
+
+        r = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+            json={
+                'limit': 2,
+                'ordering': {'key': 'type', 'order': 'asc'},
+                'cursor': first_page['next_cursor'],
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 400
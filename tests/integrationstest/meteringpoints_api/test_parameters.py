@@ -7,6 +7,7 @@ from energytt_platform.models.meteringpoints import \
     MeteringPoint, MeteringPointType
 
 from meteringpoints_shared.db import db
+from meteringpoints_shared.controller import controller
 from meteringpoints_shared.models import (
     DbMeteringPoint,
     DbMeteringPointDelegate,
@@ -66,6 +67,9 @@ def seeded_session(
             subject=token_subject,
         ))
 
+    # The API reads from the denormalized read model
+    controller.rebuild_meteringpoint_read(session)
+
     session.commit()
 
     yield session
@@ -150,6 +154,7 @@ class TestGetMeteringPointList:
             'success': True,
             'total': 0,
             'meteringpoints': [],
+            'next_cursor': None,
         }
 
     # -- Filter by Type ------------------------------------------------------
@@ -293,6 +298,7 @@ class TestGetMeteringPointList:
             'success': True,
             'total': 0,
             'meteringpoints': [],
+            'next_cursor': None,
         }
 
     # -- Offset --------------------------------------------------------------
@@ -0,0 +1,125 @@
+import pytest
+from flask.testing import FlaskClient
+
+from meteringpoints_api.app import create_app
+from meteringpoints_shared.db import db
+from meteringpoints_shared.cache import LRUCache
+
+from tests.helpers import add_meteringpoint
+
+
+@pytest.fixture(scope='function')
+def response_cache() -> LRUCache[str, bytes]:
+    yield LRUCache(max_size=100)
+
+
+@pytest.fixture(scope='function')
+def cached_client(response_cache: LRUCache[str, bytes]) -> FlaskClient:
+    yield create_app(response_cache=response_cache).test_client
+
+
+class TestGetMeteringPointListResponseCache:
+
+    def test__identical_requests__should_return_cached_response(
+            self,
+            session: db.Session,
+            cached_client: FlaskClient,
+            response_cache: LRUCache[str, bytes],
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        r1 = cached_client.post(
+            path='/list',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+            json={'limit': 10},
+        )
+
+        # Replace the cached response to tell it apart
+        response_cache.set(
+            r1.headers['ETag'],
+            b'{"success": true, "total": 42, "meteringpoints": []}',
+        )
+
+        # -- Act -------------------------------------------------------------
+
+        r2 = cached_client.post(
+            path='/list',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+            json={'limit': 10},
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r1.status_code == 200
+        assert r1.json['total'] == 1
+
+        assert r2.status_code == 200
+        assert r2.headers['ETag'] == r1.headers['ETag']
+        assert r2.headers['Content-Type'] == 'application/json'
+        assert r2.json['total'] == 42
+
+    def test__subjects_data_changed__should_not_return_cached_response(
+            self,
+            session: db.Session,
+            cached_client: FlaskClient,
+            response_cache: LRUCache[str, bytes],
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        r1 = cached_client.post(
+            path='/list',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+            json={'limit': 10},
+        )
+
+        add_meteringpoint(gsrn='gsrn2', subject=token_subject)
+
+        # -- Act -------------------------------------------------------------
+
+        r2 = cached_client.post(
+            path='/list',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+            json={'limit': 10},
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r1.json['total'] == 1
+        assert r2.json['total'] == 2
+        assert len(response_cache) == 2
+
+    def test__count_estimate__should_not_cache_response(
+            self,
+            session: db.Session,
+            cached_client: FlaskClient,
+            response_cache: LRUCache[str, bytes],
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        add_meteringpoint(gsrn='gsrn1', subject=token_subject)
+
+        # -- Act -------------------------------------------------------------
+
+        r = cached_client.post(
+            path='/list',
+            headers={'Authorization': f'Bearer: {valid_token_encoded}'},
+            json={'count': 'estimate'},
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert len(response_cache) == 0
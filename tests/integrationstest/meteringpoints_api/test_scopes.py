@@ -16,6 +16,8 @@ TEndpoint = Tuple[str, str, List[str], Optional[Dict[str, Any]]]
 @pytest.fixture(params=[
     ('POST', '/list', ['meteringpoints.read'], None),
     ('GET', '/details', ['meteringpoints.read'], {'gsrn': '12345'}),
+    ('POST', '/details/batch', ['meteringpoints.read'], None),
+    ('POST', '/export', ['meteringpoints.read'], None),
 ])
 def endpoint(request) -> TEndpoint:
     """
@@ -162,6 +162,7 @@ class TestOnMeteringPointUpdate:
             'success': True,
             'total': 1,
             'meteringpoints': [meteringpoint_expected],
+            'next_cursor': None,
         }
 
     def test__add_two_meteringpoints_update_one_meteringpoint_address__should_update_correct_meteringpoints_address(  # noqa: E501
@@ -251,6 +252,7 @@ class TestOnMeteringPointUpdate:
                 meteringpoint_1_simple,
                 meteringpoint_2_expected_simple
             ],
+            'next_cursor': None,
         }
 
 
@@ -333,6 +335,7 @@ class TestMeteringPointAddressUpdate:
             'success': True,
             'total': 1,
             'meteringpoints': [expected_meteringpoint],
+            'next_cursor': None,
         }
 
     def test__add_two_meteringpoints_update_one_meteringpoint_address__should_update_correct_meteringpoints_address(  # noqa: E501
@@ -424,4 +427,5 @@ class TestMeteringPointAddressUpdate:
                 meteringpoint_1_simple,
                 meteringpoint_2_expected_simple
             ],
+            'next_cursor': None,
         }
@@ -0,0 +1,120 @@
+import pytest
+from flask.testing import FlaskClient
+
+from energytt_platform.bus import messages as m
+from energytt_platform.serialize import simple_serializer
+from energytt_platform.models.delegates import MeteringPointDelegate
+from energytt_platform.models.meteringpoints import \
+    MeteringPointType, MeteringPoint
+
+from meteringpoints_consumer.handlers import message_handlers
+from meteringpoints_consumer.batch import BatchDispatcher
+from meteringpoints_shared.db import db
+
+
+class TestBatchDispatcher:
+    """
+    Tests applying batches of messages.
+    """
+
+    def test__add_update_and_remove_meteringpoints_in_one_batch__should_apply_messages_in_order(  # noqa: E501
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        BatchDispatcher(message_handlers)([
+            m.MeteringPointUpdate(meteringpoint=MeteringPoint(
+                gsrn='gsrn1',
+                sector='DK1',
+                type=MeteringPointType.production,
+            )),
+            m.MeteringPointUpdate(meteringpoint=MeteringPoint(
+                gsrn='gsrn2',
+                sector='DK1',
+                type=MeteringPointType.production,
+            )),
+            m.MeteringPointDelegateGranted(delegate=MeteringPointDelegate(
+                subject=token_subject,
+                gsrn='gsrn1',
+            )),
+            m.MeteringPointDelegateGranted(delegate=MeteringPointDelegate(
+                subject=token_subject,
+                gsrn='gsrn2',
+            )),
+            m.MeteringPointRemoved(gsrn='gsrn2'),
+            m.MeteringPointUpdate(meteringpoint=MeteringPoint(
+                gsrn='gsrn1',
+                sector='DK2',
+                type=MeteringPointType.consumption,
+            )),
+        ])
+
+        r = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert r.json['success'] is True
+        assert r.json['total'] == 1
+        assert r.json['meteringpoints'] == [
+            simple_serializer.serialize(MeteringPoint(
+                gsrn='gsrn1',
+                sector='DK2',
+                type=MeteringPointType.consumption,
+            )),
+        ]
+
+    def test__handler_fails__should_rollback_entire_batch(
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        def failing_handler(msg, session):
+            raise RuntimeError('Handler failed')
+
+        handlers = dict(message_handlers)
+        handlers[m.MeteringPointRemoved] = failing_handler
+
+        # -- Act -------------------------------------------------------------
+
+        with pytest.raises(RuntimeError):
+            BatchDispatcher(handlers)([
+                m.MeteringPointUpdate(meteringpoint=MeteringPoint(
+                    gsrn='gsrn1',
+                )),
+                m.MeteringPointDelegateGranted(
+                    delegate=MeteringPointDelegate(
+                        subject=token_subject,
+                        gsrn='gsrn1',
+                    ),
+                ),
+                m.MeteringPointRemoved(gsrn='gsrn1'),
+            ])
+
+        r = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert r.status_code == 200
+        assert r.json['success'] is True
+        assert r.json['total'] == 0
@@ -97,6 +97,7 @@ class TestMeteringPointDelegateGranted:
             'success': True,
             'total': 1,
             'meteringpoints': [expected_result],
+            'next_cursor': None,
         }
 
     def test__do_not_grant_access_to_meteringpoint__should_not_return_meteringpoint(  # noqa: E501
@@ -119,6 +120,7 @@ class TestMeteringPointDelegateGranted:
             'success': True,
             'total': 0,
             'meteringpoints': [],
+            'next_cursor': None,
         }
 
 
@@ -169,4 +171,5 @@ class TestMeteringPointDelegateRevoked:
             'success': True,
             'total': len(expected_result),
             'meteringpoints': expected_result,
+            'next_cursor': None,
         }
@@ -157,6 +157,7 @@ class TestOnMeteringPointUpdate:
             'success': True,
             'total': 1,
             'meteringpoints': [meteringpoint_expected],
+            'next_cursor': None,
         }
 
     def test__add_a_meteringpoint_then_update_it__should_return_updated_meteringpoint(  # noqa: E501
@@ -214,6 +215,7 @@ class TestOnMeteringPointUpdate:
             'success': True,
             'total': 1,
             'meteringpoints': [METERINGPOINT_WITH_TECHNOLOGY_AND_ADDRESS_SIMPLE],  # noqa: E501
+            'next_cursor': None,
         }
 
     def test__add_many_meteringpoints_and_delegate_access__should_return_meteringpoints_correctly(  # noqa: E501
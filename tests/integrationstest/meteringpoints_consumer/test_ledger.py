@@ -0,0 +1,119 @@
+from typing import List
+from flask.testing import FlaskClient
+
+from energytt_platform.bus import messages as m
+from energytt_platform.models.delegates import MeteringPointDelegate
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
+
+from meteringpoints_shared.db import db
+from meteringpoints_shared.bus import BusRecord
+from meteringpoints_shared.controller import controller
+from meteringpoints_consumer.handlers import \
+    message_handlers, bulk_message_handlers, on_meteringpoint_removed
+from meteringpoints_consumer.batch import BatchConsumer, BatchDispatcher
+
+
+class RecordBroker(object):
+    """
+    Broker returning the provided records upon each poll, like when
+    messages are redelivered.
+    """
+    def __init__(self, records: List[BusRecord]):
+        self.records = records
+
+    def poll_records(self, timeout: float) -> List[BusRecord]:
+        return list(self.records)
+
+
+def consume(records: List[BusRecord]):
+    """
+    Applies records using a BatchConsumer with a ledger.
+    """
+    BatchConsumer(
+        broker=RecordBroker(records),
+        dispatcher=BatchDispatcher(
+            handlers=message_handlers,
+            bulk_handlers=bulk_message_handlers,
+        ),
+        batch_size=2,
+        timeout_ms=0,
+        ledger=True,
+    ).consume()
+
+
+class TestLedger:
+    """
+    Tests skipping already applied messages.
+    """
+
+    def test__messages_redelivered__should_skip_applied_messages(
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        records = []
+
+        for i in range(3):
+            records.append(BusRecord(
+                topic='meteringpoints',
+                partition=i,
+                offset=100 + i,
+                message=m.MeteringPointUpdate(meteringpoint=MeteringPoint(
+                    gsrn=f'gsrn{i}',
+                    sector='DK1',
+                    type=MeteringPointType.production,
+                )),
+            ))
+            records.append(BusRecord(
+                topic='meteringpoints',
+                partition=i,
+                offset=200 + i,
+                message=m.MeteringPointDelegateGranted(
+                    delegate=MeteringPointDelegate(
+                        subject=token_subject,
+                        gsrn=f'gsrn{i}',
+                    ),
+                ),
+            ))
+
+        consume(records)
+
+        # Changes made after the messages were applied, which replaying
+        # the messages would revert
+        session.begin()
+        on_meteringpoint_removed(
+            m.MeteringPointRemoved(gsrn='gsrn0'), session=session)
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        consume(records)
+
+        # -- Assert ----------------------------------------------------------
+
+        r = client.post(
+            path='/list',
+            headers={
+                'Authorization': f'Bearer: {valid_token_encoded}',
+            },
+        )
+
+        assert r.status_code == 200
+        assert sorted(mp['gsrn'] for mp in r.json['meteringpoints']) == \
+            ['gsrn1', 'gsrn2']
+
+        assert controller.get_applied_offsets(session, [
+            ('meteringpoints', 0),
+            ('meteringpoints', 1),
+            ('meteringpoints', 2),
+        ]) == {
+            ('meteringpoints', 0): 200,
+            ('meteringpoints', 1): 201,
+            ('meteringpoints', 2): 202,
+        }
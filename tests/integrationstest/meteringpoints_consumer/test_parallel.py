@@ -0,0 +1,205 @@
+from typing import List
+from flask.testing import FlaskClient
+
+from energytt_platform.bus import Message, messages as m
+from energytt_platform.models.delegates import MeteringPointDelegate
+from energytt_platform.models.tech import \
+    Technology, TechnologyType, TechnologyCodes
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
+
+from meteringpoints_consumer.handlers import \
+    message_handlers, bulk_message_handlers
+from meteringpoints_consumer.batch import BatchDispatcher
+from meteringpoints_consumer.parallel import ParallelConsumer
+from meteringpoints_shared.db import db
+
+
+class PolledBroker(object):
+    """
+    Broker returning the provided messages upon the first poll.
+    """
+    def __init__(self, messages: List[Message]):
+        self.messages = messages
+
+    def poll_list(self, timeout: float) -> List[Message]:
+        messages, self.messages = self.messages, []
+        return messages
+
+
+def consume(messages: List[Message], workers: int = 4):
+    """
+    Applies messages using a ParallelConsumer.
+    """
+    ParallelConsumer(
+        broker=PolledBroker(messages),
+        dispatcher=BatchDispatcher(
+            handlers=message_handlers,
+            bulk_handlers=bulk_message_handlers,
+        ),
+        workers=workers,
+        batch_size=3,
+        timeout_ms=0,
+    ).consume()
+
+
+def list_meteringpoints(client: FlaskClient, token: str) -> dict:
+    """
+    Invokes POST /list and returns the response JSON.
+    """
+    r = client.post(
+        path='/list',
+        headers={
+            'Authorization': f'Bearer: {token}',
+        },
+        json={'limit': 100},
+    )
+
+    assert r.status_code == 200
+    assert r.json['success'] is True
+
+    return r.json
+
+
+class TestParallelConsumer:
+    """
+    Tests applying messages in parallel lanes.
+    """
+
+    def test__messages_for_same_meteringpoints__should_be_routed_to_same_lane(  # noqa: E501
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        uut = ParallelConsumer(
+            broker=PolledBroker([]),
+            dispatcher=BatchDispatcher(message_handlers),
+            workers=4,
+            batch_size=10,
+            timeout_ms=0,
+        )
+
+        messages = [
+            m.MeteringPointUpdate(meteringpoint=MeteringPoint(gsrn='gsrn1')),
+            m.MeteringPointAddressUpdate(gsrn='gsrn1', address=None),
+            m.MeteringPointTechnologyUpdate(gsrn='gsrn1', codes=None),
+            m.MeteringPointDelegateGranted(delegate=MeteringPointDelegate(
+                subject='subject1',
+                gsrn='gsrn1',
+            )),
+            m.MeteringPointRemoved(gsrn='gsrn1'),
+        ]
+
+        # -- Act -------------------------------------------------------------
+
+        lanes = uut.partition(messages)
+
+        # -- Assert ----------------------------------------------------------
+
+        assert list(lanes.values()) == [messages]
+
+    def test__many_meteringpoints_updated_and_removed__should_apply_messages_in_order_for_each_meteringpoint(  # noqa: E501
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        messages = []
+
+        for i in range(20):
+            messages.append(m.MeteringPointUpdate(
+                meteringpoint=MeteringPoint(
+                    gsrn=f'gsrn{i}',
+                    sector='DK1',
+                    type=MeteringPointType.production,
+                ),
+            ))
+            messages.append(m.MeteringPointDelegateGranted(
+                delegate=MeteringPointDelegate(
+                    subject=token_subject,
+                    gsrn=f'gsrn{i}',
+                ),
+            ))
+
+        for i in range(0, 20, 2):
+            messages.append(m.MeteringPointRemoved(gsrn=f'gsrn{i}'))
+
+        for i in range(1, 20, 2):
+            messages.append(m.MeteringPointUpdate(
+                meteringpoint=MeteringPoint(
+                    gsrn=f'gsrn{i}',
+                    sector='DK2',
+                    type=MeteringPointType.consumption,
+                ),
+            ))
+
+        # -- Act -------------------------------------------------------------
+
+        consume(messages)
+
+        # -- Assert ----------------------------------------------------------
+
+        r = list_meteringpoints(client, valid_token_encoded)
+
+        assert r['total'] == 10
+        assert sorted(mp['gsrn'] for mp in r['meteringpoints']) == \
+            sorted(f'gsrn{i}' for i in range(1, 20, 2))
+        assert all(mp['sector'] == 'DK2' for mp in r['meteringpoints'])
+        assert all(mp['type'] == 'consumption' for mp in r['meteringpoints'])
+
+    def test__technology_messages_between_meteringpoint_messages__should_apply_technology_in_order(  # noqa: E501
+            self,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        technology = Technology(
+            tech_code='100',
+            fuel_code='200',
+            type=TechnologyType.coal,
+        )
+
+        messages = []
+
+        for i in range(10):
+            messages.append(m.MeteringPointUpdate(
+                meteringpoint=MeteringPoint(gsrn=f'gsrn{i}'),
+            ))
+            messages.append(m.MeteringPointTechnologyUpdate(
+                gsrn=f'gsrn{i}',
+                codes=TechnologyCodes(
+                    tech_code='100',
+                    fuel_code='200',
+                ),
+            ))
+            messages.append(m.MeteringPointDelegateGranted(
+                delegate=MeteringPointDelegate(
+                    subject=token_subject,
+                    gsrn=f'gsrn{i}',
+                ),
+            ))
+
+        messages.append(m.TechnologyUpdate(technology=technology))
+
+        # -- Act -------------------------------------------------------------
+
+        consume(messages)
+
+        # -- Assert ----------------------------------------------------------
+
+        r = list_meteringpoints(client, valid_token_encoded)
+
+        assert r['total'] == 10
+        assert all(
+            mp['technology']['type'] == TechnologyType.coal.value
+            for mp in r['meteringpoints']
+        )
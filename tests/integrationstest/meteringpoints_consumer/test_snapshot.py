@@ -0,0 +1,184 @@
+import gzip
+import pytest
+from pathlib import Path
+from flask.testing import FlaskClient
+
+from energytt_platform.serialize import simple_serializer
+from energytt_platform.models.common import Address
+from energytt_platform.models.tech import Technology, TechnologyType
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
+
+from meteringpoints_consumer.snapshot import import_snapshots, SnapshotError
+from meteringpoints_shared.db import db
+
+
+def list_meteringpoints(client: FlaskClient, token: str) -> dict:
+    """
+    Invokes POST /list and returns the response JSON.
+    """
+    r = client.post(
+        path='/list',
+        headers={
+            'Authorization': f'Bearer: {token}',
+        },
+        json={'limit': 100},
+    )
+
+    assert r.status_code == 200
+    assert r.json['success'] is True
+
+    return r.json
+
+
+class TestImportSnapshots:
+
+    def test__import_csv_and_ndjson_snapshots__should_import_all_tables(
+            self,
+            tmp_path: Path,
+            session: db.Session,
+            client: FlaskClient,
+            valid_token_encoded: str,
+            token_subject: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        meteringpoints = tmp_path / 'meteringpoints.csv'
+        meteringpoints.write_text(
+            'gsrn,type,sector\n'
+            'gsrn1,production,DK1\n'
+            'gsrn2,consumption,DK2\n'
+            'gsrn1,consumption,DK2\n'
+            'gsrn3,,\n'
+        )
+
+        addresses = tmp_path / 'addresses.ndjson'
+        addresses.write_text(
+            '{"gsrn": "gsrn1", "street_name": "Street", "city_name": "City"}\n'  # noqa: E501
+        )
+
+        technologies = tmp_path / 'technologies.csv'
+        technologies.write_text(
+            'tech_code,fuel_code,type\n'
+            '100,200,coal\n'
+        )
+
+        meteringpoint_technologies = tmp_path / 'technology-codes.ndjson'
+        meteringpoint_technologies.write_text(
+            '{"gsrn": "gsrn1", "tech_code": "100", "fuel_code": "200"}\n'
+        )
+
+        delegates = tmp_path / 'delegates.csv.gz'
+
+        with gzip.open(delegates, 'wt') as f:
+            f.write(
+                'subject,gsrn\n'
+                f'{token_subject},gsrn1\n'
+                f'{token_subject},gsrn1\n'
+                f'{token_subject},gsrn3\n'
+                'someone-else,gsrn2\n'
+            )
+
+        # -- Act -------------------------------------------------------------
+
+        result = import_snapshots(
+            session=session,
+            snapshots={
+                'meteringpoints': str(meteringpoints),
+                'addresses': str(addresses),
+                'technologies': str(technologies),
+                'meteringpoint-technologies': str(meteringpoint_technologies),  # noqa: E501
+                'delegates': str(delegates),
+            },
+        )
+
+        session.commit()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert result['meteringpoints'] == {'copied': 4, 'merged': 3}
+        assert result['delegates'] == {'copied': 4, 'merged': 3}
+
+        r = list_meteringpoints(client, valid_token_encoded)
+
+        assert r['total'] == 2
+        assert r['meteringpoints'] == [
+            simple_serializer.serialize(MeteringPoint(
+                gsrn='gsrn1',
+                type=MeteringPointType.consumption,
+                sector='DK2',
+                address=Address(street_name='Street', city_name='City'),
+                technology=Technology(
+                    tech_code='100',
+                    fuel_code='200',
+                    type=TechnologyType.coal,
+                ),
+            )),
+            simple_serializer.serialize(MeteringPoint(gsrn='gsrn3')),
+        ]
+
+    def test__import_snapshot_with_unknown_column__should_raise_snapshot_error(  # noqa: E501
+            self,
+            tmp_path: Path,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        meteringpoints = tmp_path / 'meteringpoints.csv'
+        meteringpoints.write_text(
+            'gsrn,foo\n'
+            'gsrn1,bar\n'
+        )
+
+        # -- Act & Assert ----------------------------------------------------
+
+        with pytest.raises(SnapshotError):
+            import_snapshots(
+                session=session,
+                snapshots={'meteringpoints': str(meteringpoints)},
+            )
+
+    @pytest.mark.parametrize('name, content, message', (
+        (
+            'meteringpoints.csv',
+            'gsrn,type,sector\n'
+            'gsrn1,production,DK1\n'
+            'gsrn2,production\n',
+            'line 3',
+        ),
+        (
+            'meteringpoints.ndjson',
+            '{"gsrn": "gsrn1"}\n'
+            '{"gsrn": \n',
+            'Invalid JSON .* line 2',
+        ),
+        (
+            'meteringpoints.ndjson',
+            '{"gsrn": "gsrn1"}\n'
+            '["gsrn2"]\n',
+            'line 2: expected a JSON object',
+        ),
+    ))
+    def test__import_snapshot_with_invalid_row__should_raise_snapshot_error_with_line(  # noqa: E501
+            self,
+            tmp_path: Path,
+            session: db.Session,
+            name: str,
+            content: str,
+            message: str,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        meteringpoints = tmp_path / name
+        meteringpoints.write_text(content)
+
+        # -- Act & Assert ----------------------------------------------------
+
+        with pytest.raises(SnapshotError, match=message):
+            import_snapshots(
+                session=session,
+                snapshots={'meteringpoints': str(meteringpoints)},
+            )
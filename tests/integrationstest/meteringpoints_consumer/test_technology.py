@@ -150,6 +150,7 @@ class TestMeteringPointTechnologyUpdate:
             'success': True,
             'total': 1,
             'meteringpoints': [expected_meteringpoint_simple],
+            'next_cursor': None,
         }
 
     def test__update_meteringpoint_technology_to_none__should_return_meteringpoint_technology(  # noqa: E501
@@ -197,6 +198,7 @@ class TestMeteringPointTechnologyUpdate:
             'success': True,
             'total': 1,
             'meteringpoints': [expected_meteringpoint_simple],
+            'next_cursor': None,
         }
 
     def test__add_two_meteringpoints_update_one__should_update_only_update_correct_meteringpoint_technology(  # noqa: E501
@@ -297,6 +299,7 @@ class TestTechnologyUpdate:
             'success': True,
             'total': 1,
             'meteringpoints': [expected_meteringpoint_simple],
+            'next_cursor': None,
         }
 
     def test__do_not_add_technology__meteringpoint_technology_is_none(
@@ -333,6 +336,7 @@ class TestTechnologyUpdate:
             'success': True,
             'total': 1,
             'meteringpoints': [expected_meteringpoint_simple],
+            'next_cursor': None,
         }
 
 
@@ -386,6 +390,7 @@ class TestTechnologyRemoved:
             'success': True,
             'total': 1,
             'meteringpoints': [expected_meteringpoint_simple],
+            'next_cursor': None,
         }
 
     def test__remove_different_technology__should_return_meteringpoint_technology(  # noqa: E501
@@ -438,4 +443,5 @@ class TestTechnologyRemoved:
             'success': True,
             'total': 1,
             'meteringpoints': [expected_meteringpoint_simple],
+            'next_cursor': None,
         }
@@ -0,0 +1,58 @@
+import zlib
+import pytest
+
+from meteringpoints_api.compression import compress_chunks, negotiate_coding
+
+
+class TestCompressChunks:
+
+    def test__should_yield_chunks_which_can_be_decompressed_as_received(
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        chunks = ['chunk1\n', b'chunk2\n', 'chunk3\n']
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        # -- Act -------------------------------------------------------------
+
+        compressed = compress_chunks(chunks, negotiate_coding('gzip'))
+
+        # -- Assert ----------------------------------------------------------
+
+        assert decompressor.decompress(next(compressed)) == b'chunk1\n'
+        assert decompressor.decompress(next(compressed)) == b'chunk2\n'
+        assert decompressor.decompress(next(compressed)) == b'chunk3\n'
+        assert decompressor.decompress(b''.join(compressed)) == b''
+        assert decompressor.eof
+
+
+class TestNegotiateCoding:
+
+    @pytest.mark.parametrize('accept_encoding, expected_coding', (
+        (None, None),
+        ('', None),
+        ('identity', None),
+        ('gzip', 'gzip'),
+        ('GZIP', 'gzip'),
+        ('deflate, gzip;q=0.5', 'gzip'),
+        ('*', 'gzip'),
+        ('gzip;q=0', None),
+        ('*, gzip;q=0', None),
+    ))
+    def test__only_gzip_available__should_return_accepted_coding(
+            self,
+            accept_encoding: str,
+            expected_coding: str,
+            monkeypatch,
+    ):
+        monkeypatch.setattr('meteringpoints_api.compression.brotli', None)
+        monkeypatch.setattr('meteringpoints_api.compression.zstandard', None)
+
+        coding = negotiate_coding(accept_encoding)
+
+        if expected_coding is None:
+            assert coding is None
+        else:
+            assert coding.name == expected_coding
@@ -0,0 +1,127 @@
+import pytest
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+from energytt_platform.serialize import json_serializer, simple_serializer
+from energytt_platform.models.tech import TechnologyType
+from energytt_platform.models.meteringpoints import MeteringPointType
+
+from meteringpoints_api.endpoints import GetMeteringPointList
+from meteringpoints_api.encoding import (
+    JSON,
+    MSGPACK,
+    meteringpoint_encoder,
+    negotiate_encoding,
+)
+from meteringpoints_shared.models import DbMeteringPointRead
+
+
+# A row of DbMeteringPointRead, accessible both by position and by name
+Row = namedtuple(
+    'Row', [c.name for c in DbMeteringPointRead.__table__.columns])
+
+
+def make_row(**values) -> Row:
+    return Row(**{
+        name: values.get(name)
+        for name in Row._fields
+    })
+
+
+TECHNOLOGIES = {
+    ('T1', 'F1'): TechnologyType.wind,
+}
+
+ROWS = (
+    make_row(gsrn='gsrn1'),
+    make_row(
+        gsrn='gsrn2',
+        type=MeteringPointType.production,
+        sector='DK1',
+        address_street_name='Street æøå "1"',
+        address_city_name='City',
+        tech_code='T1',
+        fuel_code='F1',
+    ),
+    make_row(
+        gsrn='gsrn3',
+        type=MeteringPointType.consumption,
+        tech_code='T2',
+        fuel_code='F2',
+    ),
+)
+
+
+class TestMeteringPointRowEncoder:
+    """
+    Tests MeteringPointRowEncoder.
+    """
+
+    @pytest.mark.parametrize('row', ROWS)
+    def test__encode__should_return_same_as_serializing_meteringpoint(
+            self,
+            row: Row,
+    ):
+        assert meteringpoint_encoder.encode(row, TECHNOLOGIES) == \
+            simple_serializer.serialize(
+                DbMeteringPointRead.build_meteringpoint(row, TECHNOLOGIES))
+
+    def test__encode_many_as_json__should_return_same_bytes_as_serializing_response(  # noqa: E501
+            self,
+    ):
+
+        # -- Act -------------------------------------------------------------
+
+        body = JSON.encode({
+            'success': True,
+            'total': None,
+            'meteringpoints': meteringpoint_encoder.encode_many(
+                ROWS, TECHNOLOGIES),
+            'next_cursor': None,
+        })
+
+        # -- Assert ----------------------------------------------------------
+
+        assert body == json_serializer.serialize(GetMeteringPointList.Response(
+            success=True,
+            total=None,
+            meteringpoints=[
+                DbMeteringPointRead.build_meteringpoint(row, TECHNOLOGIES)
+                for row in ROWS
+            ],
+            next_cursor=None,
+        ))
+
+
+class TestNegotiateEncoding:
+    """
+    Tests negotiate_encoding().
+    """
+
+    @pytest.mark.parametrize('accept, expected_encoding', (
+        (None, JSON),
+        ('*/*', JSON),
+        ('application/json', JSON),
+        ('application/msgpack', MSGPACK),
+        ('application/x-msgpack', MSGPACK),
+        ('application/json, application/msgpack', JSON),
+        ('application/json;q=0.5, application/msgpack', MSGPACK),
+        ('application/msgpack;q=0, application/json;q=0.1', JSON),
+    ))
+    def test__msgpack_available__should_return_preferred_encoding(
+            self,
+            accept: str,
+            expected_encoding,
+    ):
+        context = MagicMock()
+        context.headers = {'Accept': accept} if accept else {}
+
+        with patch('meteringpoints_api.encoding.msgpack'):
+            assert negotiate_encoding(context) is expected_encoding
+
+    def test__msgpack_not_available__should_return_json(self):
+        context = MagicMock()
+        context.headers = {'Accept': 'application/msgpack'}
+
+        with patch('meteringpoints_api.encoding.msgpack', new=None):
+            assert negotiate_encoding(context) is JSON
@@ -0,0 +1,150 @@
+from energytt_platform.bus import messages as m
+from energytt_platform.models.common import Address
+from energytt_platform.models.tech import TechnologyCodes
+from energytt_platform.models.delegates import MeteringPointDelegate
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
+
+from meteringpoints_consumer.coalesce import coalesce
+
+
+ADDRESS = Address(
+    street_code='street_code',
+    street_name='street_name',
+    building_number='building_number',
+    floor_id='floor_id',
+    room_id='room_id',
+    post_code='post_code',
+    city_name='city_name',
+    city_sub_division_name='city_sub_division_name',
+    municipality_code='municipality_code',
+    location_description='location_description',
+)
+
+CODES = TechnologyCodes(tech_code='100', fuel_code='200')
+
+
+def update(gsrn: str, **kwargs) -> m.MeteringPointUpdate:
+    return m.MeteringPointUpdate(
+        meteringpoint=MeteringPoint(gsrn=gsrn, **kwargs),
+    )
+
+
+class TestCoalesce:
+
+    def test__many_updates_of_same_meteringpoint__should_keep_only_last_update(  # noqa: E501
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        messages = [
+            update('gsrn1', type=MeteringPointType.production),
+            update('gsrn1', type=MeteringPointType.consumption),
+            update('gsrn1', sector='DK1'),
+        ]
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert coalesce(messages) == [messages[2]]
+
+    def test__updates_of_different_meteringpoints__should_keep_all_updates(  # noqa: E501
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        messages = [
+            update('gsrn1', sector='DK1'),
+            update('gsrn2', sector='DK1'),
+            m.MeteringPointAddressUpdate(gsrn='gsrn3', address=ADDRESS),
+        ]
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert coalesce(messages) == messages
+
+    def test__address_and_technology_updates__should_keep_last_update_of_each_entity(  # noqa: E501
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        messages = [
+            m.MeteringPointAddressUpdate(gsrn='gsrn1', address=ADDRESS),
+            m.MeteringPointTechnologyUpdate(gsrn='gsrn1', codes=CODES),
+            m.MeteringPointAddressUpdate(gsrn='gsrn1', address=None),
+            update('gsrn1', sector='DK1'),
+            m.MeteringPointTechnologyUpdate(gsrn='gsrn1', codes=None),
+        ]
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert coalesce(messages) == messages[2:]
+
+    def test__update_with_address_followed_by_update_without_address__should_keep_both_updates(  # noqa: E501
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        messages = [
+            update('gsrn1', sector='DK1', address=ADDRESS),
+            update('gsrn1', sector='DK2'),
+        ]
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert coalesce(messages) == messages
+
+    def test__address_update_followed_by_update_with_address__should_keep_only_update(  # noqa: E501
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        messages = [
+            m.MeteringPointAddressUpdate(gsrn='gsrn1', address=None),
+            update('gsrn1', sector='DK2', address=ADDRESS),
+        ]
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert coalesce(messages) == [messages[1]]
+
+    def test__meteringpoint_removed__should_cancel_earlier_updates_but_not_later_updates(  # noqa: E501
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        messages = [
+            update('gsrn1', sector='DK1', address=ADDRESS),
+            m.MeteringPointTechnologyUpdate(gsrn='gsrn1', codes=CODES),
+            m.MeteringPointRemoved(gsrn='gsrn1'),
+            update('gsrn1', sector='DK2'),
+        ]
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert coalesce(messages) == messages[2:]
+
+    def test__delegate_messages__should_never_be_coalesced(
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        delegate = MeteringPointDelegate(subject='subject1', gsrn='gsrn1')
+
+        messages = [
+            update('gsrn1', sector='DK1'),
+            m.MeteringPointDelegateGranted(delegate=delegate),
+            m.MeteringPointDelegateRevoked(delegate=delegate),
+            m.MeteringPointDelegateGranted(delegate=delegate),
+            update('gsrn1', sector='DK2'),
+        ]
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert coalesce(messages) == messages[1:]
@@ -0,0 +1,70 @@
+from energytt_platform.bus import messages as m
+
+from meteringpoints_shared.bus import BusRecord
+from meteringpoints_consumer.ledger import batch_records
+
+
+def record(partition: int, offset: int, gsrn: str) -> BusRecord:
+    return BusRecord(
+        topic='topic',
+        partition=partition,
+        offset=offset,
+        message=m.MeteringPointRemoved(gsrn=gsrn),
+    )
+
+
+class TestBatchRecords:
+
+    def test__all_messages_included__should_batch_messages_with_offsets_of_each_batch(  # noqa: E501
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        records = [
+            record(0, 10, 'gsrn1'),
+            record(0, 11, 'gsrn2'),
+            record(1, 20, 'gsrn3'),
+            record(1, 21, 'gsrn4'),
+            record(1, 22, 'gsrn5'),
+        ]
+
+        messages = [r.message for r in records]
+
+        # -- Act -------------------------------------------------------------
+
+        batches = list(batch_records(records, messages, batch_size=2))
+
+        # -- Assert ----------------------------------------------------------
+
+        assert batches == [
+            (messages[0:2], {('topic', 0): 11}),
+            (messages[2:4], {('topic', 1): 21}),
+            (messages[4:5], {('topic', 1): 22}),
+        ]
+
+    def test__last_messages_left_out__should_yield_empty_batch_with_their_offsets(  # noqa: E501
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        records = [
+            record(0, 10, 'gsrn1'),
+            record(1, 20, 'gsrn2'),
+            record(0, 11, 'gsrn1'),
+            record(1, 21, 'gsrn2'),
+        ]
+
+        messages = [records[0].message]
+
+        # -- Act -------------------------------------------------------------
+
+        batches = list(batch_records(records, messages, batch_size=1))
+
+        # -- Assert ----------------------------------------------------------
+
+        assert batches == [
+            ([records[0].message], {('topic', 0): 10}),
+            ([], {('topic', 1): 21, ('topic', 0): 11}),
+        ]
@@ -0,0 +1,341 @@
+import time
+import pytest
+from typing import List, Callable
+
+from meteringpoints_shared.db import db
+from meteringpoints_shared.cache import LRUCache
+from meteringpoints_shared.access import AccessCache, TOO_MANY, EPOCH_KEY
+from meteringpoints_shared.controller import controller
+from meteringpoints_shared.models import DbMeteringPointDelegate
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5) -> bool:
+    """
+    Waits until condition is met, or timeout (in seconds) is reached.
+    """
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+
+    return True
+
+
+def get_shared(shared: LRUCache[str, bytes], subject: str) -> bytes:
+    """
+    Returns the entry of a subject in the shared store (of this epoch).
+    """
+    return shared.get(f'{shared.get(EPOCH_KEY).decode()}:{subject}')
+
+
+class TestAccessCache:
+    """
+    Tests AccessCache.
+    """
+
+    @pytest.fixture(scope='function')
+    def access_cache(self, session: db.Session) -> AccessCache:
+        access_cache = AccessCache(max_size=10)
+        access_cache.start_listening()
+
+        assert access_cache.listener.connected.wait(timeout=10)
+        assert access_cache.is_enabled
+
+        yield access_cache
+
+        access_cache.listener.stop()
+
+    def test__not_listening__should_not_be_enabled(self):
+        assert not AccessCache(max_size=10).is_enabled
+
+    def test__get_accessible_gsrn__should_return_delegated_gsrn(
+            self,
+            session: db.Session,
+            access_cache: AccessCache,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointDelegate(gsrn='gsrn1', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn2', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn3', subject='subject2'))
+        session.commit()
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert access_cache.get_accessible_gsrn(session, 'subject1') == \
+               {'gsrn1', 'gsrn2'}
+
+        assert access_cache.get_accessible_gsrn(session, 'subject2') == \
+               {'gsrn3'}
+
+        assert access_cache.get_accessible_gsrn(session, 'subject3') == \
+               set()
+
+    def test__access_changed_and_committed__should_invalidate_subject(
+            self,
+            session: db.Session,
+            access_cache: AccessCache,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        access_cache.get_accessible_gsrn(session, 'subject1')
+        access_cache.get_accessible_gsrn(session, 'subject2')
+
+        # Ends the transaction begun by loading the cache
+        session.rollback()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.grant_meteringpoint_delegate(
+            session=session,
+            gsrn='gsrn1',
+            subject='subject1',
+        )
+
+        controller.notify_access_changed(
+            session=session,
+            subjects=['subject1'],
+        )
+
+        # Not invalidated before commit
+        assert access_cache.entries.get('subject1') is not None
+
+        session.commit()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert wait_for(lambda: access_cache.entries.get('subject1') is None)
+        assert access_cache.entries.get('subject2') is not None
+
+        assert access_cache.get_accessible_gsrn(session, 'subject1') == \
+               {'gsrn1'}
+
+    def test__notify_access_changed_for_meteringpoints__should_invalidate_delegated_subjects(  # noqa: E501
+            self,
+            session: db.Session,
+            access_cache: AccessCache,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointDelegate(gsrn='gsrn1', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn2', subject='subject2'))
+        session.commit()
+
+        access_cache.get_accessible_gsrn(session, 'subject1')
+        access_cache.get_accessible_gsrn(session, 'subject2')
+
+        # Ends the transaction begun by loading the cache
+        session.rollback()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.notify_access_changed_for_meteringpoints(
+            session=session,
+            gsrn=['gsrn1'],
+        )
+
+        session.commit()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert wait_for(lambda: access_cache.entries.get('subject1') is None)
+        assert access_cache.entries.get('subject2') is not None
+
+    def test__access_to_more_than_max_gsrn__should_return_none(
+            self,
+            session: db.Session,
+            access_cache: AccessCache,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        access_cache.max_gsrn = 1
+
+        session.begin()
+        session.add(DbMeteringPointDelegate(gsrn='gsrn1', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn2', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn3', subject='subject2'))
+        session.commit()
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert access_cache.get_accessible_gsrn(session, 'subject1') is None
+        assert access_cache.entries.get('subject1') is TOO_MANY
+
+        assert access_cache.get_accessible_gsrn(session, 'subject2') == \
+               {'gsrn3'}
+
+
+class TestAccessCacheShared:
+    """
+    Tests AccessCache sharing entries between processes.
+    """
+
+    @pytest.fixture(scope='function')
+    def shared(self) -> LRUCache[str, bytes]:
+        return LRUCache(max_size=10)
+
+    @pytest.fixture(scope='function')
+    def access_caches(
+            self,
+            session: db.Session,
+            shared: LRUCache[str, bytes],
+    ) -> List[AccessCache]:
+        """
+        Two caches sharing a store, as if in separate processes.
+        """
+        access_caches = [
+            AccessCache(max_size=10, shared=shared),
+            AccessCache(max_size=10, shared=shared),
+        ]
+
+        for access_cache in access_caches:
+            access_cache.start_listening()
+            assert access_cache.listener.connected.wait(timeout=10)
+
+        yield access_caches
+
+        for access_cache in access_caches:
+            access_cache.listener.stop()
+
+    def test__loaded_by_one_process__should_be_reused_by_another(
+            self,
+            session: db.Session,
+            access_caches: List[AccessCache],
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointDelegate(gsrn='gsrn1', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn2', subject='subject1'))
+        session.commit()
+
+        access_caches[0].get_accessible_gsrn(session, 'subject1')
+        access_caches[0].get_accessible_gsrn(session, 'subject2')
+
+        # Ends the transaction begun by loading the cache
+        session.rollback()
+
+        # Not notified, so only visible if loaded from the database
+        session.begin()
+        session.query(DbMeteringPointDelegate).delete()
+        session.commit()
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert access_caches[1].get_accessible_gsrn(session, 'subject1') == \
+               {'gsrn1', 'gsrn2'}
+
+        assert access_caches[1].get_accessible_gsrn(session, 'subject2') == \
+               set()
+
+    def test__access_changed_and_committed__should_invalidate_shared_store(  # noqa: E501
+            self,
+            session: db.Session,
+            shared: LRUCache[str, bytes],
+            access_caches: List[AccessCache],
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        access_caches[0].get_accessible_gsrn(session, 'subject1')
+
+        # Ends the transaction begun by loading the cache
+        session.rollback()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.grant_meteringpoint_delegate(
+            session=session,
+            gsrn='gsrn1',
+            subject='subject1',
+        )
+
+        controller.notify_access_changed(
+            session=session,
+            subjects=['subject1'],
+        )
+
+        session.commit()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert wait_for(lambda: get_shared(shared, 'subject1') is None)
+
+        assert access_caches[1].get_accessible_gsrn(session, 'subject1') == \
+               {'gsrn1'}
+
+    def test__reconnected__should_not_use_shared_entries_stored_before(
+            self,
+            session: db.Session,
+            shared: LRUCache[str, bytes],
+            access_caches: List[AccessCache],
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointDelegate(gsrn='gsrn1', subject='subject1'))
+        session.commit()
+
+        access_caches[0].get_accessible_gsrn(session, 'subject1')
+
+        # Ends the transaction begun by loading the cache
+        session.rollback()
+
+        # Access revoked while no process was listening (not notified)
+        session.begin()
+        session.query(DbMeteringPointDelegate).delete()
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        # Every process reconnects
+        for access_cache in access_caches:
+            access_cache.clear()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert get_shared(shared, 'subject1') is None
+
+        assert access_caches[1].get_accessible_gsrn(session, 'subject1') == \
+               set()
+
+    def test__access_to_more_than_max_gsrn__should_share_that(
+            self,
+            session: db.Session,
+            shared: LRUCache[str, bytes],
+            access_caches: List[AccessCache],
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        for access_cache in access_caches:
+            access_cache.max_gsrn = 1
+
+        session.begin()
+        session.add(DbMeteringPointDelegate(gsrn='gsrn1', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn2', subject='subject1'))
+        session.commit()
+
+        access_caches[0].get_accessible_gsrn(session, 'subject1')
+
+        # -- Act & Assert ----------------------------------------------------
+
+        assert get_shared(shared, 'subject1') is not None
+        assert access_caches[1].get_accessible_gsrn(session, 'subject1') \
+            is None
@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock, patch
+
+from energytt_platform.bus import MessageSerializer, message_registry
+
+from meteringpoints_shared.bus import KafkaRecordBroker
+from meteringpoints_shared.metrics import CONSUMER_LAG
+
+
+def make_broker(lag: float) -> KafkaRecordBroker:
+    """
+    Returns a broker with a mocked Kafka consumer reporting lag.
+    """
+    broker = KafkaRecordBroker(
+        group='group',
+        servers=[],
+        serializer=MessageSerializer(registry=message_registry),
+    )
+
+    kafka_consumer = MagicMock()
+    kafka_consumer.poll.return_value = {}
+    kafka_consumer.metrics.return_value = {
+        'consumer-fetch-manager-metrics': {'records-lag-max': lag},
+    }
+
+    # Replaces the cached (lazily created) consumer
+    broker.__dict__['_kafka_consumer'] = kafka_consumer
+
+    return broker
+
+
+class TestKafkaRecordBroker:
+    """
+    Tests KafkaRecordBroker.
+    """
+
+    def test__poll_records__should_sample_consumer_lag(self):
+        broker = make_broker(lag=42)
+
+        broker.poll_records(timeout=1)
+
+        assert CONSUMER_LAG._value.get() == 42
+
+    def test__poll_within_sample_interval__should_not_sample_again(self):
+        broker = make_broker(lag=42)
+
+        with patch('meteringpoints_shared.bus.time.monotonic') as monotonic:
+            monotonic.return_value = 100
+            broker.poll_list(timeout=1)
+
+            monotonic.return_value = 101
+            broker.poll_list(timeout=1)
+
+            monotonic.return_value = 100 + broker.LAG_SAMPLE_INTERVAL
+            broker.poll_list(timeout=1)
+
+        assert broker.kafka_consumer.metrics.call_count == 2
@@ -0,0 +1,96 @@
+import pytest
+from unittest.mock import patch
+
+from meteringpoints_shared.cache import LRUCache, require_redis
+
+
+class TestLRUCache:
+    """
+    Tests LRUCache.
+    """
+
+    def test__get__key_does_not_exist__should_return_none(self):
+        cache = LRUCache(max_size=10)
+
+        assert cache.get('foo') is None
+
+    def test__set_then_get__should_return_value(self):
+        cache = LRUCache(max_size=10)
+        cache.set('foo', 1)
+
+        assert cache.get('foo') == 1
+
+    def test__set_more_than_max_size__should_evict_least_recently_used(
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        # -- Act -------------------------------------------------------------
+
+        # Using 'a' makes 'b' the least recently used
+        cache.get('a')
+        cache.set('c', 3)
+
+        # -- Assert ----------------------------------------------------------
+
+        assert len(cache) == 2
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+
+    def test__get_after_ttl__should_return_none(self):
+
+        # -- Arrange ---------------------------------------------------------
+
+        cache = LRUCache(max_size=10, ttl=60)
+
+        with patch('meteringpoints_shared.cache.time.monotonic') as now:
+            now.return_value = 1000
+            cache.set('foo', 1)
+
+            # -- Act & Assert ------------------------------------------------
+
+            now.return_value = 1059
+            assert cache.get('foo') == 1
+
+            now.return_value = 1061
+            assert cache.get('foo') is None
+            assert len(cache) == 0
+
+    def test__delete_and_clear__should_remove_entries(self):
+        cache = LRUCache(max_size=10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        cache.delete('a')
+        assert cache.get('a') is None
+        assert cache.get('b') == 2
+
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestRequireRedis:
+    """
+    Tests require_redis().
+    """
+
+    def test__redis_not_installed__should_raise_naming_setting(self):
+        with patch('meteringpoints_shared.cache.redis', None):
+            with pytest.raises(RuntimeError, match='RESPONSE_CACHE_BACKEND'):
+                require_redis(
+                    'RESPONSE_CACHE_BACKEND', 'redis://localhost:6379/0')
+
+    def test__url_not_configured__should_raise_naming_setting(self):
+        with patch('meteringpoints_shared.cache.redis', object()):
+            with pytest.raises(RuntimeError, match='ACCESS_CACHE_BACKEND'):
+                require_redis('ACCESS_CACHE_BACKEND', None)
+
+    def test__installed_and_configured__should_not_raise(self):
+        with patch('meteringpoints_shared.cache.redis', object()):
+            require_redis('ACCESS_CACHE_BACKEND', 'redis://localhost:6379/0')
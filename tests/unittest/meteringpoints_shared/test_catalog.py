@@ -0,0 +1,63 @@
+from unittest.mock import patch, MagicMock
+
+from energytt_platform.models.tech import TechnologyType
+
+from meteringpoints_shared.db import db
+from meteringpoints_shared.models import DbTechnology
+from meteringpoints_shared.catalog import TechnologyCatalog
+
+
+class TestTechnologyCatalog:
+    """
+    Tests TechnologyCatalog.
+    """
+
+    def test__load__should_return_type_of_technologies_mapped_by_codes(
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbTechnology(
+            tech_code='T1', fuel_code='F1', type=TechnologyType.wind))
+        session.add(DbTechnology(
+            tech_code='T2', fuel_code='F2', type=TechnologyType.coal))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        technologies = TechnologyCatalog().load(session)
+
+        # -- Assert ----------------------------------------------------------
+
+        assert technologies == {
+            ('T1', 'F1'): TechnologyType.wind,
+            ('T2', 'F2'): TechnologyType.coal,
+        }
+
+    def test__get_technologies__not_listening__should_load_from_database(
+            self,
+    ):
+        catalog = TechnologyCatalog()
+        session = MagicMock()
+
+        with patch.object(catalog, 'load') as load:
+            load.return_value = {('T1', 'F1'): TechnologyType.wind}
+
+            assert catalog.get_technologies(session) == load.return_value
+            load.assert_called_once_with(session)
+
+    def test__reload__should_replace_technologies_and_increment_version(
+            self,
+    ):
+        catalog = TechnologyCatalog()
+
+        with patch.object(catalog, 'load') as load, \
+                patch('meteringpoints_shared.catalog.db.make_session'):
+            load.return_value = {('T1', 'F1'): TechnologyType.wind}
+            catalog.reload()
+
+        assert catalog.version == 1
+        assert catalog._technologies == {('T1', 'F1'): TechnologyType.wind}
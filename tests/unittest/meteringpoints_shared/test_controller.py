@@ -5,17 +5,22 @@ from meteringpoints_shared.db import db
 from energytt_platform.models.common import Address
 from energytt_platform.models.tech import \
     Technology, TechnologyType, TechnologyCodes
+from energytt_platform.models.meteringpoints import \
+    MeteringPoint, MeteringPointType
 
 from meteringpoints_shared.controller import controller
 from meteringpoints_shared.models import (
     DbMeteringPoint,
+    DbMeteringPointRead,
     DbTechnology,
     DbMeteringPointAddress,
     DbMeteringPointDelegate,
     DbMeteringPointTechnology,
+    DbSubjectGeneration,
 )
 from meteringpoints_shared.queries import (
     MeteringPointQuery,
+    MeteringPointReadQuery,
     MeteringPointAddressQuery,
     MeteringPointTechnologyQuery,
     DelegateQuery,
@@ -150,6 +155,77 @@ class TestDatabaseControllerMeteringPoints:
             .has_gsrn('gsrn2') \
             .exists()
 
+    def test__delete_meteringpoints__should_delete_meteringpoints_and_associated_data_including_read_model(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+
+        for gsrn in ('gsrn1', 'gsrn2', 'gsrn3'):
+            session.add(DbMeteringPoint(gsrn=gsrn))
+            session.add(DbMeteringPointRead(gsrn=gsrn))
+            session.add(DbMeteringPointAddress(gsrn=gsrn))
+            session.add(DbMeteringPointTechnology(gsrn=gsrn))
+            session.add(DbMeteringPointDelegate(gsrn=gsrn, subject='subject'))
+
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.delete_meteringpoints(
+            session=session,
+            gsrn=['gsrn1', 'gsrn3'],
+        )
+
+        session.commit()
+
+        # -- Assert ----------------------------------------------------------
+
+        queries = (
+            MeteringPointQuery,
+            MeteringPointReadQuery,
+            MeteringPointAddressQuery,
+            MeteringPointTechnologyQuery,
+            DelegateQuery,
+        )
+
+        for query in queries:
+            assert [obj.gsrn for obj in query(session)] == ['gsrn2']
+
+    def test__delete_meteringpoints_then_recreate_in_same_transaction__should_create_new_meteringpoint(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPoint(gsrn='gsrn1', sector='DK1'))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.get_or_create_meteringpoint(session, 'gsrn1')
+        controller.delete_meteringpoints(session=session, gsrn=['gsrn1'])
+        meteringpoint = controller.get_or_create_meteringpoint(
+            session, 'gsrn1')
+
+        session.commit()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert meteringpoint.sector is None
+        assert MeteringPointQuery(session) \
+            .has_gsrn('gsrn1') \
+            .exists()
+
 
 class TestDatabaseControllerMeteringPointAddress:
     """
@@ -617,7 +693,9 @@ class TestDatabaseControllerTechnology:
     Tests methods regarding Technologies.
     """
 
-    def test__get_or_create_technology__technology_already_exists__should_return_existing_technology(  # noqa: E501
+    # -- set_technology() ----------------------------------------------------
+
+    def test__set_technology__technology_already_exists__should_update_type_of_technology(  # noqa: E501
             self,
             session: db.Session,
     ):
@@ -628,33 +706,45 @@ class TestDatabaseControllerTechnology:
         session.add(DbTechnology(
             tech_code='T010101',
             fuel_code='F01010101',
+            type=TechnologyType.coal,
         ))
         session.commit()
 
         # -- Act -------------------------------------------------------------
 
-        technology = controller.get_or_create_technology(
+        controller.set_technology(
             session=session,
-            tech_code='T010101',
-            fuel_code='F01010101',
+            technology=Technology(
+                tech_code='T010101',
+                fuel_code='F01010101',
+                type=TechnologyType.wind,
+            ),
         )
 
         # -- Assert ----------------------------------------------------------
 
-        assert technology.tech_code == 'T010101'
-        assert technology.fuel_code == 'F01010101'
+        db_technology = TechnologyQuery(session) \
+            .has_tech_code('T010101') \
+            .has_fuel_code('F01010101') \
+            .one()
+
+        assert db_technology.type is TechnologyType.wind
+        assert TechnologyQuery(session).count() == 1
 
-    def test__get_or_create_technology__technology_does_not_exists__should_create_and_return_technology(  # noqa: E501
+    def test__set_technology__technology_does_not_exists__should_create_technology(  # noqa: E501
             self,
             session: db.Session,
     ):
 
         # -- Act -------------------------------------------------------------
 
-        technology = controller.get_or_create_technology(
+        controller.set_technology(
             session=session,
-            tech_code='T010101',
-            fuel_code='F01010101',
+            technology=Technology(
+                tech_code='T010101',
+                fuel_code='F01010101',
+                type=TechnologyType.solar,
+            ),
         )
 
         # -- Assert ----------------------------------------------------------
@@ -664,11 +754,7 @@ class TestDatabaseControllerTechnology:
             .has_fuel_code('F01010101') \
             .one()
 
-        assert technology.tech_code == 'T010101'
-        assert technology.fuel_code == 'F01010101'
-
-        assert db_technology.tech_code == 'T010101'
-        assert db_technology.fuel_code == 'F01010101'
+        assert db_technology.type is TechnologyType.solar
 
     # -- delete_technology() -------------------------------------------------
 
@@ -707,3 +793,394 @@ class TestDatabaseControllerTechnology:
             .has_tech_code('T020202') \
             .has_fuel_code('F02020202') \
             .exists()
+
+
+class TestDatabaseControllerBulk:
+    """
+    Tests set-based bulk methods.
+    """
+
+    def test__bulk_upsert_meteringpoints__should_create_new_and_update_existing_meteringpoints(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPoint(
+            gsrn='gsrn1',
+            sector='DK1',
+            type=MeteringPointType.consumption,
+        ))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.bulk_upsert_meteringpoints(
+            session=session,
+            meteringpoints=[
+                MeteringPoint(
+                    gsrn='gsrn1',
+                    sector='DK2',
+                    type=MeteringPointType.production,
+                ),
+                MeteringPoint(
+                    gsrn='gsrn2',
+                    sector='DK1',
+                    type=MeteringPointType.consumption,
+                ),
+                MeteringPoint(
+                    gsrn='gsrn2',
+                    sector='DK2',
+                    type=MeteringPointType.production,
+                ),
+            ],
+        )
+
+        session.commit()
+        session.expire_all()
+
+        # -- Assert ----------------------------------------------------------
+
+        meteringpoints = MeteringPointQuery(session) \
+            .order_by(DbMeteringPoint.gsrn) \
+            .all()
+
+        assert [(mp.gsrn, mp.sector, mp.type) for mp in meteringpoints] == [
+            ('gsrn1', 'DK2', MeteringPointType.production),
+            ('gsrn2', 'DK2', MeteringPointType.production),
+        ]
+
+    def test__bulk_set_meteringpoint_addresses__should_create_new_and_update_existing_addresses(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointAddress(gsrn='gsrn1', city_name='old'))
+        session.add(DbMeteringPointAddress(gsrn='gsrn3', city_name='old'))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.bulk_set_meteringpoint_addresses(
+            session=session,
+            addresses={
+                'gsrn1': Address(city_name='new1', post_code='1000'),
+                'gsrn2': Address(city_name='new2'),
+            },
+        )
+
+        session.commit()
+        session.expire_all()
+
+        # -- Assert ----------------------------------------------------------
+
+        addresses = MeteringPointAddressQuery(session) \
+            .order_by(DbMeteringPointAddress.gsrn) \
+            .all()
+
+        assert [(a.gsrn, a.city_name, a.post_code) for a in addresses] == [
+            ('gsrn1', 'new1', '1000'),
+            ('gsrn2', 'new2', None),
+            ('gsrn3', 'old', None),
+        ]
+
+    def test__bulk_set_meteringpoint_technologies__should_create_new_and_update_existing_technologies(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointTechnology(
+            gsrn='gsrn1',
+            tech_code='T010101',
+            fuel_code='F01010101',
+        ))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.bulk_set_meteringpoint_technologies(
+            session=session,
+            technologies={
+                'gsrn1': TechnologyCodes(
+                    tech_code='T020202',
+                    fuel_code='F02020202',
+                ),
+                'gsrn2': TechnologyCodes(
+                    tech_code='T030303',
+                    fuel_code='F03030303',
+                ),
+            },
+        )
+
+        session.commit()
+        session.expire_all()
+
+        # -- Assert ----------------------------------------------------------
+
+        technologies = MeteringPointTechnologyQuery(session) \
+            .order_by(DbMeteringPointTechnology.gsrn) \
+            .all()
+
+        assert [(t.gsrn, t.tech_code, t.fuel_code) for t in technologies] == [
+            ('gsrn1', 'T020202', 'F02020202'),
+            ('gsrn2', 'T030303', 'F03030303'),
+        ]
+
+    def test__bulk_delete_meteringpoint_addresses_and_technologies__should_delete_correct(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        for gsrn in ('gsrn1', 'gsrn2', 'gsrn3'):
+            session.add(DbMeteringPointAddress(gsrn=gsrn))
+            session.add(DbMeteringPointTechnology(gsrn=gsrn))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.bulk_delete_meteringpoint_addresses(
+            session=session,
+            gsrn=['gsrn1', 'gsrn2'],
+        )
+
+        controller.bulk_delete_meteringpoint_technologies(
+            session=session,
+            gsrn=['gsrn2', 'gsrn3'],
+        )
+
+        session.commit()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert [a.gsrn for a in MeteringPointAddressQuery(session)] == \
+               ['gsrn3']
+
+        assert [t.gsrn for t in MeteringPointTechnologyQuery(session)] == \
+               ['gsrn1']
+
+
+class TestDatabaseControllerSubjectGenerations:
+    """
+    Tests methods regarding subject generations.
+    """
+
+    def test__get_subject_generation__subject_does_not_exist__should_return_zero(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+        assert controller.get_subject_generation(
+            session=session,
+            subject='subject1',
+        ) == 0
+
+    def test__bump_subject_generations__should_increment_generation_of_provided_subjects(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbSubjectGeneration(subject='subject1', generation=5))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.bump_subject_generations(
+            session=session,
+            subjects=['subject1', 'subject2', 'subject2'],
+        )
+
+        session.commit()
+        session.expire_all()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert controller.get_subject_generation(session, 'subject1') == 6
+        assert controller.get_subject_generation(session, 'subject2') == 1
+        assert controller.get_subject_generation(session, 'subject3') == 0
+
+    def test__bump_subject_generations_for_meteringpoints__should_increment_generation_of_delegated_subjects(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointDelegate(gsrn='gsrn1', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn2', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn2', subject='subject2'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn3', subject='subject3'))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.bump_subject_generations_for_meteringpoints(
+            session=session,
+            gsrn=['gsrn1', 'gsrn2'],
+        )
+
+        session.commit()
+        session.expire_all()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert controller.get_subject_generation(session, 'subject1') == 1
+        assert controller.get_subject_generation(session, 'subject2') == 1
+        assert controller.get_subject_generation(session, 'subject3') == 0
+
+    def test__bump_subject_generations_for_technology__should_increment_generation_of_delegated_subjects(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointTechnology(
+            gsrn='gsrn1', tech_code='T1', fuel_code='F1'))
+        session.add(DbMeteringPointTechnology(
+            gsrn='gsrn2', tech_code='T2', fuel_code='F2'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn1', subject='subject1'))
+        session.add(DbMeteringPointDelegate(gsrn='gsrn2', subject='subject2'))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.bump_subject_generations_for_technology(
+            session=session,
+            tech_code='T1',
+            fuel_code='F1',
+        )
+
+        session.commit()
+        session.expire_all()
+
+        # -- Assert ----------------------------------------------------------
+
+        assert controller.get_subject_generation(session, 'subject1') == 1
+        assert controller.get_subject_generation(session, 'subject2') == 0
+
+
+class TestDatabaseControllerReadModel:
+    """
+    Tests methods regarding the denormalized read model.
+    """
+
+    def test__refresh_meteringpoint_read__should_create_update_and_delete_read_models(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPoint(
+            gsrn='gsrn1', type=MeteringPointType.production, sector='DK1'))
+        session.add(DbMeteringPoint(
+            gsrn='gsrn2', type=MeteringPointType.consumption, sector='DK2'))
+        session.add(DbMeteringPointAddress(gsrn='gsrn1', city_name='City1'))
+        session.add(DbMeteringPointTechnology(
+            gsrn='gsrn1', tech_code='T1', fuel_code='F1'))
+        session.add(DbMeteringPointTechnology(
+            gsrn='gsrn2', tech_code='T2', fuel_code='F2'))
+        session.add(DbMeteringPointRead(gsrn='gsrn3'))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+
+        controller.refresh_meteringpoint_read(
+            session=session,
+            gsrn=['gsrn1', 'gsrn2', 'gsrn3'],
+        )
+
+        session.commit()
+        session.expire_all()
+
+        # -- Assert ----------------------------------------------------------
+
+        mp1 = MeteringPointReadQuery(session).has_gsrn('gsrn1').one()
+        mp2 = MeteringPointReadQuery(session).has_gsrn('gsrn2').one()
+
+        assert MeteringPointReadQuery(session).count() == 2
+
+        assert mp1.type is MeteringPointType.production
+        assert mp1.sector == 'DK1'
+        assert mp1.address == Address(city_name='City1')
+        assert mp1.tech_code == 'T1'
+        assert mp1.fuel_code == 'F1'
+
+        assert mp2.type is MeteringPointType.consumption
+        assert mp2.sector == 'DK2'
+        assert mp2.address is None
+        assert mp2.tech_code == 'T2'
+        assert mp2.fuel_code == 'F2'
+
+    def test__refresh_meteringpoint_read__should_only_change_version_of_changed_meteringpoints(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPoint(gsrn='gsrn1', sector='DK1'))
+        session.add(DbMeteringPoint(gsrn='gsrn2', sector='DK1'))
+        controller.rebuild_meteringpoint_read(session)
+        session.commit()
+
+        version1 = MeteringPointReadQuery(session).has_gsrn('gsrn1').one() \
+            .version
+        version2 = MeteringPointReadQuery(session).has_gsrn('gsrn2').one() \
+            .version
+
+        session.rollback()
+
+        # -- Act -------------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointAddress(gsrn='gsrn1', city_name='City1'))
+
+        controller.refresh_meteringpoint_read(
+            session=session,
+            gsrn=['gsrn1', 'gsrn2'],
+        )
+
+        session.commit()
+        session.expire_all()
+
+        # -- Assert ----------------------------------------------------------
+
+        mp1 = MeteringPointReadQuery(session).has_gsrn('gsrn1').one()
+        mp2 = MeteringPointReadQuery(session).has_gsrn('gsrn2').one()
+
+        assert mp1.version > max(version1, version2)
+        assert mp2.version == version2
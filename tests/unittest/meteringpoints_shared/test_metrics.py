@@ -0,0 +1,62 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from meteringpoints_shared.metrics import observe_handler
+
+
+class MessageForTesting:
+    pass
+
+
+def get_sample(name: str, mode: str) -> float:
+    return REGISTRY.get_sample_value(name, {
+        'message_type': MessageForTesting.__name__,
+        'mode': mode,
+    }) or 0
+
+
+class TestObserveHandler:
+
+    def test__invoke_handler__should_return_value_and_observe_latency(self):
+
+        # -- Arrange ---------------------------------------------------------
+
+        def handler(msg, session):
+            return 'result'
+
+        observed = observe_handler(handler, MessageForTesting, 'single')
+        count_before = get_sample(
+            'meteringpoints_handler_latency_seconds_count', 'single')
+
+        # -- Act -------------------------------------------------------------
+
+        result = observed(MessageForTesting(), session=None)
+
+        # -- Assert ----------------------------------------------------------
+
+        assert result == 'result'
+        assert get_sample(
+            'meteringpoints_handler_latency_seconds_count', 'single') \
+            == count_before + 1
+
+    def test__handler_raises_exception__should_reraise_and_observe_latency(
+            self,
+    ):
+
+        # -- Arrange ---------------------------------------------------------
+
+        def handler(msg, session):
+            raise RuntimeError('Handler failed')
+
+        observed = observe_handler(handler, MessageForTesting, 'bulk')
+        count_before = get_sample(
+            'meteringpoints_handler_latency_seconds_count', 'bulk')
+
+        # -- Act & Assert ----------------------------------------------------
+
+        with pytest.raises(RuntimeError):
+            observed(MessageForTesting(), session=None)
+
+        assert get_sample(
+            'meteringpoints_handler_latency_seconds_count', 'bulk') \
+            == count_before + 1
@@ -2,7 +2,8 @@ import pytest
 from typing import List
 from itertools import product
 
-from energytt_platform.models.common import Order
+from energytt_platform.models.common import Order, Address
+from energytt_platform.models.tech import Technology, TechnologyType
 from energytt_platform.models.meteringpoints import (
     MeteringPoint,
     MeteringPointType,
@@ -14,6 +15,7 @@ from meteringpoints_shared.models import (
     DbMeteringPointAddress,
     DbMeteringPointTechnology,
     DbMeteringPointDelegate,
+    DbMeteringPointRead,
     DbTechnology,
     MeteringPointFilters,
     MeteringPointOrdering,
@@ -21,6 +23,7 @@ from meteringpoints_shared.models import (
 )
 from meteringpoints_shared.queries import (
     MeteringPointQuery,
+    MeteringPointReadQuery,
     MeteringPointAddressQuery,
     MeteringPointTechnologyQuery,
     DelegateQuery,
@@ -379,12 +382,168 @@ class TestMeteringPointQuery:
         else:
             raise RuntimeError('Should not happen')
 
+        # Ties are ordered by GSRN (in the same direction)
         gsrn_expected = [mp.gsrn for mp in sorted(
-            seed_meteringpoints, key=f, reverse=sort_descending)]
+            seed_meteringpoints,
+            key=lambda mp: (f(mp), mp.gsrn),
+            reverse=sort_descending,
+        )]
 
         assert len(results) == len(seed_meteringpoints)
         assert [mp.gsrn for mp in results] == gsrn_expected
 
+    @pytest.mark.parametrize('size', (1, 3, 100))
+    def test__stream__should_return_all_meteringpoints_in_order(
+            self,
+            session: db.Session,
+            seed_meteringpoints: List[MeteringPoint],
+            size: int,
+    ):
+        """
+        :param session: Database session
+        :param seed_meteringpoints: MeteringPoints to seed database with
+        :param size: Number of rows to fetch at a time
+        """
+
+        # -- Act -------------------------------------------------------------
+
+        results = list(
+            MeteringPointQuery(session)
+            .apply_ordering(MeteringPointOrdering(
+                key=MeteringPointOrderingKeys.gsrn,
+            ))
+            .stream(size)
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert all(isinstance(mp, DbMeteringPoint) for mp in results)
+        assert [mp.gsrn for mp in results] == \
+            [mp.gsrn for mp in seed_meteringpoints]
+
+    def test__stream_with_columns__should_return_row_tuples(
+            self,
+            session: db.Session,
+            seed_meteringpoints: List[MeteringPoint],
+    ):
+        """
+        :param session: Database session
+        :param seed_meteringpoints: MeteringPoints to seed database with
+        """
+
+        # -- Act -------------------------------------------------------------
+
+        results = list(
+            MeteringPointQuery(session)
+            .in_sector('DK1')
+            .apply_ordering(MeteringPointOrdering(
+                key=MeteringPointOrderingKeys.gsrn,
+            ))
+            .stream(columns=(DbMeteringPoint.gsrn, DbMeteringPoint.sector))
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert [tuple(row) for row in results] == [
+            (mp.gsrn, mp.sector)
+            for mp in seed_meteringpoints
+            if mp.sector == 'DK1'
+        ]
+        assert all(row.sector == 'DK1' for row in results)
+
+    def test__iter_chunks__should_return_meteringpoints_in_chunks_of_size(
+            self,
+            session: db.Session,
+            seed_meteringpoints: List[MeteringPoint],
+    ):
+        """
+        :param session: Database session
+        :param seed_meteringpoints: MeteringPoints to seed database with
+        """
+
+        # -- Act -------------------------------------------------------------
+
+        results = list(
+            MeteringPointQuery(session)
+            .apply_ordering(MeteringPointOrdering(
+                key=MeteringPointOrderingKeys.gsrn,
+            ))
+            .iter_chunks(3)
+        )
+
+        # -- Assert ----------------------------------------------------------
+
+        assert [len(chunk) for chunk in results] == [3, 1]
+        assert [mp.gsrn for chunk in results for mp in chunk] == \
+            [mp.gsrn for mp in seed_meteringpoints]
+
+
+class TestMeteringPointReadQuery:
+    """
+    Tests MeteringPointReadQuery.
+    """
+
+    def test__all_meteringpoints__should_return_meteringpoints_built_from_columns(  # noqa: E501
+            self,
+            session: db.Session,
+    ):
+        """
+        :param session: Database session
+        """
+
+        # -- Arrange ---------------------------------------------------------
+
+        session.begin()
+        session.add(DbMeteringPointRead(
+            gsrn='gsrn1',
+            type=MeteringPointType.production,
+            sector='DK1',
+            address_street_name='street1',
+            address_city_name='city1',
+            tech_code='100',
+            fuel_code='200',
+        ))
+        session.add(DbMeteringPointRead(
+            gsrn='gsrn2',
+            type=MeteringPointType.consumption,
+        ))
+        session.commit()
+
+        # -- Act -------------------------------------------------------------
+
+        results = MeteringPointReadQuery(session) \
+            .apply_ordering(MeteringPointOrdering(
+                key=MeteringPointOrderingKeys.gsrn,
+            )) \
+            .offset(0) \
+            .limit(10) \
+            .all_meteringpoints({('100', '200'): TechnologyType.coal})
+
+        # -- Assert ----------------------------------------------------------
+
+        assert results == [
+            MeteringPoint(
+                gsrn='gsrn1',
+                type=MeteringPointType.production,
+                sector='DK1',
+                address=Address(
+                    street_name='street1',
+                    city_name='city1',
+                ),
+                technology=Technology(
+                    tech_code='100',
+                    fuel_code='200',
+                    type=TechnologyType.coal,
+                ),
+            ),
+            MeteringPoint(
+                gsrn='gsrn2',
+                type=MeteringPointType.consumption,
+            ),
+        ]
+        assert not any(
+            isinstance(obj, DbMeteringPointRead) for obj in session)
+
 
 class TestMeteringPointAddressQuery:
     """
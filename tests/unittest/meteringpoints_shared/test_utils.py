@@ -0,0 +1,21 @@
+import pytest
+from typing import List
+
+from meteringpoints_shared.utils import chunks
+
+
+@pytest.mark.parametrize('size, expected_chunks', (
+    (1, [[1], [2], [3], [4], [5]]),
+    (2, [[1, 2], [3, 4], [5]]),
+    (5, [[1, 2, 3, 4, 5]]),
+    (10, [[1, 2, 3, 4, 5]]),
+))
+def test__chunks__should_split_items_into_chunks_of_size(
+        size: int,
+        expected_chunks: List[List[int]],
+):
+    assert list(chunks([1, 2, 3, 4, 5], size)) == expected_chunks
+
+
+def test__chunks__no_items__should_return_no_chunks():
+    assert list(chunks([], 10)) == []